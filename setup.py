@@ -32,6 +32,7 @@ extensions = [
         [
             "shareloc/bindings/bind.cpp",
             "shareloc/bindings/dtm_intersection.cpp",
+            "shareloc/bindings/map_projection.cpp",
             "shareloc/bindings/rpc.cpp",
             "shareloc/bindings/GeoModelTemplate.cpp",
         ],
@@ -48,6 +48,18 @@ std::tuple<std::vector<double>,std::vector<double>,std::vector<double>>\
     return vect;
 }
 
+std::tuple<std::array<double,3>,std::array<double,3>>\
+ GeoModelTemplate::direct_loc_h_two_altitudes(
+    double row,
+    double col,
+    double alt_first,
+    double alt_second,
+    bool fill_nan)const{
+    auto const [lon_first, lat_first, h_first] = direct_loc_h(row, col, alt_first, fill_nan);
+    auto const [lon_second, lat_second, h_second] = direct_loc_h(row, col, alt_second, fill_nan);
+    return {{lon_first, lat_first, h_first}, {lon_second, lat_second, h_second}};
+}
+
 std::tuple<double,double,double>\
  GeoModelTemplate::direct_loc_dtm(
     double row,
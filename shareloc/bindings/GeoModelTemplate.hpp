@@ -20,6 +20,7 @@ limitations under the License.
 #ifndef GMT_H
 #define GMT_H
 
+#include <array>
 #include <vector>
 #include <tuple>
 
@@ -55,6 +56,15 @@ public:
         bool fill_nan=false,
         bool using_direct_coef=false)const;
 
+    /**direct_loc_h at two altitudes unitary : returns {lon, lat, alt} at alt_first and at alt_second*/
+    virtual std::tuple<std::array<double,3>,std::array<double,3>>\
+    direct_loc_h_two_altitudes(
+        double row,
+        double col,
+        double alt_first,
+        double alt_second,
+        bool fill_nan=false)const;
+
     /**direct_loc_dtm*/
     virtual std::tuple<double,double,double>\
     direct_loc_dtm(
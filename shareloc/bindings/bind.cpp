@@ -39,11 +39,18 @@ PYBIND11_MODULE(bindings_cpp, m) {
         .def(py::init<>())
         .def(py::init<int,py::array_t<double, py::array::c_style | py::array::forcecast> \
                 ,int,int,std::tuple<double,double,double,double,double,double>>())
+        .def(py::init<int,py::array_t<double, py::array::c_style | py::array::forcecast> \
+                ,int,int,std::tuple<double,double,double,double,double,double> \
+                ,py::array_t<double, py::array::c_style | py::array::forcecast> \
+                ,py::array_t<double, py::array::c_style | py::array::forcecast>>())
         .def("eq_plan", &DTMIntersection::eq_plan)
         .def("ter_to_index", &DTMIntersection::ter_to_index)
         .def("index_to_ter", &DTMIntersection::index_to_ter)
+        .def("has_projection", &DTMIntersection::has_projection)
+        .def("geodetic_to_ter", &DTMIntersection::geodetic_to_ter)
         .def("get_footprint_corners", &DTMIntersection::get_footprint_corners)
         .def("interpolate", &DTMIntersection::interpolate)
+        .def("interpolate_n", &DTMIntersection::interpolate_n, py::arg("positions"), py::arg("crs") = py::none())
         .def("intersect_dtm_cube", &DTMIntersection::intersect_dtm_cube)
         .def("intersection", &DTMIntersection::intersection)
         .def("intersection_n_los_dtm", &DTMIntersection::intersection_n_los_dtm)
@@ -108,15 +115,15 @@ PYBIND11_MODULE(bindings_cpp, m) {
                 DTMIntersection p;
 
                 /* Assign any additional state */
-                p.set_alt_data(t[0].cast<std::vector<double>>());
+                p.set_alt_data(t[0].cast<py::array_t<double, py::array::c_style | py::array::forcecast>>());
                 p.set_alt_min(t[1].cast<double>());
                 p.set_alt_max(t[2].cast<double>());
                 p.set_plane_coef_a(t[3].cast<std::array<double,6>>());
                 p.set_plane_coef_b(t[4].cast<std::array<double,6>>());
                 p.set_plane_coef_c(t[5].cast<std::array<double,6>>());
                 p.set_plane_coef_d(t[6].cast<std::array<double,6>>());
-                p.set_alt_min_cell(t[7].cast<std::vector<double>>());
-                p.set_alt_max_cell(t[8].cast<std::vector<double>>());
+                p.set_alt_min_cell(t[7].cast<py::array_t<double, py::array::c_style | py::array::forcecast>>());
+                p.set_alt_max_cell(t[8].cast<py::array_t<double, py::array::c_style | py::array::forcecast>>());
                 p.set_tol_z(t[9].cast<double>());
                 p.set_epsg(t[10].cast<int>());
                 p.set_plans(t[11].cast<std::vector<double>>());
@@ -189,6 +196,20 @@ PYBIND11_MODULE(bindings_cpp, m) {
                                                 bool>
                                                 (&RPC::direct_loc_h, py::const_))
 
+        .def("direct_loc_h_two_altitudes", py::overload_cast<double,
+                                                double,
+                                                double,
+                                                double,
+                                                bool>
+                                                (&RPC::direct_loc_h_two_altitudes, py::const_))
+
+        .def("direct_loc_h_two_altitudes", py::overload_cast<std::vector<double> const&,
+                                                std::vector<double> const&,
+                                                std::vector<double> const&,
+                                                std::vector<double> const&,
+                                                bool>
+                                                (&RPC::direct_loc_h_two_altitudes, py::const_))
+
         .def("direct_loc_dtm", py::overload_cast<double,
                                                 double,
                                                 DTMIntersection const&>
@@ -199,6 +220,11 @@ PYBIND11_MODULE(bindings_cpp, m) {
                                                 DTMIntersection const&>
                                                 (&RPC::direct_loc_dtm, py::const_))
 
+        .def("direct_loc_grid_dtm", &RPC::direct_loc_grid_dtm,
+                                    py::arg("row0"), py::arg("col0"), py::arg("steprow"), py::arg("stepcol"),
+                                    py::arg("nbrow"), py::arg("nbcol"), py::arg("dtm"),
+                                    py::arg("warm_start_margin") = -1.0)
+
         .def("inverse_loc",py::overload_cast<double,
                                         double,
                                         double>
@@ -210,6 +236,8 @@ PYBIND11_MODULE(bindings_cpp, m) {
                                         (&RPC::inverse_loc, py::const_))
 
         .def("compute_loc_inverse_derivates", &RPC::compute_loc_inverse_derivates)
+        .def("compute_loc_inverse_alt_derivates", &RPC::compute_loc_inverse_alt_derivates)
+        .def("inverse_loc_with_jacobian", &RPC::inverse_loc_with_jacobian)
 
         .def("direct_loc_inverse_iterative",py::overload_cast<double,double,double,int,bool>\
                 (&RPC::direct_loc_inverse_iterative, py::const_))
@@ -253,7 +281,10 @@ PYBIND11_MODULE(bindings_cpp, m) {
     m.def("derivative_polynomial_longitude", &derivative_polynomial_longitude,
     "Compute longitude derivative polynomial equation");
 
-    m.def("init_min_max", &init_min_max,
+    m.def("derivative_polynomial_altitude", &derivative_polynomial_altitude,
+    "Compute altitude derivative polynomial equation");
+
+    m.def("init_min_max", py::overload_cast<std::vector<double> const&,int,int>(&init_min_max),
     "init_min_max");
     
     m.def("compute_epipolar_angle", &compute_epipolar_angle,
@@ -286,6 +317,9 @@ m.def("coloc", py::overload_cast<GeoModelTemplate const&,
                                 double,
                                 double>(&coloc));
 
+m.def("coloc_two_altitudes", &coloc_two_altitudes,
+    "Colocalization at two altitudes, the second direct localization starts from the first one");
+
 m.def("moving_along_axis", &moving_along_axis<DTMIntersection const&>);
 m.def("moving_along_axis", &moving_along_axis<double>);
 
@@ -19,11 +19,34 @@ limitations under the License.
 
 #include "dtm_intersection.hpp"
 #include <iostream>
+#include <stdexcept>
+#include <thread>
 
 using namespace std;
 namespace py = pybind11;
 
 
+//---- DoubleBuffer methods ----//
+
+DoubleBuffer::DoubleBuffer(): m_data(nullptr), m_size(0){}
+
+DoubleBuffer::DoubleBuffer(py::array_t<double, py::array::c_style | py::array::forcecast> const& array){
+
+    // the array may be a converted copy of the python input : keeping a reference to it is enough
+    m_owner = array;
+    m_data = array.data();
+    m_size = static_cast<size_t>(array.size());
+}
+
+py::array_t<double> DoubleBuffer::view() const{
+
+    // the owner is the base of the view : no copy
+    py::array_t<double> view(static_cast<py::ssize_t>(m_size), m_data, m_owner);
+    py::detail::array_proxy(view.ptr())->flags &= ~py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+    return view;
+}
+
+
 //---- DTMIntersection methods ----//
 
 DTMIntersection::DTMIntersection(){}
@@ -36,22 +59,63 @@ DTMIntersection::DTMIntersection(
         tuple<double,double,double,double,double,double> dtm_image_transform
     ){
 
+    // alt_data is borrowed, cells min/max altitudes are computed in their final buffers
+    m_alt_data = DoubleBuffer(dtm_image_alt_data);
+
+    py::ssize_t nb_cells = static_cast<py::ssize_t>(dtm_image_nb_rows - 1) * (dtm_image_nb_columns - 1);
+    py::array_t<double> alt_min_cell(nb_cells);
+    py::array_t<double> alt_max_cell(nb_cells);
+    init_min_max(m_alt_data.data(),
+                dtm_image_nb_rows,
+                dtm_image_nb_columns,
+                alt_min_cell.mutable_data(),
+                alt_max_cell.mutable_data());
+    m_alt_min_cell = DoubleBuffer(alt_min_cell);
+    m_alt_max_cell = DoubleBuffer(alt_max_cell);
+
+    init(dtm_image_epsg, dtm_image_nb_rows, dtm_image_nb_columns, dtm_image_transform);
+}
+
+DTMIntersection::DTMIntersection(
+        int dtm_image_epsg,
+        py::array_t<double, py::array::c_style | py::array::forcecast> dtm_image_alt_data,
+        int dtm_image_nb_rows,
+        int dtm_image_nb_columns,
+        tuple<double,double,double,double,double,double> dtm_image_transform,
+        py::array_t<double, py::array::c_style | py::array::forcecast> alt_min_cell,
+        py::array_t<double, py::array::c_style | py::array::forcecast> alt_max_cell
+    ){
+
+    size_t nb_cells = static_cast<size_t>(dtm_image_nb_rows - 1) * (dtm_image_nb_columns - 1);
+    if(static_cast<size_t>(dtm_image_alt_data.size()) != static_cast<size_t>(dtm_image_nb_rows) * dtm_image_nb_columns
+        || static_cast<size_t>(alt_min_cell.size()) != nb_cells
+        || static_cast<size_t>(alt_max_cell.size()) != nb_cells){
+        throw invalid_argument("C++ : DTMIntersection : alt_data or cells min/max sizes do not match dtm size");
+    }
+
+    m_alt_data = DoubleBuffer(dtm_image_alt_data);
+    m_alt_min_cell = DoubleBuffer(alt_min_cell);
+    m_alt_max_cell = DoubleBuffer(alt_max_cell);
+
+    init(dtm_image_epsg, dtm_image_nb_rows, dtm_image_nb_columns, dtm_image_transform);
+}
+
+void DTMIntersection::init(
+        int dtm_image_epsg,
+        int dtm_image_nb_rows,
+        int dtm_image_nb_columns,
+        tuple<double,double,double,double,double,double> dtm_image_transform
+    ){
+
     m_epsg = dtm_image_epsg;
+    m_projection = MapProjection(dtm_image_epsg);
     m_tol_z = 0.0001;
 
     m_nb_rows = dtm_image_nb_rows;
     m_nb_columns = dtm_image_nb_columns;
 
-    py::buffer_info buf_info = dtm_image_alt_data.request();
-    double* ptr = static_cast<double*>(buf_info.ptr);
-    m_alt_data.insert(m_alt_data.end(), ptr, ptr + buf_info.size);
-
-    tie(m_alt_min_cell,m_alt_max_cell) = init_min_max(m_alt_data,
-                                                    dtm_image_nb_rows,
-                                                    dtm_image_nb_columns);
-
-    m_alt_min = *min_element(m_alt_data.begin(), m_alt_data.end());
-    m_alt_max = *max_element(m_alt_data.begin(), m_alt_data.end());
+    m_alt_min = *min_element(m_alt_data.data(), m_alt_data.data() + m_alt_data.size());
+    m_alt_max = *max_element(m_alt_data.data(), m_alt_data.data() + m_alt_data.size());
 
     m_plane_coef_a = {1.0, 1.0, 0.0, 0.0, 0.0, 0.0};
     m_plane_coef_b = {0.0, 0.0, 1.0, 1.0, 0.0, 0.0};
@@ -131,6 +195,14 @@ array<double, 3> DTMIntersection::index_to_ter(array<double, 3> const& vect_ter)
     return ter;
 }
 
+array<double, 2> DTMIntersection::geodetic_to_ter(double lon, double lat)const{
+
+    if(m_epsg == 4326){
+        return {lon, lat};
+    }
+    return m_projection.forward(lon, lat);
+}
+
 py::array_t<double> DTMIntersection::get_footprint_corners()const{
 
     vector<double> res = {-0.5,-0.5,\
@@ -182,6 +254,69 @@ double DTMIntersection::interpolate(double delta_shift_row, double delta_shift_c
     return interp_value;
 }
 
+py::array_t<double> DTMIntersection::interpolate_n(
+    py::array_t<double, py::array::c_style | py::array::forcecast> positions,
+    optional<int> crs) const
+{
+    if (positions.ndim() != 2 || positions.shape(1) < 2){
+        throw invalid_argument("DTMIntersection::interpolate_n: positions must be a Nx2 or Nx3 array");
+    }
+    bool geodetic = crs.has_value() && *crs != m_epsg;
+    if (geodetic && (*crs != 4326 || !has_projection())){
+        throw invalid_argument("DTMIntersection::interpolate_n: positions crs "+to_string(*crs)
+                                +" can not be converted to dtm epsg "+to_string(m_epsg));
+    }
+
+    size_t nb_points = positions.shape(0);
+    size_t stride = positions.shape(1);
+    py::array_t<double> res(nb_points);
+    double const* pos = positions.data();
+    double* alt = res.mutable_data();
+
+    auto interpolate_range = [&](size_t first, size_t last){
+        for (size_t i = first; i < last; ++i){
+            double x = pos[i * stride];
+            double y = pos[i * stride + 1];
+            if (geodetic){
+                array<double, 2> ter = geodetic_to_ter(x, y);
+                x = ter[0];
+                y = ter[1];
+            }
+            double row = x * m_trans_inv[4] + y * m_trans_inv[5] + m_trans_inv[3] - 0.5;
+            double col = x * m_trans_inv[1] + y * m_trans_inv[2] + m_trans_inv[0] - 0.5;
+            // negated test so that nan positions are outside
+            if (!(row >= 0.0 && row <= m_nb_rows - 1.0 && col >= 0.0 && col <= m_nb_columns - 1.0)){
+                alt[i] = numeric_limits<double>::quiet_NaN();
+            }
+            else{
+                alt[i] = interpolate(row, col);
+            }
+        }
+    };
+
+    {
+        py::gil_scoped_release release;
+        // one thread per block of at least min_block_size points
+        constexpr size_t min_block_size = 1 << 16;
+        size_t nb_threads = min(static_cast<size_t>(max(1u, thread::hardware_concurrency())),
+                                (nb_points + min_block_size - 1) / min_block_size);
+        if (nb_threads <= 1){
+            interpolate_range(0, nb_points);
+        }
+        else{
+            vector<thread> threads;
+            size_t block_size = (nb_points + nb_threads - 1) / nb_threads;
+            for (size_t first = 0; first < nb_points; first += block_size){
+                threads.emplace_back(interpolate_range, first, min(first + block_size, nb_points));
+            }
+            for (thread& worker : threads){
+                worker.join();
+            }
+        }
+    }
+    return res;
+}
+
 
 
 
@@ -420,6 +555,47 @@ vector<double>> DTMIntersection::intersect_dtm_cube(vector<double> const& los_x,
     return make_tuple(true, point_b, h_intersect, los_x_index, los_y_index, los_z_index);
 }
 
+bool DTMIntersection::segment_above_cells(
+    array<double, 3> const& p_0,
+    array<double, 3> const& p_1) const
+{
+    double const d_row = p_1[0] - p_0[0];
+    double const d_col = p_1[1] - p_0[1];
+    double const d_alt = p_1[2] - p_0[2];
+    double const inf = numeric_limits<double>::infinity();
+
+    // cells traversal
+    int cell_row = static_cast<int>(floor(p_0[0]));
+    int cell_col = static_cast<int>(floor(p_0[1]));
+    int const step_row = d_row > 0.0 ? 1 : -1;
+    int const step_col = d_col > 0.0 ? 1 : -1;
+    double next_t_row = d_row != 0.0 ? (cell_row + (d_row > 0.0 ? 1 : 0) - p_0[0]) / d_row : inf;
+    double next_t_col = d_col != 0.0 ? (cell_col + (d_col > 0.0 ? 1 : 0) - p_0[1]) / d_col : inf;
+    double const delta_t_row = d_row != 0.0 ? 1.0 / abs(d_row) : inf;
+    double const delta_t_col = d_col != 0.0 ? 1.0 / abs(d_col) : inf;
+
+    double t_in = 0.0;
+    while(t_in < 1.0){
+        double const t_out = min({next_t_row, next_t_col, 1.0});
+        if(0 <= cell_row && cell_row < m_nb_rows - 1 && 0 <= cell_col && cell_col < m_nb_columns - 1){
+            double const alt_low = p_0[2] + d_alt * (d_alt < 0.0 ? t_out : t_in);
+            if(alt_low <= m_alt_max_cell[cell_row*(m_nb_columns-1)+cell_col]){
+                return false;
+            }
+        }
+        t_in = t_out;
+        if(next_t_row <= next_t_col){
+            cell_row += step_row;
+            next_t_row += delta_t_row;
+        }
+        else{
+            cell_col += step_col;
+            next_t_col += delta_t_col;
+        }
+    }
+    return true;
+}
+
 tuple<bool,double,double,double> DTMIntersection::intersection(
     vector<double> const& los_x_index,//rpc -> size=2
     vector<double> const& los_y_index,
@@ -935,6 +1111,18 @@ vector<double>> init_min_max(vector<double> const& alt_data,int nb_rows,int nb_c
     vector<double> alt_min_cell ((nb_rows-1)*(nb_columns-1));
     vector<double> alt_max_cell ((nb_rows-1)*(nb_columns-1));
 
+    init_min_max(alt_data.data(), nb_rows, nb_columns, alt_min_cell.data(), alt_max_cell.data());
+
+return make_tuple(alt_min_cell,alt_max_cell);
+}
+
+void init_min_max(double const* alt_data,
+                    int nb_rows,
+                    int nb_columns,
+                    double* alt_min_cell,
+                    double* alt_max_cell)
+{
+
     for(int i = 0; i < nb_rows-1; ++i){
         for(int j = 0; j < nb_columns-1; ++j){
 
@@ -955,8 +1143,6 @@ vector<double>> init_min_max(vector<double> const& alt_data,int nb_rows,int nb_c
             
         }
     }
-
-return make_tuple(alt_min_cell,alt_max_cell);
 }
 
 
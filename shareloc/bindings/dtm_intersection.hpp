@@ -24,10 +24,50 @@ limitations under the License.
 #include <array>
 #include <algorithm>
 #include <cmath>
+#include <optional>
 
 #include <pybind11/pybind11.h>
 #include "pybind11/numpy.h"
 
+#include "map_projection.hpp"
+
+
+/**
+Class DoubleBuffer
+Read only contiguous array of doubles borrowed from a numpy array (which may be a view on
+a memory mapped file) kept alive by a reference. Copies share the data.
+*/
+class DoubleBuffer
+{
+
+public:
+
+    /**Constructor empty*/
+    DoubleBuffer();
+
+    /**Constructor borrowing the array buffer*/
+    explicit DoubleBuffer(
+        pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> const& array);
+
+    /**operator[]*/
+    double operator[](std::size_t i) const noexcept {return m_data[i];};
+    /**data*/
+    double const* data() const noexcept {return m_data;};
+    /**size*/
+    std::size_t size() const noexcept {return m_size;};
+    /**view : read only 1D numpy view on the data*/
+    pybind11::array_t<double> view() const;
+
+private:
+
+    /**numpy array owning the data*/
+    pybind11::object m_owner;
+    /**data pointer*/
+    double const* m_data;
+    /**data size*/
+    std::size_t m_size;
+};
+
 
 /**
 Class DTMIntersection
@@ -52,6 +92,23 @@ public:
         std::tuple<double,double,double,double,double,double> dtm_image_transform
     );
 
+    /**
+    Constructor borrowing alt_data and cells min/max altitudes buffers, cells min/max altitudes
+    are the ones returned by init_min_max
+    */
+    DTMIntersection(
+        int dtm_image_epsg,
+        pybind11::array_t<double, \
+                    pybind11::array::c_style | pybind11::array::forcecast> dtm_image_alt_data,
+        int dtm_image_nb_rows,
+        int dtm_image_nb_columns,
+        std::tuple<double,double,double,double,double,double> dtm_image_transform,
+        pybind11::array_t<double, \
+                    pybind11::array::c_style | pybind11::array::forcecast> alt_min_cell,
+        pybind11::array_t<double, \
+                    pybind11::array::c_style | pybind11::array::forcecast> alt_max_cell
+    );
+
     /**eq_plan*/
     double eq_plan(int i, std::array<double, 3> const& position)const;
 
@@ -61,12 +118,30 @@ public:
     /**index_to_ter*/
     std::array<double, 3> index_to_ter(std::array<double, 3> const& vect_ter)const;
 
+    /**
+    has_projection : true if WGS84 geodetic coordinates can be converted to the dtm
+    coordinates system in c++ (epsg 4326 or projection handled by MapProjection)
+    */
+    bool has_projection() const noexcept {return m_epsg == 4326 || m_projection.is_defined();};
+
+    /**geodetic_to_ter : conversion of WGS84 geodetic coordinates to the dtm coordinates system*/
+    std::array<double, 2> geodetic_to_ter(double lon, double lat) const;
+
     /**get_footprint_corners*/
     pybind11::array_t<double> get_footprint_corners()const;
 
     /**interpolate*/
     double interpolate(double delta_shift_row, double delta_shift_col) const;
 
+    /**
+    interpolate_n : altitudes of N terrain positions (x, y), NaN outside the DTM.
+    positions are in the dtm coordinates system, or WGS84 geodetic if crs is 4326 and has_projection().
+    Positions are processed with the GIL released, by hardware threads for large arrays.
+    */
+    pybind11::array_t<double> interpolate_n(
+        pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> positions,
+        std::optional<int> crs) const;
+
     /**intersect_dtm_cube*/
     std::tuple<bool,
     std::array<double,3>,
@@ -88,6 +163,14 @@ public:
         std::array<double, 3> const& point_b,
         double h_intersect) const;
 
+    /**
+    segment_above_cells : true if the segment p_0 p_1, in dtm index (row, col, alt), is above the max
+    altitude of every dtm cell it crosses. Cells outside the dtm are not checked.
+    */
+    bool segment_above_cells(
+        std::array<double, 3> const& p_0,
+        std::array<double, 3> const& p_1) const;
+
     /**intersection_n_los_dtm*/
     pybind11::array_t<double> intersection_n_los_dtm(
         pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> los_input
@@ -97,7 +180,7 @@ public:
     //-- getter --//
 
     /**get_alt_data*/
-    std::vector<double>  const&  get_alt_data() const noexcept {return m_alt_data;};
+    pybind11::array_t<double> get_alt_data() const {return m_alt_data.view();};
     /**get_alt_min*/
     double get_alt_min() const noexcept {return m_alt_min;};
     /**get_alt_max*/
@@ -111,9 +194,9 @@ public:
     /**get_plane_coef_d*/
     std::array<double,6> const& get_plane_coef_d() const noexcept {return m_plane_coef_d;};
     /**get_alt_min_cell*/
-    std::vector<double> const& get_alt_min_cell() const noexcept {return m_alt_min_cell;};
+    pybind11::array_t<double> get_alt_min_cell() const {return m_alt_min_cell.view();};
     /**get_alt_max_cell*/
-    std::vector<double> const& get_alt_max_cell() const noexcept {return m_alt_max_cell;};
+    pybind11::array_t<double> get_alt_max_cell() const {return m_alt_max_cell.view();};
     /**get_tol_z*/
     double get_tol_z() const noexcept {return m_tol_z;};// = 0.0001
     /**get_epsg*/
@@ -132,7 +215,8 @@ public:
     //-- setter --//
 
     /**set_alt_data*/
-    void set_alt_data(std::vector<double> const& a) noexcept {m_alt_data = a;};
+    void set_alt_data(pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> const& a)
+        {m_alt_data = DoubleBuffer(a);};
     /**set_alt_min*/
     void set_alt_min(double a) noexcept {m_alt_min = a;};
     /**set_alt_max*/
@@ -146,13 +230,15 @@ public:
     /**set_plane_coef_d*/
     void set_plane_coef_d(std::array<double,6> const& a) noexcept {m_plane_coef_d = a;};
     /**set_alt_min_cell*/
-    void set_alt_min_cell(std::vector<double> const& a) noexcept {m_alt_min_cell = a;};
+    void set_alt_min_cell(pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> const& a)
+        {m_alt_min_cell = DoubleBuffer(a);};
     /**set_alt_max_cell*/
-    void set_alt_max_cell(std::vector<double> const& a) noexcept {m_alt_max_cell = a;};
+    void set_alt_max_cell(pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> const& a)
+        {m_alt_max_cell = DoubleBuffer(a);};
     /**set_tol_z*/
     void set_tol_z(double a) noexcept {m_tol_z = a;};// = 0.0001
     /**set_epsg*/
-    void set_epsg(int a) noexcept {m_epsg = a;};
+    void set_epsg(int a) noexcept {m_epsg = a; m_projection = MapProjection(a);};
     /**set_plans*/
     void set_plans(std::vector<double> const& a) noexcept {m_plans = a;};
     /**get trans_inv*/
@@ -166,8 +252,16 @@ public:
 
 private:
 
+        /**init : attributes computed from alt_data*/
+        void init(
+            int dtm_image_epsg,
+            int dtm_image_nb_rows,
+            int dtm_image_nb_columns,
+            std::tuple<double,double,double,double,double,double> dtm_image_transform
+        );
+
         /**alt_data attribut*/
-        std::vector<double> m_alt_data;
+        DoubleBuffer m_alt_data;
         /**alt_min attribut*/
         double m_alt_min;
         /**alt_max attribut*/
@@ -181,14 +275,16 @@ private:
         /**plane_coef_d attribut*/
         std::array<double,6> m_plane_coef_d;
         /**alt_min_cell attribut*/
-        std::vector<double> m_alt_min_cell;
+        DoubleBuffer m_alt_min_cell;
         /**alt_max_cell attribut*/
-        std::vector<double> m_alt_max_cell;
+        DoubleBuffer m_alt_max_cell;
         /**tol_z attribut*/
         double m_tol_z;// = 0.0001
 
         /**epsg attribut*/
         int m_epsg;
+        /**projection from WGS84 to epsg attribut*/
+        MapProjection m_projection;
 
         /**plans attribut*/
         std::vector<double> m_plans;
@@ -214,4 +310,11 @@ std::vector<double>> init_min_max(std::vector<double> const& alt_data,
                                                     int nb_rows,
                                                     int nb_columns);
 
+/**init_min_max in place : cells min/max altitudes written in alt_min_cell and alt_max_cell buffers*/
+void init_min_max(double const* alt_data,
+                    int nb_rows,
+                    int nb_columns,
+                    double* alt_min_cell,
+                    double* alt_max_cell);
+
 #endif
\ No newline at end of file
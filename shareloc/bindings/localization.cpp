@@ -23,6 +23,7 @@ limitations under the License.
 #include <array>
 #include <cmath>
 #include <iostream>
+#include <stdexcept>
 
 #include "GeoModelTemplate.hpp"
 
@@ -39,6 +40,10 @@ tuple<vector<double>,vector<double>,vector<double>> coloc(GeoModelTemplate const
     vector<double> lat(nb_points);
     vector<double> alt(nb_points);
 
+    if(elevation.get_epsg() != 4326){
+        // direct localization is expressed in the dtm coordinates system, not the inverse localization one
+        throw runtime_error("C++ : coloc : epsg!=4326 -> Exiting");
+    }
     tie(lon, lat, alt) = geom1.direct_loc_dtm(vector_row,vector_col, elevation);
     return geom2.inverse_loc(lon, lat, alt);
 }
@@ -53,6 +58,10 @@ tuple<double,double,double> coloc(GeoModelTemplate const& geom1,
     double lat;
     double alt;
 
+    if(elevation.get_epsg() != 4326){
+        // direct localization is expressed in the dtm coordinates system, not the inverse localization one
+        throw runtime_error("C++ : coloc : epsg!=4326 -> Exiting");
+    }
     tie(lon, lat, alt) = geom1.direct_loc_dtm(row,col, elevation);
     return geom2.inverse_loc(lon, lat, alt);
 }
@@ -84,4 +93,19 @@ tuple<double,double,double> coloc(GeoModelTemplate const& geom1,
 
     tie(lon, lat, alt) = geom1.direct_loc_h(row,col,elevation);
     return geom2.inverse_loc(lon, lat, alt);
-}
\ No newline at end of file
+}
+
+tuple<array<double,3>,array<double,3>> coloc_two_altitudes(GeoModelTemplate const& geom1,
+                                    GeoModelTemplate const& geom2,
+                                    double row,
+                                    double col,
+                                    double alt_first,
+                                    double alt_second){
+
+    auto const [ground_first, ground_second] = geom1.direct_loc_h_two_altitudes(row, col, alt_first, alt_second);
+    auto const [row_first, col_first, h_first] = geom2.inverse_loc(ground_first[0], ground_first[1], ground_first[2]);
+    auto const [row_second, col_second, h_second] = geom2.inverse_loc(
+        ground_second[0], ground_second[1], ground_second[2]
+    );
+    return {{row_first, col_first, h_first}, {row_second, col_second, h_second}};
+}
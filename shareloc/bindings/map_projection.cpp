@@ -0,0 +1,182 @@
+/*
+Copyright (c) 2023 Centre National d'Etudes Spatiales (CNES).
+
+This file is part of shareloc
+(see https://github.com/CNES/shareloc).
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+*/
+
+#include "map_projection.hpp"
+
+#include <cmath>
+#include <limits>
+
+using namespace std;
+
+namespace {
+
+constexpr double deg_to_rad = M_PI / 180.0;
+
+constexpr double wgs84_semi_major_axis = 6378137.0;
+constexpr double wgs84_flattening = 1.0 / 298.257223563;
+constexpr double grs80_flattening = 1.0 / 298.257222101;
+
+}
+
+
+//---- MapProjection methods ----//
+
+MapProjection::MapProjection(): m_kind(Kind::none){}
+
+MapProjection::MapProjection(int epsg): m_kind(Kind::none){
+
+    if (epsg > 32600 && epsg <= 32660){
+        // WGS 84 / UTM zone north
+        init_transverse_mercator(-183.0 + 6.0 * (epsg - 32600), 0.9996, 500000.0, 0.0,
+                                wgs84_semi_major_axis, wgs84_flattening);
+    }
+    else if (epsg > 32700 && epsg <= 32760){
+        // WGS 84 / UTM zone south
+        init_transverse_mercator(-183.0 + 6.0 * (epsg - 32700), 0.9996, 500000.0, 10000000.0,
+                                wgs84_semi_major_axis, wgs84_flattening);
+    }
+    else if (epsg >= 25828 && epsg <= 25838){
+        // ETRS89 / UTM zone north
+        init_transverse_mercator(-183.0 + 6.0 * (epsg - 25800), 0.9996, 500000.0, 0.0,
+                                wgs84_semi_major_axis, grs80_flattening);
+    }
+    else if (epsg == 2154){
+        // RGF93 / Lambert-93
+        init_lambert_conformal_conic(3.0, 46.5, 49.0, 44.0, 700000.0, 6600000.0,
+                                    wgs84_semi_major_axis, grs80_flattening);
+    }
+    else if (epsg >= 3942 && epsg <= 3950){
+        // RGF93 / CC42 to CC50
+        double lat_0 = epsg - 3900.0;
+        init_lambert_conformal_conic(3.0, lat_0, lat_0 - 0.75, lat_0 + 0.75, 1700000.0,
+                                    (epsg - 3941) * 1000000.0 + 200000.0,
+                                    wgs84_semi_major_axis, grs80_flattening);
+    }
+}
+
+void MapProjection::init_transverse_mercator(
+    double lon_0,
+    double k_0,
+    double false_easting,
+    double false_northing,
+    double semi_major_axis,
+    double flattening)
+{
+    m_kind = Kind::transverse_mercator;
+    m_lon_0 = lon_0 * deg_to_rad;
+    m_false_easting = false_easting;
+    m_false_northing = false_northing;
+    m_e = sqrt(flattening * (2.0 - flattening));
+
+    double n = flattening / (2.0 - flattening);
+    double n2 = n * n;
+    double n3 = n2 * n;
+    double n4 = n3 * n;
+    double n5 = n4 * n;
+    double n6 = n5 * n;
+
+    m_k0_a = k_0 * semi_major_axis / (1.0 + n) * (1.0 + n2 / 4.0 + n4 / 64.0 + n6 / 256.0);
+    m_alpha = {
+        n / 2.0 - 2.0 / 3.0 * n2 + 5.0 / 16.0 * n3 + 41.0 / 180.0 * n4 - 127.0 / 288.0 * n5
+            + 7891.0 / 37800.0 * n6,
+        13.0 / 48.0 * n2 - 3.0 / 5.0 * n3 + 557.0 / 1440.0 * n4 + 281.0 / 630.0 * n5
+            - 1983433.0 / 1935360.0 * n6,
+        61.0 / 240.0 * n3 - 103.0 / 140.0 * n4 + 15061.0 / 26880.0 * n5 + 167603.0 / 181440.0 * n6,
+        49561.0 / 161280.0 * n4 - 179.0 / 168.0 * n5 + 6601661.0 / 7257600.0 * n6,
+        34729.0 / 80640.0 * n5 - 3418889.0 / 1995840.0 * n6,
+        212378941.0 / 319334400.0 * n6};
+}
+
+void MapProjection::init_lambert_conformal_conic(
+    double lon_0,
+    double lat_0,
+    double lat_1,
+    double lat_2,
+    double false_easting,
+    double false_northing,
+    double semi_major_axis,
+    double flattening)
+{
+    m_kind = Kind::lambert_conformal_conic;
+    m_lon_0 = lon_0 * deg_to_rad;
+    m_false_easting = false_easting;
+    m_false_northing = false_northing;
+    m_e = sqrt(flattening * (2.0 - flattening));
+
+    auto lambert_m = [this](double lat){
+        double sin_lat = sin(lat);
+        return cos(lat) / sqrt(1.0 - m_e * m_e * sin_lat * sin_lat);
+    };
+
+    lat_0 *= deg_to_rad;
+    lat_1 *= deg_to_rad;
+    lat_2 *= deg_to_rad;
+    double m_1 = lambert_m(lat_1);
+    double t_1 = lambert_t(lat_1);
+    m_n = (log(m_1) - log(lambert_m(lat_2))) / (log(t_1) - log(lambert_t(lat_2)));
+    m_a_f = semi_major_axis * m_1 / (m_n * pow(t_1, m_n));
+    m_r_0 = m_a_f * pow(lambert_t(lat_0), m_n);
+}
+
+double MapProjection::lambert_t(double lat) const
+{
+    double e_sin_lat = m_e * sin(lat);
+    return tan(M_PI / 4.0 - lat / 2.0) / pow((1.0 - e_sin_lat) / (1.0 + e_sin_lat), m_e / 2.0);
+}
+
+array<double, 2> MapProjection::forward(double lon, double lat) const
+{
+    switch (m_kind){
+        case Kind::transverse_mercator:
+            return forward_transverse_mercator(lon, lat);
+        case Kind::lambert_conformal_conic:
+            return forward_lambert_conformal_conic(lon, lat);
+        default:
+            return {numeric_limits<double>::quiet_NaN(), numeric_limits<double>::quiet_NaN()};
+    }
+}
+
+array<double, 2> MapProjection::forward_transverse_mercator(double lon, double lat) const
+{
+    double phi = lat * deg_to_rad;
+    double lambda = lon * deg_to_rad - m_lon_0;
+
+    double sin_phi = sin(phi);
+    double t = sinh(atanh(sin_phi) - m_e * atanh(m_e * sin_phi));
+    double xi_prime = atan2(t, cos(lambda));
+    double eta_prime = atanh(sin(lambda) / sqrt(1.0 + t * t));
+
+    double xi = xi_prime;
+    double eta = eta_prime;
+    for (size_t j = 0; j < m_alpha.size(); ++j){
+        double two_j = 2.0 * (j + 1);
+        xi += m_alpha[j] * sin(two_j * xi_prime) * cosh(two_j * eta_prime);
+        eta += m_alpha[j] * cos(two_j * xi_prime) * sinh(two_j * eta_prime);
+    }
+
+    return {m_false_easting + m_k0_a * eta, m_false_northing + m_k0_a * xi};
+}
+
+array<double, 2> MapProjection::forward_lambert_conformal_conic(double lon, double lat) const
+{
+    double r = m_a_f * pow(lambert_t(lat * deg_to_rad), m_n);
+    double theta = m_n * (lon * deg_to_rad - m_lon_0);
+
+    return {m_false_easting + r * sin(theta), m_false_northing + m_r_0 - r * cos(theta)};
+}
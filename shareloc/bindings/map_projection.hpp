@@ -0,0 +1,102 @@
+/*
+Copyright (c) 2023 Centre National d'Etudes Spatiales (CNES).
+
+This file is part of shareloc
+(see https://github.com/CNES/shareloc).
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+*/
+
+#ifndef MAP_PROJECTION_H
+#define MAP_PROJECTION_H
+
+#include <array>
+
+/**
+Class MapProjection
+Conversion of WGS84 geodetic coordinates (EPSG 4326) to the projected coordinates systems
+handled in c++ : transverse Mercator (UTM WGS84 and ETRS89 zones) and Lambert conformal conic
+with two standard parallels (Lambert-93 and RGF93 conic conformal zones).
+ETRS89 and RGF93 are considered identical to WGS84 (null datum shift), as PROJ does by default.
+*/
+class MapProjection
+{
+
+public:
+
+    /**Projection kind*/
+    enum class Kind {none, transverse_mercator, lambert_conformal_conic};
+
+    /**Constructor empty : no projection*/
+    MapProjection();
+
+    /**Constructor from an epsg code, no projection if the code is not handled*/
+    explicit MapProjection(int epsg);
+
+    /**is_defined : true if the epsg code is handled*/
+    bool is_defined() const noexcept {return m_kind != Kind::none;};
+
+    /**get_kind*/
+    Kind get_kind() const noexcept {return m_kind;};
+
+    /**
+    Projection of WGS84 geodetic coordinates
+    @param lon longitude in degrees
+    @param lat latitude in degrees
+    @return projected coordinates (x, y) in meters, NaN if no projection is defined
+    */
+    std::array<double, 2> forward(double lon, double lat) const;
+
+private:
+
+    /**initialize transverse Mercator, latitude of origin is 0*/
+    void init_transverse_mercator(double lon_0, double k_0, double false_easting, double false_northing,
+                                  double semi_major_axis, double flattening);
+
+    /**initialize Lambert conformal conic with two standard parallels*/
+    void init_lambert_conformal_conic(double lon_0, double lat_0, double lat_1, double lat_2,
+                                      double false_easting, double false_northing,
+                                      double semi_major_axis, double flattening);
+
+    /**transverse Mercator forward (Krüger series at order 6)*/
+    std::array<double, 2> forward_transverse_mercator(double lon, double lat) const;
+
+    /**Lambert conformal conic forward*/
+    std::array<double, 2> forward_lambert_conformal_conic(double lon, double lat) const;
+
+    /**conformal latitude function t(lat) of the Lambert projection*/
+    double lambert_t(double lat) const;
+
+    /**projection kind*/
+    Kind m_kind;
+    /**central meridian in radians*/
+    double m_lon_0;
+    /**false easting*/
+    double m_false_easting;
+    /**false northing*/
+    double m_false_northing;
+    /**ellipsoid first eccentricity*/
+    double m_e;
+    /**transverse Mercator : k_0 times rectifying radius*/
+    double m_k0_a;
+    /**transverse Mercator : Krüger series coefficients*/
+    std::array<double, 6> m_alpha;
+    /**Lambert : cone constant*/
+    double m_n;
+    /**Lambert : a times F*/
+    double m_a_f;
+    /**Lambert : radius at latitude of origin*/
+    double m_r_0;
+};
+
+#endif
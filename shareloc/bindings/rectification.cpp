@@ -135,28 +135,19 @@ tuple<array<double,3>,array<double,3>> compute_local_epipolar_line(
     );
     double ground_elev = right_corr_2;
 
-    // Find the beginning of the epipolar line in the left image, using right
-    // correspondent at lower elevation
-    right_corr_2 = ground_elev - elevation_offset;
-    double epi_line_start_0;
-    double epi_line_start_1;
-    double epi_line_start_2;
-    tie(epi_line_start_0, epi_line_start_1, epi_line_start_2) = coloc(
-        geom_model_right, geom_model_left, right_corr_0, right_corr_1,right_corr_2
+    // Find the beginning and the ending of the epipolar line in the left image,
+    // using right correspondent at lower and higher elevation
+    array<double,3> epi_line_start;
+    array<double,3> epi_line_end;
+    tie(epi_line_start, epi_line_end) = coloc_two_altitudes(
+        geom_model_right,
+        geom_model_left,
+        right_corr_0,
+        right_corr_1,
+        ground_elev - elevation_offset,
+        ground_elev + elevation_offset
     );
 
-    // Find the ending of the epipolar line in the left image, using right
-    // correspondent at higher elevation
-    right_corr_2 = ground_elev + elevation_offset;
-    double epi_line_end_0;
-    double epi_line_end_1;
-    double epi_line_end_2;
-    tie(epi_line_end_0, epi_line_end_1, epi_line_end_2) = coloc(
-        geom_model_right, geom_model_left, right_corr_0, right_corr_1,right_corr_2
-    );
-
-    array<double,3> epi_line_start = {epi_line_start_0, epi_line_start_1, epi_line_start_2};
-    array<double,3> epi_line_end = {epi_line_end_0, epi_line_end_1, epi_line_end_2};
     return {epi_line_start, epi_line_end};
 }
 
@@ -252,134 +243,139 @@ double> compute_strip_of_epipolar_grid(
         already_computed_ratio = int(epipolar_angles.size());
     }
 
-        
-    for(int row=0;row<nb_rows;++row){
-        for(int col=0;col<nb_cols;++col){
-
-            // indexes
-            i_row_col = row*grid_cols+col;
-            i_row_col_0 = row*nb_cols*3 + col*3 + 0;
-            i_row_col_1 = row*nb_cols*3 + col*3 + 1;
-            i_row_col_2 = row*nb_cols*3 + col*3 + 2;
-
-            i_grid_cols_0 = row*grid_cols*3 + col*3 + 0;
-            i_grid_cols_1 = row*grid_cols*3 + col*3 + 1;
-            i_grid_cols_2 = row*grid_cols*3 + col*3 + 2;
-
-            i_strip_0 = row*strip_size*3 + col*3 + 0;
-            i_strip_1 = row*strip_size*3 + col*3 + 1;
-            i_strip_2 = row*strip_size*3 + col*3 + 2;
-
-            //save input
-            left_grid[i_grid_cols_0] = current_left_point[i_row_col_0];
-            left_grid[i_grid_cols_1] = current_left_point[i_row_col_1];
-            left_grid[i_grid_cols_2] = current_left_point[i_row_col_2];
-            right_grid[i_grid_cols_0] = current_right_point[i_row_col_0];
-            right_grid[i_grid_cols_1] = current_right_point[i_row_col_1];
-            right_grid[i_grid_cols_2] = current_right_point[i_row_col_2];
-
-
-            if(compute_first_angle){
-                //compute epipolar angle
-                tie(local_epi_start_ar, local_epi_end_ar) = compute_local_epipolar_line(
-                    geom_model_left,
-                    geom_model_right,
-                    current_left_point[i_row_col_0],
-                    current_left_point[i_row_col_1],
-                    elevation,
-                    elevation_offset);
-
-                epipolar_angles_computed[i_row_col] = compute_epipolar_angle(local_epi_end_ar, local_epi_start_ar);
-
-                local_baseline_ratio = sqrt(
-                    (local_epi_end_ar[1] - local_epi_start_ar[1]) * (local_epi_end_ar[1] - local_epi_start_ar[1])
-                    + (local_epi_end_ar[0] - local_epi_start_ar[0]) * (local_epi_end_ar[0] - local_epi_start_ar[0])
-                ) / (2. * elevation_offset);
-
-                mean_baseline_ratio += local_baseline_ratio;
-            }else{
-                epipolar_angles_computed[i_row_col] = epipolar_angles[row*nb_cols+col];
-            }
+    // The strip computation only works on C++ buffers: release the GIL so that
+    // independent blocks of rows can be processed concurrently by python threads
+    {
+        py::gil_scoped_release release;
+
+        for(int row=0;row<nb_rows;++row){
+            for(int col=0;col<nb_cols;++col){
+
+                // indexes
+                i_row_col = row*grid_cols+col;
+                i_row_col_0 = row*nb_cols*3 + col*3 + 0;
+                i_row_col_1 = row*nb_cols*3 + col*3 + 1;
+                i_row_col_2 = row*nb_cols*3 + col*3 + 2;
+
+                i_grid_cols_0 = row*grid_cols*3 + col*3 + 0;
+                i_grid_cols_1 = row*grid_cols*3 + col*3 + 1;
+                i_grid_cols_2 = row*grid_cols*3 + col*3 + 2;
+
+                i_strip_0 = row*strip_size*3 + col*3 + 0;
+                i_strip_1 = row*strip_size*3 + col*3 + 1;
+                i_strip_2 = row*strip_size*3 + col*3 + 2;
+
+                //save input
+                left_grid[i_grid_cols_0] = current_left_point[i_row_col_0];
+                left_grid[i_grid_cols_1] = current_left_point[i_row_col_1];
+                left_grid[i_grid_cols_2] = current_left_point[i_row_col_2];
+                right_grid[i_grid_cols_0] = current_right_point[i_row_col_0];
+                right_grid[i_grid_cols_1] = current_right_point[i_row_col_1];
+                right_grid[i_grid_cols_2] = current_right_point[i_row_col_2];
+
+
+                if(compute_first_angle){
+                    //compute epipolar angle
+                    tie(local_epi_start_ar, local_epi_end_ar) = compute_local_epipolar_line(
+                        geom_model_left,
+                        geom_model_right,
+                        current_left_point[i_row_col_0],
+                        current_left_point[i_row_col_1],
+                        elevation,
+                        elevation_offset);
+
+                    epipolar_angles_computed[i_row_col] = compute_epipolar_angle(local_epi_end_ar, local_epi_start_ar);
+
+                    local_baseline_ratio = sqrt(
+                        (local_epi_end_ar[1] - local_epi_start_ar[1]) * (local_epi_end_ar[1] - local_epi_start_ar[1])
+                        + (local_epi_end_ar[0] - local_epi_start_ar[0]) * (local_epi_end_ar[0] - local_epi_start_ar[0])
+                    ) / (2. * elevation_offset);
+
+                    mean_baseline_ratio += local_baseline_ratio;
+                }else{
+                    epipolar_angles_computed[i_row_col] = epipolar_angles[row*nb_cols+col];
+                }
 
-            //save computed epipolar angle
-            epipolar_angles_out[i_row_col] = epipolar_angles_computed[i_row_col];
+                //save computed epipolar angle
+                epipolar_angles_out[i_row_col] = epipolar_angles_computed[i_row_col];
 
 
 
 
-            // Grid bode computation
-            // 1/ move along axis
-            // 2/ compute local epipolar line
-            // 3/ compute locale epipolar angle
-            // 4/ fill the output
-            // 5/ compute and increment the baseline ratio
+                // Grid bode computation
+                // 1/ move along axis
+                // 2/ compute local epipolar line
+                // 3/ compute locale epipolar angle
+                // 4/ fill the output
+                // 5/ compute and increment the baseline ratio
 
-            // axis = 1 : nb_rows=1 and stripe_size=nb_cols
-            //            iterator : row=0 and col=point
-            // axis = 0 : stripe_size=nb_rows and nb_cols=1
-            //            iterator : row=point and col=point
-            for (int point=1;point<strip_size;++point){
+                // axis = 1 : nb_rows=1 and stripe_size=nb_cols
+                //            iterator : row=0 and col=point
+                // axis = 0 : stripe_size=nb_rows and nb_cols=1
+                //            iterator : row=point and col=point
+                for (int point=1;point<strip_size;++point){
 
-                tie(current_left_point[i_row_col_0],
-                current_left_point[i_row_col_1],
-                current_left_point[i_row_col_2],
-                current_right_point[i_row_col_0],
-                current_right_point[i_row_col_1],
-                current_right_point[i_row_col_2]) = moving_along_axis(
-                    geom_model_left,
-                    geom_model_right,
-                    current_left_point[i_row_col_0],
+                    tie(current_left_point[i_row_col_0],
                     current_left_point[i_row_col_1],
                     current_left_point[i_row_col_2],
-                    spacing,
-                    elevation,
-                    epi_step,
-                    epipolar_angles_computed[i_row_col], axis
-                );
-
-                tie(local_epi_start_ar, local_epi_end_ar) = compute_local_epipolar_line(
-                    geom_model_left,
-                    geom_model_right,
-                    current_left_point[i_row_col_0],
-                    current_left_point[i_row_col_1],
-                    elevation,
-                    elevation_offset
-                );
-
-                epipolar_angles_computed[i_row_col] = compute_epipolar_angle(local_epi_end_ar, local_epi_start_ar);
-
-                // Stock values
-                if (axis == 0){
-                    //size_shape = {strip_size, nb_cols, 3};
-
-                    epipolar_angles_out[i_row_col+point*grid_cols] = epipolar_angles_computed[i_row_col];
-                    left_grid[i_row_col_0 + point*nb_cols*3] = current_left_point[i_row_col_0];
-                    left_grid[i_row_col_1 + point*nb_cols*3] = current_left_point[i_row_col_1];
-                    left_grid[i_row_col_2 + point*nb_cols*3] = current_left_point[i_row_col_2];
-                    right_grid[i_row_col_0 + point*nb_cols*3] = current_right_point[i_row_col_0];
-                    right_grid[i_row_col_1 + point*nb_cols*3] = current_right_point[i_row_col_1];
-                    right_grid[i_row_col_2 + point*nb_cols*3] = current_right_point[i_row_col_2];
-
+                    current_right_point[i_row_col_0],
+                    current_right_point[i_row_col_1],
+                    current_right_point[i_row_col_2]) = moving_along_axis(
+                        geom_model_left,
+                        geom_model_right,
+                        current_left_point[i_row_col_0],
+                        current_left_point[i_row_col_1],
+                        current_left_point[i_row_col_2],
+                        spacing,
+                        elevation,
+                        epi_step,
+                        epipolar_angles_computed[i_row_col], axis
+                    );
+
+                    tie(local_epi_start_ar, local_epi_end_ar) = compute_local_epipolar_line(
+                        geom_model_left,
+                        geom_model_right,
+                        current_left_point[i_row_col_0],
+                        current_left_point[i_row_col_1],
+                        elevation,
+                        elevation_offset
+                    );
+
+                    epipolar_angles_computed[i_row_col] = compute_epipolar_angle(local_epi_end_ar, local_epi_start_ar);
+
+                    // Stock values
+                    if (axis == 0){
+                        //size_shape = {strip_size, nb_cols, 3};
+
+                        epipolar_angles_out[i_row_col+point*grid_cols] = epipolar_angles_computed[i_row_col];
+                        left_grid[i_row_col_0 + point*nb_cols*3] = current_left_point[i_row_col_0];
+                        left_grid[i_row_col_1 + point*nb_cols*3] = current_left_point[i_row_col_1];
+                        left_grid[i_row_col_2 + point*nb_cols*3] = current_left_point[i_row_col_2];
+                        right_grid[i_row_col_0 + point*nb_cols*3] = current_right_point[i_row_col_0];
+                        right_grid[i_row_col_1 + point*nb_cols*3] = current_right_point[i_row_col_1];
+                        right_grid[i_row_col_2 + point*nb_cols*3] = current_right_point[i_row_col_2];
+
+                    }
+                    else{
+                        //size_shape = {nb_rows, strip_size, 3};
+
+                        epipolar_angles_out[i_row_col+point] = epipolar_angles_computed[row*grid_cols+col];
+                        left_grid[i_strip_0+point*3] = current_left_point[i_row_col_0];
+                        left_grid[i_strip_1+point*3] = current_left_point[i_row_col_1];
+                        left_grid[i_strip_2+point*3] = current_left_point[i_row_col_2];
+                        right_grid[i_strip_0+point*3] = current_right_point[i_row_col_0];
+                        right_grid[i_strip_1+point*3] = current_right_point[i_row_col_1];
+                        right_grid[i_strip_2+point*3] = current_right_point[i_row_col_2];
+
+                    }
+
+                    local_baseline_ratio = sqrt(
+                        (local_epi_end_ar[1] - local_epi_start_ar[1]) * (local_epi_end_ar[1] - local_epi_start_ar[1])
+                        + (local_epi_end_ar[0] - local_epi_start_ar[0]) * (local_epi_end_ar[0] - local_epi_start_ar[0])
+                    ) / (2. * elevation_offset);
+
+                    mean_baseline_ratio += local_baseline_ratio;
                 }
-                else{
-                    //size_shape = {nb_rows, strip_size, 3};
-
-                    epipolar_angles_out[i_row_col+point] = epipolar_angles_computed[row*grid_cols+col];
-                    left_grid[i_strip_0+point*3] = current_left_point[i_row_col_0];
-                    left_grid[i_strip_1+point*3] = current_left_point[i_row_col_1];
-                    left_grid[i_strip_2+point*3] = current_left_point[i_row_col_2];
-                    right_grid[i_strip_0+point*3] = current_right_point[i_row_col_0];
-                    right_grid[i_strip_1+point*3] = current_right_point[i_row_col_1];
-                    right_grid[i_strip_2+point*3] = current_right_point[i_row_col_2];
-
-                }
-
-                local_baseline_ratio = sqrt(
-                    (local_epi_end_ar[1] - local_epi_start_ar[1]) * (local_epi_end_ar[1] - local_epi_start_ar[1])
-                    + (local_epi_end_ar[0] - local_epi_start_ar[0]) * (local_epi_end_ar[0] - local_epi_start_ar[0])
-                ) / (2. * elevation_offset);
-
-                mean_baseline_ratio += local_baseline_ratio;
             }
         }
     }
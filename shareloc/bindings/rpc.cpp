@@ -24,6 +24,7 @@ limitations under the License.
 #include <cmath>
 
 using namespace std;
+namespace py = pybind11;
 
 //---- RPC methodes ----//
 
@@ -154,15 +155,65 @@ tuple<vector<double>,vector<double>,vector<double>> RPC::direct_loc_h(
     }
 }
 
+tuple<array<double,3>,array<double,3>> RPC::direct_loc_h_two_altitudes(
+    double row,
+    double col,
+    double alt_first,
+    double alt_second,
+    bool fill_nan) const
+{
+    if(!m_inverse_coefficient){
+        return GeoModelTemplate::direct_loc_h_two_altitudes(row, col, alt_first, alt_second, fill_nan);
+    }
+
+    auto const [lon_first, lat_first, h_first] = direct_loc_inverse_iterative(row, col, alt_first, 10, fill_nan);
+    // warm start : the ground position at alt_second is close to the one at alt_first
+    auto const [lon_second, lat_second, h_second] = direct_loc_inverse_iterative(
+        row, col, alt_second, 10, fill_nan, lon_first, lat_first
+    );
+    return {{lon_first, lat_first, h_first}, {lon_second, lat_second, h_second}};
+}
+
+tuple<tuple<vector<double>,vector<double>,vector<double>>,
+      tuple<vector<double>,vector<double>,vector<double>>> RPC::direct_loc_h_two_altitudes(
+    vector<double> const& row,
+    vector<double> const& col,
+    vector<double> const& alt_first,
+    vector<double> const& alt_second,
+    bool fill_nan) const
+{
+    if(row.size() != col.size() || row.size() != alt_first.size() || row.size() != alt_second.size()){
+        throw runtime_error("C++ : direct_loc_h_two_altitudes : inputs sizes are not similar");
+    }
+
+    size_t nb_points = row.size();
+    vector<double> lon_first(nb_points);
+    vector<double> lat_first(nb_points);
+    vector<double> lon_second(nb_points);
+    vector<double> lat_second(nb_points);
+
+    for (size_t i = 0; i < nb_points; ++i){
+        auto const [ground_first, ground_second] = direct_loc_h_two_altitudes(
+            row[i], col[i], alt_first[i], alt_second[i], fill_nan
+        );
+        lon_first[i] = ground_first[0];
+        lat_first[i] = ground_first[1];
+        lon_second[i] = ground_second[0];
+        lat_second[i] = ground_second[1];
+    }
+    return {{lon_first, lat_first, alt_first}, {lon_second, lat_second, alt_second}};
+}
+
 tuple<double,double,double> RPC::direct_loc_dtm(
     double row,
     double col,
     DTMIntersection const& dtm) const
 {
-    if(dtm.get_epsg() != 4326){
-        throw runtime_error("C++ : direct_loc_dtm : epsg!=4326 -> Exiting");
-        //cout<<"C++ : direct_loc_dtm : epsg!=4326 -> get_diff_alti_min/max initialized ?"<<endl;
+    if(!dtm.has_projection()){
+        throw runtime_error("C++ : direct_loc_dtm : dtm epsg not handled in c++ -> Exiting");
     }
+    // horizontal projected coordinates systems only : no altitude offset between RPC and dtm
+    bool is_projected = dtm.get_epsg() != 4326;
 
     double min_dtm = dtm.get_alt_min() - 1.0;
     double max_dtm = dtm.get_alt_max() + 1.0;
@@ -182,6 +233,13 @@ tuple<double,double,double> RPC::direct_loc_dtm(
     double position_z;
 
     tie(lon, lat, alt) = los_extrema(row, col, min_dtm, max_dtm);
+    if(is_projected){
+        for(size_t j = 0; j < 2; ++j){
+            array<double, 2> const ter = dtm.geodetic_to_ter(lon[j], lat[j]);
+            lon[j] = ter[0];
+            lat[j] = ter[1];
+        }
+    }
     tie(solution, position_cube, alti, los_index_x, los_index_y, los_index_z) =\
     dtm.intersect_dtm_cube(lon, lat, alt);
     
@@ -203,10 +261,11 @@ tuple<vector<double>,vector<double>,vector<double>> RPC::direct_loc_dtm(
     vector<double> const& col,
     DTMIntersection const& dtm) const
 {
-    if(dtm.get_epsg() != 4326){
-        throw runtime_error("C++ : direct_loc_dtm : epsg!=4326 -> Exiting");
-        //cout<<"C++ : direct_loc_dtm : epsg!=4326 -> get_diff_alti_min/max initialized ?"<<endl;
+    if(!dtm.has_projection()){
+        throw runtime_error("C++ : direct_loc_dtm : dtm epsg not handled in c++ -> Exiting");
     }
+    // horizontal projected coordinates systems only : no altitude offset between RPC and dtm
+    bool is_projected = dtm.get_epsg() != 4326;
 
     double min_dtm = dtm.get_alt_min() - 1.0;
     double max_dtm = dtm.get_alt_max() + 1.0;
@@ -233,6 +292,13 @@ tuple<vector<double>,vector<double>,vector<double>> RPC::direct_loc_dtm(
     for(size_t i = 0;i<nb_points;++i){
 
         tie(lon, lat, alt) = los_extrema(row[i], col[i], min_dtm, max_dtm);
+        if(is_projected){
+            for(size_t j = 0; j < 2; ++j){
+                array<double, 2> const ter = dtm.geodetic_to_ter(lon[j], lat[j]);
+                lon[j] = ter[0];
+                lat[j] = ter[1];
+            }
+        }
         tie(solution, position_cube, alti, los_index_x, los_index_y, los_index_z) =\
         dtm.intersect_dtm_cube(lon, lat, alt);
         
@@ -253,6 +319,112 @@ tuple<vector<double>,vector<double>,vector<double>> RPC::direct_loc_dtm(
     return {res_lon,res_lat,res_alt};
 }
 
+tuple<vector<double>,vector<double>,vector<double>> RPC::direct_loc_grid_dtm(
+    double row0,
+    double col0,
+    double steprow,
+    double stepcol,
+    int nbrow,
+    int nbcol,
+    DTMIntersection const& dtm,
+    double warm_start_margin) const
+{
+    if(!dtm.has_projection()){
+        throw runtime_error("C++ : direct_loc_grid_dtm : dtm epsg not handled in c++ -> Exiting");
+    }
+    // horizontal projected coordinates systems only : no altitude offset between RPC and dtm
+    bool is_projected = dtm.get_epsg() != 4326;
+
+    double min_dtm = dtm.get_alt_min() - 1.0;
+    double max_dtm = dtm.get_alt_max() + 1.0;
+
+    size_t nb_points = static_cast<size_t>(max(nbrow, 0)) * static_cast<size_t>(max(nbcol, 0));
+    vector<double> res_lon (nb_points, numeric_limits<double>::quiet_NaN());
+    vector<double> res_lat (nb_points, numeric_limits<double>::quiet_NaN());
+    vector<double> res_alt (nb_points, numeric_limits<double>::quiet_NaN());
+    // altitudes of the successful dtm walks only, used as seeds
+    vector<double> seed_alt (nb_points, numeric_limits<double>::quiet_NaN());
+
+    vector<double> lon (2);
+    vector<double> lat (2);
+    vector<double> alt (2);
+    bool solution;
+    array<double,3> position_cube;
+    double alti;
+    vector<double> los_index_x (2);
+    vector<double> los_index_y (2);
+    vector<double> los_index_z (2);
+    double position_x;
+    double position_y;
+    double position_z;
+
+    for(int i = 0; i < nbrow; ++i){
+        for(int j = 0; j < nbcol; ++j){
+            size_t index = static_cast<size_t>(i) * nbcol + j;
+
+            tie(lon, lat, alt) = los_extrema(row0 + steprow * i, col0 + stepcol * j, min_dtm, max_dtm);
+            if(is_projected){
+                for(size_t k = 0; k < 2; ++k){
+                    array<double, 2> const ter = dtm.geodetic_to_ter(lon[k], lat[k]);
+                    lon[k] = ter[0];
+                    lat[k] = ter[1];
+                }
+            }
+
+            // seed : intersection altitude of the previous pixel of the row, or of the previous row
+            double seed = numeric_limits<double>::quiet_NaN();
+            if(j > 0){
+                seed = seed_alt[index - 1];
+            }
+            else if(i > 0){
+                seed = seed_alt[index - nbcol];
+            }
+
+            solution = false;
+            if(warm_start_margin >= 0.0 && !isnan(seed) && seed + warm_start_margin < max_dtm){
+                // line of sight in dtm index, cut at the starting altitude : the walk starts at its top vertex
+                for(size_t k = 0; k < 2; ++k){
+                    array<double, 3> const los_index = dtm.ter_to_index({lon[k], lat[k], alt[k]});
+                    los_index_x[k] = los_index[0];
+                    los_index_y[k] = los_index[1];
+                    los_index_z[k] = los_index[2];
+                }
+                array<double, 3> const los_top = {los_index_x[0], los_index_y[0], los_index_z[0]};
+                double coef = (los_index_z[0] - (seed + warm_start_margin)) / (los_index_z[0] - los_index_z[1]);
+                los_index_x[0] += coef * (los_index_x[1] - los_index_x[0]);
+                los_index_y[0] += coef * (los_index_y[1] - los_index_y[0]);
+                los_index_z[0] = seed + warm_start_margin;
+
+                // the skipped part of the line of sight must be above the crossed cells (no occluding ridge),
+                // no solution if the starting point is below the dtm or outside the dtm
+                if(dtm.segment_above_cells(los_top, {los_index_x[0], los_index_y[0], los_index_z[0]})){
+                    tie(solution, position_x, position_y, position_z) = dtm.intersection(
+                        los_index_x, los_index_y, los_index_z, {los_index_x[0], los_index_y[0], los_index_z[0]}, 0.0);
+                }
+            }
+            bool is_cube_crossed = solution;
+            if(!solution){
+                // full walk from the dtm cube top, the walk end point is kept as in direct_loc_dtm
+                tie(is_cube_crossed, position_cube, alti, los_index_x, los_index_y, los_index_z) =\
+                dtm.intersect_dtm_cube(lon, lat, alt);
+                if(is_cube_crossed){
+                    tie(solution, position_x, position_y, position_z) =\
+                    dtm.intersection(los_index_x, los_index_y, los_index_z, position_cube, alti);
+                }
+            }
+            if(is_cube_crossed){
+                res_lon[index] = position_x;
+                res_lat[index] = position_y;
+                res_alt[index] = position_z;
+            }
+            if(solution){
+                seed_alt[index] = position_z;
+            }
+        }
+    }
+    return {res_lon, res_lat, res_alt};
+}
+
 tuple<double,double,double> RPC::inverse_loc(
     double lon,
     double lat,
@@ -350,6 +522,86 @@ RPC::compute_loc_inverse_derivates(
     return {dcol_dlon, dcol_dlat, drow_dlon, drow_dlat};
 }
 
+tuple<double, double>
+RPC::compute_loc_inverse_alt_derivates(
+    double lon,
+    double lat,
+    double alt)const
+{
+    //Normalisation
+    double lon_norm = (lon - m_offset_lon)/m_scale_lon;
+    double lat_norm = (lat - m_offset_lat)/m_scale_lat;
+    double alt_norm = (alt - m_offset_alt)/m_scale_alt;
+
+    alignas(64) array<double, 20> norms = pre_polynomial_equation(lon_norm, lat_norm, alt_norm);
+
+    double num_dcol = polynomial_equation(norms, m_num_col);
+    double den_dcol = polynomial_equation(norms, m_den_col);
+    double num_drow = polynomial_equation(norms, m_num_row);
+    double den_drow = polynomial_equation(norms, m_den_row);
+
+    double num_dcol_dalt = derivative_polynomial_altitude(lon_norm, lat_norm, alt_norm, m_num_col);
+    double den_dcol_dalt = derivative_polynomial_altitude(lon_norm, lat_norm, alt_norm, m_den_col);
+    double num_drow_dalt = derivative_polynomial_altitude(lon_norm, lat_norm, alt_norm, m_num_row);
+    double den_drow_dalt = derivative_polynomial_altitude(lon_norm, lat_norm, alt_norm, m_den_row);
+
+    double dcol_dalt = m_scale_col / m_scale_alt * (num_dcol_dalt * den_dcol - den_dcol_dalt * num_dcol) / (den_dcol*den_dcol);
+    double drow_dalt = m_scale_row / m_scale_alt * (num_drow_dalt * den_drow - den_drow_dalt * num_drow) / (den_drow*den_drow);
+
+    return {dcol_dalt, drow_dalt};
+}
+
+tuple<py::array_t<double>,py::array_t<double>,py::array_t<double>>
+RPC::inverse_loc_with_jacobian(
+    py::array_t<double, py::array::c_style | py::array::forcecast> lon,
+    py::array_t<double, py::array::c_style | py::array::forcecast> lat,
+    py::array_t<double, py::array::c_style | py::array::forcecast> alt)const
+{
+    py::ssize_t nb_points = lon.size();
+    if (lat.size() != nb_points || (alt.size() != nb_points && alt.size() != 1)){
+        throw runtime_error("inverse_loc_with_jacobian: lon, lat and alt sizes are not consistent");
+    }
+
+    double const* lon_ptr = lon.data();
+    double const* lat_ptr = lat.data();
+    double const* alt_ptr = alt.data();
+    bool const unique_alt = alt.size() == 1 && nb_points != 1;
+
+    py::array_t<double> row_out(nb_points);
+    py::array_t<double> col_out(nb_points);
+    py::array_t<double> jacobian({nb_points, static_cast<py::ssize_t>(2), static_cast<py::ssize_t>(3)});
+    double* row_ptr = row_out.mutable_data();
+    double* col_ptr = col_out.mutable_data();
+    double* jac_ptr = jacobian.mutable_data();
+
+    for(py::ssize_t i = 0; i < nb_points; ++i){
+        double lon_norm = (lon_ptr[i] - m_offset_lon)/m_scale_lon;
+        double lat_norm = (lat_ptr[i] - m_offset_lat)/m_scale_lat;
+        double alt_norm = ((unique_alt ? alt_ptr[0] : alt_ptr[i]) - m_offset_alt)/m_scale_alt;
+
+        // polynomial monomials are shared between values and derivatives
+        alignas(64) array<double, 20> norms = pre_polynomial_equation(lon_norm, lat_norm, alt_norm);
+
+        auto const num_col = polynomial_equation_and_derivatives(norms, m_num_col);
+        auto const den_col = polynomial_equation_and_derivatives(norms, m_den_col);
+        auto const num_row = polynomial_equation_and_derivatives(norms, m_num_row);
+        auto const den_row = polynomial_equation_and_derivatives(norms, m_den_row);
+
+        row_ptr[i] = num_row[0] / den_row[0] * m_scale_row + m_offset_row;
+        col_ptr[i] = num_col[0] / den_col[0] * m_scale_col + m_offset_col;
+
+        array<double, 3> const scales = {m_scale_lon, m_scale_lat, m_scale_alt};
+        for(int k = 0; k < 3; ++k){
+            jac_ptr[6 * i + k] = m_scale_row / scales[k] *\
+            (num_row[k+1] * den_row[0] - den_row[k+1] * num_row[0]) / (den_row[0] * den_row[0]);
+            jac_ptr[6 * i + 3 + k] = m_scale_col / scales[k] *\
+            (num_col[k+1] * den_col[0] - den_col[k+1] * num_col[0]) / (den_col[0] * den_col[0]);
+        }
+    }
+
+    return {row_out, col_out, jacobian};
+}
+
 tuple<double,double,double> RPC::direct_loc_inverse_iterative(
     double row,
     double col,
@@ -357,6 +609,19 @@ tuple<double,double,double> RPC::direct_loc_inverse_iterative(
     int nb_iter_max,
     bool fill_nan)const
 {
+    // start from the center of the scene
+    return direct_loc_inverse_iterative(row, col, alt, nb_iter_max, fill_nan, m_offset_lon, m_offset_lat);
+}
+
+tuple<double,double,double> RPC::direct_loc_inverse_iterative(
+    double row,
+    double col,
+    double alt,
+    int nb_iter_max,
+    bool fill_nan,
+    double lon_start,
+    double lat_start)const
+{
 
     double lon_out;
     double lat_out;
@@ -375,10 +640,14 @@ tuple<double,double,double> RPC::direct_loc_inverse_iterative(
         }
         return {lon_out, lat_out, alt};
     }
-    else{
+    else if(isnan(lon_start) || isnan(lat_start)){
         lon_out = m_offset_lon;
         lat_out = m_offset_lat;
     }
+    else{
+        lon_out = lon_start;
+        lat_out = lat_start;
+    }
 
     auto const [row_start, col_start, alt_start] = inverse_loc(lon_out, lat_out, alt);
     (void) alt_start; // disable "unused variable"
@@ -827,6 +1096,68 @@ double derivative_polynomial_longitude(
 
 
 
+double derivative_polynomial_altitude(
+    double lon_norm,
+    double lat_norm,
+    double alt_norm,
+    const array<double, 20>& coeff)
+{
+    return
+        coeff[3]
+        + lon_norm * coeff[5]
+        + lat_norm * coeff[6]
+        + 2.0 * alt_norm * coeff[9]
+        + lon_norm * lat_norm * coeff[10]
+        + 2.0 * lon_norm * alt_norm * coeff[13]
+        + 2.0 * lat_norm * alt_norm * coeff[16]
+        + lon_norm * lon_norm * coeff[17]
+        + lat_norm * lat_norm * coeff[18]
+        + alt_norm * alt_norm * 3.0 * coeff[19];
+}
+
+array<double, 4> polynomial_equation_and_derivatives(
+    array<double, 20> const& norms,
+    array<double, 20> const& coeff)
+{
+    // norms = [1, x, y, z, xy, xz, yz, xx, yy, zz, xyz, xxx, xyy, xzz, xxy, yyy, yzz, xxz, yyz, zzz]
+    double const value = polynomial_equation(norms, coeff);
+    double const d_x =
+        coeff[1]
+        + norms[2] * coeff[4]
+        + norms[3] * coeff[5]
+        + 2.0 * norms[1] * coeff[7]
+        + norms[6] * coeff[10]
+        + 3.0 * norms[7] * coeff[11]
+        + norms[8] * coeff[12]
+        + norms[9] * coeff[13]
+        + 2.0 * norms[4] * coeff[14]
+        + 2.0 * norms[5] * coeff[17];
+    double const d_y =
+        coeff[2]
+        + norms[1] * coeff[4]
+        + norms[3] * coeff[6]
+        + 2.0 * norms[2] * coeff[8]
+        + norms[5] * coeff[10]
+        + 2.0 * norms[4] * coeff[12]
+        + norms[7] * coeff[14]
+        + 3.0 * norms[8] * coeff[15]
+        + norms[9] * coeff[16]
+        + 2.0 * norms[6] * coeff[18];
+    double const d_z =
+        coeff[3]
+        + norms[1] * coeff[5]
+        + norms[2] * coeff[6]
+        + 2.0 * norms[3] * coeff[9]
+        + norms[4] * coeff[10]
+        + 2.0 * norms[5] * coeff[13]
+        + 2.0 * norms[6] * coeff[16]
+        + norms[7] * coeff[17]
+        + norms[8] * coeff[18]
+        + 3.0 * norms[9] * coeff[19];
+    return {value, d_x, d_y, d_z};
+}
+
+
 
 tuple<vector<double>, vector<double>, vector<double>>
 check_sizes(
@@ -70,6 +70,24 @@ public:
         bool fill_nan=false,
         bool using_direct_coef=false) const override;
 
+    /**direct_loc_h at two altitudes unitary, the second iterative localization starts from the first one*/
+    std::tuple<std::array<double,3>,std::array<double,3>> direct_loc_h_two_altitudes(
+        double row,
+        double col,
+        double alt_first,
+        double alt_second,
+        bool fill_nan=false) const override;
+
+    /**direct_loc_h at two altitudes : returns {lon, lat, alt} vectors at alt_first and at alt_second*/
+    std::tuple<std::tuple<std::vector<double>,std::vector<double>,std::vector<double>>,
+               std::tuple<std::vector<double>,std::vector<double>,std::vector<double>>>
+    direct_loc_h_two_altitudes(
+        std::vector<double> const& row,
+        std::vector<double> const& col,
+        std::vector<double> const& alt_first,
+        std::vector<double> const& alt_second,
+        bool fill_nan=false) const;
+
     /**direct_loc_dtm unitary*/
     std::tuple<double,double,double> direct_loc_dtm(
         double row,
@@ -82,6 +100,26 @@ public:
         std::vector<double> const& col,
         DTMIntersection const& dtm) const;
 
+    /**
+    direct_loc_grid_dtm : direct localization on dtm of the grid row0 + i * steprow, col0 + j * stepcol
+    (i < nbrow, j < nbcol), results in row major order.
+    The line of sight of a pixel is walked from warm_start_margin above the intersection altitude of the
+    previous pixel of its row (previous row for the first column) instead of the dtm cube top, if the line of
+    sight between the cube top and this starting point is above the max altitude of the dtm cells it crosses.
+    The walk from the cube top is done otherwise, or if the starting point is below the dtm or if no
+    intersection is found.
+    A negative warm_start_margin walks all lines of sight from the cube top, as direct_loc_dtm.
+    */
+    std::tuple<std::vector<double>,std::vector<double>,std::vector<double>> direct_loc_grid_dtm(
+        double row0,
+        double col0,
+        double steprow,
+        double stepcol,
+        int nbrow,
+        int nbcol,
+        DTMIntersection const& dtm,
+        double warm_start_margin=-1.0) const;
+
     /**inverse_loc unitary*/
     std::tuple<double,double,double> inverse_loc(
         double lon,
@@ -100,6 +138,19 @@ public:
         double lat,
         double alt) const;
 
+    /**compute_loc_inverse_alt_derivates unitary*/
+    std::tuple<double, double> compute_loc_inverse_alt_derivates(
+        double lon,
+        double lat,
+        double alt) const;
+
+    /**inverse_loc_with_jacobian : sensor positions and d(row,col)/d(lon,lat,alt) in one evaluation*/
+    std::tuple<pybind11::array_t<double>,pybind11::array_t<double>,pybind11::array_t<double>>
+    inverse_loc_with_jacobian(
+        pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> lon,
+        pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> lat,
+        pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> alt) const;
+
     /**direct_loc_inverse_iterative*/
     std::tuple<double, double, double>
     direct_loc_inverse_iterative(
@@ -109,6 +160,17 @@ public:
         int nb_iter_max=10,
         bool fill_nan=false)const;
 
+    /**direct_loc_inverse_iterative starting from ground position (lon_start, lat_start)*/
+    std::tuple<double, double, double>
+    direct_loc_inverse_iterative(
+        double row,
+        double col,
+        double alt,
+        int nb_iter_max,
+        bool fill_nan,
+        double lon_start,
+        double lat_start)const;
+
     /**direct_loc_inverse_iterative*/
     std::tuple<std::vector<double>, std::vector<double>, std::vector<double>>
     direct_loc_inverse_iterative(
@@ -239,15 +301,15 @@ private:
     bool m_inverse_coefficient;
     bool m_direct_coefficient;
 
-    alignas(64) std::array<double, 20> m_num_col;
-    alignas(64) std::array<double, 20> m_den_col;
-    alignas(64) std::array<double, 20> m_num_row;
-    alignas(64) std::array<double, 20> m_den_row;
+    alignas(64) std::array<double, 20> m_num_col{};
+    alignas(64) std::array<double, 20> m_den_col{};
+    alignas(64) std::array<double, 20> m_num_row{};
+    alignas(64) std::array<double, 20> m_den_row{};
 
-    alignas(64) std::array<double, 20> m_num_lon;
-    alignas(64) std::array<double, 20> m_den_lon;
-    alignas(64) std::array<double, 20> m_num_lat;
-    alignas(64) std::array<double, 20> m_den_lat;
+    alignas(64) std::array<double, 20> m_num_lon{};
+    alignas(64) std::array<double, 20> m_den_lon{};
+    alignas(64) std::array<double, 20> m_num_lat{};
+    alignas(64) std::array<double, 20> m_den_lat{};
 
     std::array<double, 2> m_alt_minmax;
 
@@ -298,6 +360,19 @@ double derivative_polynomial_longitude(
     std::array<double, 20> const& coeff);
 
 
+/**Compute derivative_polynomial_altitude*/
+double derivative_polynomial_altitude(
+    double xnorm,
+    double ynorm,
+    double znorm,
+    std::array<double, 20> const& coeff);
+
+/**Compute polynomial value and its derivatives in x, y and z from pre_polynomial_equation norms*/
+std::array<double, 4> polynomial_equation_and_derivatives(
+    std::array<double, 20> const& norms,
+    std::array<double, 20> const& coeff);
+
+
 /**Check if arrays have the same size and cut it if needed*/
 std::tuple<std::vector<double>, std::vector<double>, std::vector<double>>
 check_sizes(
@@ -25,6 +25,9 @@ Inherits from Image Class with DTM particularities.
 
 # Standard imports
 import logging
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 # Third party imports
 import numpy as np
@@ -56,6 +59,8 @@ class dtm_reader(Image):
         roi_is_in_physical_space=False,
         fill_nodata="rio_fillnodata",
         fill_value=None,
+        tile_size=None,
+        nb_workers=1,
     ):
         """
         constructor
@@ -74,6 +79,11 @@ class dtm_reader(Image):
         :param fill_value:  fill value for constant strategy. fill value is used for 'roi_fillnodata' residuals nodata,
         if None 'min' is used
         :type fill_value: float
+        :param tile_size: if not None, statistics are computed by bands of tile_size rows (median is exact
+            for integer DTMs, approximated otherwise) and 'rio_fillnodata' is done by bands (see tiled_fillnodata)
+        :type tile_size: int
+        :param nb_workers: number of processes of the tiled 'rio_fillnodata'
+        :type nb_workers: int
         """
 
         super().__init__(dtm_filename, read_data=True, roi=roi, roi_is_in_physical_space=roi_is_in_physical_space)
@@ -83,18 +93,21 @@ class dtm_reader(Image):
 
         self.stats = {}
 
-        if self.mask is not None:
-            valid_data = self.data[self.mask[:, :] == 255]
+        if tile_size is not None:
+            self.stats = streaming_stats(self.data, self.mask, tile_size)
         else:
-            valid_data = self.data
+            if self.mask is not None:
+                valid_data = self.data[self.mask[:, :] == 255]
+            else:
+                valid_data = self.data
 
-        self.stats["min"] = valid_data.min()
-        self.stats["max"] = valid_data.max()
-        self.stats["mean"] = valid_data.mean()
-        self.stats["median"] = np.median(valid_data)
+            self.stats["min"] = valid_data.min()
+            self.stats["max"] = valid_data.max()
+            self.stats["mean"] = valid_data.mean()
+            self.stats["median"] = np.median(valid_data)
 
         if fill_nodata is not None:
-            self.fill_nodata(strategy=fill_nodata, fill_value=fill_value)
+            self.fill_nodata(strategy=fill_nodata, fill_value=fill_value, tile_size=tile_size, nb_workers=nb_workers)
         self.alt_data = self.data[:, :].astype("float64")
 
         if geoid_filename is not None:
@@ -113,7 +126,16 @@ class dtm_reader(Image):
         self.trans_inv = self.trans_inv.to_gdal()
         self.transform = self.transform.to_gdal()
 
-    def fill_nodata(self, strategy="rio_fillnodata", max_search_distance=100.0, smoothing_iterations=0, fill_value=0.0):
+    # pylint: disable=too-many-arguments
+    def fill_nodata(
+        self,
+        strategy="rio_fillnodata",
+        max_search_distance=100.0,
+        smoothing_iterations=0,
+        fill_value=0.0,
+        tile_size=None,
+        nb_workers=1,
+    ):
         """
         fill nodata in DTM image
 
@@ -126,12 +148,21 @@ class dtm_reader(Image):
         :param fill_value: fill value for constant strategy. fill value is used for 'roi_fillnodata' residuals nodata,
             if None 'min' is used
         :type fill_value: float
+        :param tile_size: if not None, 'rio_fillnodata' is done by bands of tile_size rows (see tiled_fillnodata)
+        :type tile_size: int
+        :param nb_workers: number of processes of the tiled 'rio_fillnodata'
+        :type nb_workers: int
         """
         if self.mask is not None:
             if strategy in self.stats:
                 self.data[self.mask[:, :] == 0] = self.stats[strategy]
             elif strategy == "rio_fillnodata":
-                self.data = fillnodata(self.data, self.mask[:, :], max_search_distance, smoothing_iterations)
+                if tile_size is not None:
+                    self.data = tiled_fillnodata(
+                        self.data, self.mask[:, :], max_search_distance, smoothing_iterations, tile_size, nb_workers
+                    )
+                else:
+                    self.data = fillnodata(self.data, self.mask[:, :], max_search_distance, smoothing_iterations)
                 if np.sum(self.data[self.mask[:, :] == 0] == self.nodata) != 0:
                     if fill_value is None:
                         fill_value = self.stats["min"]
@@ -145,6 +176,148 @@ class dtm_reader(Image):
             logging.debug("Shareloc dtm_reader: no nodata mask has been defined")
 
 
+def _fill_band(band, band_mask, max_search_distance, smoothing_iterations, first_row, nb_rows):
+    """
+    rio_fillnodata of a band with its halo, return the band rows without halo
+
+    :param band: band data with halo
+    :type band: np.ndarray
+    :param band_mask: band nodata mask with halo, 0 on nodata
+    :type band_mask: np.ndarray
+    :param max_search_distance: fill max_search_distance
+    :type max_search_distance: float
+    :param smoothing_iterations: smoothing_iterations
+    :type smoothing_iterations: int
+    :param first_row: first row of the band without halo in band
+    :type first_row: int
+    :param nb_rows: number of rows of the band without halo
+    :type nb_rows: int
+    :return: filled band without halo
+    :rtype: np.ndarray
+    """
+    return fillnodata(band, band_mask, max_search_distance, smoothing_iterations)[first_row : first_row + nb_rows]
+
+
+# pylint: disable=too-many-arguments
+def tiled_fillnodata(data, mask, max_search_distance=100.0, smoothing_iterations=0, tile_size=512, nb_workers=1):
+    """
+    rasterio fillnodata done by bands of tile_size rows, in nb_workers processes.
+    Each band is filled with a halo of max_search_distance + smoothing_iterations rows on each side,
+    which contains all the pixels the fill of the band depends on : the result is the one of a single
+    fillnodata call, without seams. Bands without nodata are not filled.
+
+    :param data: DTM data
+    :type data: np.ndarray
+    :param mask: nodata mask, 0 on nodata
+    :type mask: np.ndarray
+    :param max_search_distance: fill max_search_distance
+    :type max_search_distance: float
+    :param smoothing_iterations: smoothing_iterations
+    :type smoothing_iterations: int
+    :param tile_size: number of rows of the bands
+    :type tile_size: int
+    :param nb_workers: number of spawned processes, bands are filled in the current process if 1
+    :type nb_workers: int
+    :return: filled data
+    :rtype: np.ndarray
+    """
+    halo = int(math.ceil(max_search_distance)) + int(smoothing_iterations)
+    nb_rows = data.shape[0]
+    filled = np.copy(data)
+
+    tasks = []
+    for row_min in range(0, nb_rows, tile_size):
+        row_max = min(row_min + tile_size, nb_rows)
+        if np.all(mask[row_min:row_max] != 0):
+            continue
+        halo_min = max(0, row_min - halo)
+        halo_max = min(nb_rows, row_max + halo)
+        tasks.append(
+            (
+                row_min,
+                (
+                    data[halo_min:halo_max],
+                    mask[halo_min:halo_max],
+                    max_search_distance,
+                    smoothing_iterations,
+                    row_min - halo_min,
+                    row_max - row_min,
+                ),
+            )
+        )
+
+    if nb_workers > 1 and len(tasks) > 1:
+        # workers are spawned : forking a process running threads (numba, OpenMP) can deadlock
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(nb_workers, len(tasks)), mp_context=context) as executor:
+            futures = [(row_min, executor.submit(_fill_band, *args)) for row_min, args in tasks]
+            bands = [(row_min, future.result()) for row_min, future in futures]
+    else:
+        bands = [(row_min, _fill_band(*args)) for row_min, args in tasks]
+
+    for row_min, band in bands:
+        filled[row_min : row_min + band.shape[0]] = band
+    return filled
+
+
+def streaming_stats(data, mask, tile_size=512):
+    """
+    min, max, mean and median of DTM valid data, computed by bands of tile_size rows without copying all valid data.
+    The median is computed from a histogram of the valid data : it is exact for integer data,
+    and approximated by linear interpolation in bins of (max - min) / 65536 otherwise.
+
+    :param data: DTM data
+    :type data: np.ndarray
+    :param mask: nodata mask, 255 on valid data, or None if all data are valid
+    :type mask: np.ndarray
+    :param tile_size: number of rows of the bands
+    :type tile_size: int
+    :return: statistics with 'min', 'max', 'mean', 'median' keys
+    :rtype: dict
+    """
+    bands = [slice(row_min, row_min + tile_size) for row_min in range(0, data.shape[0], tile_size)]
+
+    def valid_band(band):
+        return np.ravel(data[band]) if mask is None else data[band][mask[band] == 255]
+
+    minimum = np.inf
+    maximum = -np.inf
+    total = 0.0
+    count = 0
+    for band in bands:
+        values = valid_band(band)
+        if values.size:
+            minimum = min(minimum, values.min())
+            maximum = max(maximum, values.max())
+            total += np.sum(values, dtype=np.float64)
+            count += values.size
+
+    value_range = float(maximum) - float(minimum)
+    is_integer = np.issubdtype(data.dtype, np.integer) and value_range < 1 << 24
+    nb_bins = int(value_range) + 1 if is_integer else 1 << 16
+    bin_width = 1.0 if is_integer else max(value_range, np.finfo(np.float64).tiny) / nb_bins
+    histogram = np.zeros(nb_bins, dtype=np.int64)
+    for band in bands:
+        values = valid_band(band)
+        if is_integer:
+            histogram += np.bincount(values.astype(np.int64) - int(minimum), minlength=nb_bins)
+        else:
+            indexes = np.minimum(((values - float(minimum)) / bin_width).astype(np.int64), nb_bins - 1)
+            histogram += np.bincount(indexes, minlength=nb_bins)
+
+    cumulated = np.cumsum(histogram)
+
+    def value_at_rank(rank):
+        index = int(np.searchsorted(cumulated, rank, side="right"))
+        if is_integer:
+            return float(minimum) + index
+        before = cumulated[index - 1] if index > 0 else 0
+        return float(minimum) + (index + (rank - before + 0.5) / histogram[index]) * bin_width
+
+    median = (value_at_rank((count - 1) // 2) + value_at_rank(count // 2)) / 2.0
+    return {"min": minimum, "max": maximum, "mean": total / count, "median": median}
+
+
 def interpolate_geoid_height(geoid_filename, positions, interpolation_method="linear"):
     """
     terrain to index conversion
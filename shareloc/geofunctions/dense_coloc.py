@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains functions to compute dense colocalization maps : for each pixel of image 1,
+its sensor position in image 2, from an exact colocalization lattice densified by bilinear interpolation
+"""
+
+# Standard imports
+import math
+
+# Third party imports
+import numpy as np
+from rasterio.windows import Window
+
+# Shareloc imports
+from shareloc.geofunctions.localization import coloc
+from shareloc.geofunctions.rectification_grid import REGULAR_GRID_INTERPOLATORS, regular_grid_interpolation
+from shareloc.geomodels.geomodel_template import GeoModelTemplate
+from shareloc.image import Image
+from shareloc.math_utils import refine_lattice_cells
+from shareloc.raster_utils import write_tiled_geotiff
+
+
+def coloc_pixels(
+    geom_model_1: GeoModelTemplate,
+    geom_model_2: GeoModelTemplate,
+    elevation,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    image_1: Image,
+    image_2: Image = None,
+) -> np.ndarray:
+    """
+    Exact colocalization of image 1 pixels
+
+    :param geom_model_1: geometric model of image 1
+    :type geom_model_1: GeoModelTemplate
+    :param geom_model_2: geometric model of image 2
+    :type geom_model_2: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: shareloc.dtm or float
+    :param rows: image 1 row index
+    :type rows: 1D np.ndarray
+    :param cols: image 1 col index
+    :type cols: 1D np.ndarray
+    :param image_1: image 1
+    :type image_1: shareloc.image.Image
+    :param image_2: image 2, output positions are image 2 index if given, model 2 sensor positions otherwise
+    :type image_2: shareloc.image.Image
+    :return: positions in image 2 (nb points, [row, col, altitude])
+    :rtype: 2D np.ndarray
+    """
+    if rows.size == 0:
+        return np.empty((0, 3), dtype=np.float64)
+    return np.stack(
+        coloc(
+            geom_model_1,
+            geom_model_2,
+            np.asarray(rows, dtype=np.float64),
+            np.asarray(cols, dtype=np.float64),
+            elevation,
+            image_1,
+            image_2,
+            using_geotransform=True,
+        ),
+        axis=1,
+    )
+
+
+def interpolate_coloc_lattice(lattice: np.ndarray, step: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Bilinear interpolation of a colocalization lattice, node (i, j) being image 1 pixel (i * step, j * step)
+
+    :param lattice: colocalization lattice (nb_nodes_rows, nb_nodes_cols, [row, col, altitude])
+    :type lattice: 3D np.ndarray
+    :param step: lattice step in image 1 pixels
+    :type step: int
+    :param rows: image 1 row index
+    :type rows: 1D np.ndarray
+    :param cols: image 1 col index
+    :type cols: 1D np.ndarray
+    :return: interpolated positions (nb points, [row, col, altitude])
+    :rtype: 2D np.ndarray
+    """
+    positions = np.stack((cols, rows), axis=1).astype(np.float64)
+    # interpolated grids are (nb_cols, nb_rows, 2)
+    grids = [lattice[:, :, 0:2], np.stack((lattice[:, :, 2], lattice[:, :, 2]), axis=2)]
+    row_col, alt = [
+        regular_grid_interpolation(
+            np.ascontiguousarray(np.transpose(grid, (1, 0, 2)), dtype=np.float64),
+            positions,
+            0.0,
+            0.0,
+            float(step),
+            float(step),
+            REGULAR_GRID_INTERPOLATORS["linear"],
+        )
+        for grid in grids
+    ]
+    return np.stack((row_col[:, 0], row_col[:, 1], alt[:, 0]), axis=1)
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+def compute_coloc_lattice(
+    geom_model_1: GeoModelTemplate,
+    geom_model_2: GeoModelTemplate,
+    elevation,
+    image_1: Image,
+    image_2: Image = None,
+    step: int = 8,
+    tolerance: float = 0.05,
+    nb_check_passes: int = 2,
+):
+    """
+    Compute the exact colocalization lattice of image 1 at step pixels, and the cells where
+    bilinear interpolation of the lattice is not accurate enough.
+    The lattice covers the whole image 1 : its last nodes may be after the last pixel.
+    Interpolation is checked on one node per cell (cell center first, then random pixels) at each pass,
+    until no error above tolerance is found. Wrong cells, their neighbours and cells with an invalid node
+    are marked to be colocalized exactly pixel by pixel.
+
+    :param geom_model_1: geometric model of image 1
+    :type geom_model_1: GeoModelTemplate
+    :param geom_model_2: geometric model of image 2
+    :type geom_model_2: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: shareloc.dtm or float
+    :param image_1: image 1
+    :type image_1: shareloc.image.Image
+    :param image_2: image 2, output positions are image 2 index if given, model 2 sensor positions otherwise
+    :type image_2: shareloc.image.Image
+    :param step: lattice step in image 1 pixels
+    :type step: int
+    :param tolerance: maximum interpolation error (in pixels of image 2)
+    :type tolerance: float
+    :param nb_check_passes: maximum number of checks of each cell
+    :type nb_check_passes: int
+    :return: lattice (nb_nodes_rows, nb_nodes_cols, [row, col, altitude]) and exact cells mask
+        (nb_nodes_rows - 1, nb_nodes_cols - 1)
+    :rtype: Tuple(np.ndarray, np.ndarray)
+    """
+    size = [image_1.nb_rows, image_1.nb_columns]
+    nb_cells = [max(int(math.ceil((size[0] - 1) / step)), 1), max(int(math.ceil((size[1] - 1) / step)), 1)]
+    node_rows, node_cols = np.meshgrid(
+        np.arange(nb_cells[0] + 1) * step, np.arange(nb_cells[1] + 1) * step, indexing="ij"
+    )
+    lattice = np.reshape(
+        coloc_pixels(geom_model_1, geom_model_2, elevation, node_rows.ravel(), node_cols.ravel(), image_1, image_2),
+        (nb_cells[0] + 1, nb_cells[1] + 1, 3),
+    )
+
+    valid_nodes = np.all(np.isfinite(lattice), axis=2)
+    exact_cells = ~(valid_nodes[:-1, :-1] & valid_nodes[1:, :-1] & valid_nodes[:-1, 1:] & valid_nodes[1:, 1:])
+
+    def check_nodes(check_rows, check_cols):
+        """
+        Interpolation error of image 1 pixels
+        """
+        exact = coloc_pixels(geom_model_1, geom_model_2, elevation, check_rows, check_cols, image_1, image_2)
+        interpolated = interpolate_coloc_lattice(lattice, step, check_rows, check_cols)
+        return np.hypot(exact[:, 0] - interpolated[:, 0], exact[:, 1] - interpolated[:, 1])
+
+    refine_lattice_cells(
+        exact_cells, step, size, check_nodes, tolerance, nb_check_passes, np.random.default_rng(0), centers_first=True
+    )
+
+    return lattice, exact_cells
+
+
+def dense_coloc_window(
+    geom_model_1: GeoModelTemplate,
+    geom_model_2: GeoModelTemplate,
+    elevation,
+    lattice: np.ndarray,
+    exact_cells: np.ndarray,
+    step: int,
+    window: Window,
+    image_1: Image,
+    image_2: Image = None,
+) -> np.ndarray:
+    """
+    Dense colocalization of an image 1 window : lattice interpolation, and exact colocalization
+    of the pixels of exact cells (see compute_coloc_lattice)
+
+    :param geom_model_1: geometric model of image 1
+    :type geom_model_1: GeoModelTemplate
+    :param geom_model_2: geometric model of image 2
+    :type geom_model_2: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: shareloc.dtm or float
+    :param lattice: colocalization lattice (nb_nodes_rows, nb_nodes_cols, [row, col, altitude])
+    :type lattice: 3D np.ndarray
+    :param exact_cells: exact cells mask (nb_nodes_rows - 1, nb_nodes_cols - 1)
+    :type exact_cells: 2D np.ndarray
+    :param step: lattice step in image 1 pixels
+    :type step: int
+    :param window: image 1 window
+    :type window: rasterio.windows.Window
+    :param image_1: image 1
+    :type image_1: shareloc.image.Image
+    :param image_2: image 2, output positions are image 2 index if given, model 2 sensor positions otherwise
+    :type image_2: shareloc.image.Image
+    :return: positions in image 2 ([row, col, altitude], window height, window width)
+    :rtype: 3D np.ndarray
+    """
+    rows, cols = np.mgrid[
+        window.row_off : window.row_off + window.height, window.col_off : window.col_off + window.width
+    ]
+    rows = rows.ravel()
+    cols = cols.ravel()
+    positions = interpolate_coloc_lattice(lattice, step, rows, cols)
+
+    exact = exact_cells[
+        np.minimum(rows // step, exact_cells.shape[0] - 1), np.minimum(cols // step, exact_cells.shape[1] - 1)
+    ]
+    if np.any(exact):
+        positions[exact] = coloc_pixels(
+            geom_model_1, geom_model_2, elevation, rows[exact], cols[exact], image_1, image_2
+        )
+    return np.reshape(positions.T, (3, window.height, window.width))
+
+
+def compute_dense_coloc_map(
+    geom_model_1: GeoModelTemplate,
+    geom_model_2: GeoModelTemplate,
+    elevation,
+    image_1: Image,
+    output_filename: str,
+    image_2: Image = None,
+    step: int = 8,
+    tolerance: float = 0.05,
+    nb_check_passes: int = 2,
+    tile_size: int = 512,
+) -> np.ndarray:
+    """
+    Compute the dense colocalization map of image 1 in image 2 and write it, tile by tile, in a 3 bands
+    (row, col, altitude) float64 GeoTIFF with the size and transform of image 1.
+    Exact colocalization is computed on a lattice at step pixels, densified by bilinear interpolation,
+    and cells where interpolation is not accurate enough are colocalized pixel by pixel
+    (see compute_coloc_lattice). Tiles are processed sequentially : colocalization holds the GIL
+    (python and C++ models), a thread pool would not speed it up.
+
+    :param geom_model_1: geometric model of image 1 (RPC, RPCoptim or GRID)
+    :type geom_model_1: GeoModelTemplate
+    :param geom_model_2: geometric model of image 2 (RPC, RPCoptim or GRID)
+    :type geom_model_2: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: shareloc.dtm or float
+    :param image_1: image 1 (data are not needed)
+    :type image_1: shareloc.image.Image
+    :param output_filename: output colocalization map filename
+    :type output_filename: str
+    :param image_2: image 2, output positions are image 2 index if given, model 2 sensor positions otherwise
+    :type image_2: shareloc.image.Image
+    :param step: lattice step in image 1 pixels
+    :type step: int
+    :param tolerance: maximum interpolation error (in pixels of image 2)
+    :type tolerance: float
+    :param nb_check_passes: maximum number of checks of each lattice cell
+    :type nb_check_passes: int
+    :param tile_size: tile size in pixels, multiple of 16
+    :type tile_size: int
+    :return: exact cells mask (see compute_coloc_lattice)
+    :rtype: np.ndarray
+    """
+    if tile_size % 16 != 0:
+        raise ValueError(f"tile size {tile_size} must be a multiple of 16")
+
+    lattice, exact_cells = compute_coloc_lattice(
+        geom_model_1, geom_model_2, elevation, image_1, image_2, step, tolerance, nb_check_passes
+    )
+
+    def coloc_tile(tile):
+        """
+        Colocalize one tile
+        """
+        return dense_coloc_window(
+            geom_model_1, geom_model_2, elevation, lattice, exact_cells, step, tile, image_1, image_2
+        )
+
+    profile = {
+        "driver": "GTiff",
+        "dtype": np.float64,
+        "width": image_1.nb_columns,
+        "height": image_1.nb_rows,
+        "count": 3,
+        "nodata": np.nan,
+        "transform": image_1.transform,
+    }
+    write_tiled_geotiff(output_filename, profile, coloc_tile, tile_size, descriptions=("row", "col", "altitude"))
+
+    return exact_cells
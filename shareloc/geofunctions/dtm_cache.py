@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the on-disk cache of prepared DTMs : altitudes after nodata filling and geoid
+correction by shareloc.dtm_reader.dtm_reader, and cells min/max altitudes of DTMIntersection.
+Entries are memory-mappable files (see shareloc.geofunctions.shared_dtm) named by a content hash
+of the DTM and geoid files and of the reading options, so that a prepared DTM is opened without reading
+its pages before they are used.
+"""
+
+# Standard imports
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import bindings_cpp
+
+# Shareloc imports
+from shareloc.dtm_reader import dtm_reader
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+from shareloc.geofunctions.shared_dtm import SharedDTMHandle, attach_shared_dtm, write_dtm_file
+
+# version of the prepared DTM layout, part of the cache key
+PREPARED_DTM_CACHE_VERSION = 1
+
+# size of the chunks read to hash source files
+_HASH_CHUNK_SIZE = 1 << 24
+
+
+def prepared_dtm_cache_key(dtm_filename: str, geoid_filename: str, options: dict) -> str:
+    """
+    Compute the cache key of a prepared DTM : sha256 of the DTM and geoid files contents and of the reading options
+
+    :param dtm_filename: dtm filename
+    :type dtm_filename: str
+    :param geoid_filename: geoid filename or None
+    :type geoid_filename: str
+    :param options: dtm_reader options (roi, fill_nodata, ...)
+    :type options: dict
+    :return: hexadecimal key
+    :rtype: str
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"prepared_dtm{PREPARED_DTM_CACHE_VERSION}".encode())
+    for filename in [dtm_filename, geoid_filename]:
+        if filename is None:
+            hasher.update(b"none")
+            continue
+        hasher.update(f"file{os.path.getsize(filename)}".encode())
+        with open(filename, "rb") as source_file:
+            chunk = source_file.read(_HASH_CHUNK_SIZE)
+            while chunk:
+                hasher.update(chunk)
+                chunk = source_file.read(_HASH_CHUNK_SIZE)
+    hasher.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+def load_prepared_dtm(cache_dir: str, key: str, cpp: bool = True):
+    """
+    Open a prepared DTM of the cache
+
+    :param cache_dir: cache directory
+    :type cache_dir: str
+    :param key: cache key (see prepared_dtm_cache_key)
+    :type key: str
+    :param cpp: True for a C++ DTMIntersection, False for a python one
+    :type cpp: bool
+    :return: DTM mapping the cache entry, pickled as its handle, or None if not in cache
+    :rtype: shared_dtm.SharedCppDTMIntersection or shared_dtm.SharedDTMIntersection or None
+    """
+    metadata_filename = os.path.join(cache_dir, key + ".json")
+    data_filename = os.path.join(cache_dir, key + ".dtm")
+    if not os.path.isfile(metadata_filename):
+        return None
+    try:
+        with open(metadata_filename, encoding="utf8") as metadata_file:
+            metadata = json.load(metadata_file)
+        handle = SharedDTMHandle(
+            data_filename,
+            cpp,
+            metadata["epsg"],
+            metadata["nb_rows"],
+            metadata["nb_columns"],
+            tuple(metadata["transform"]),
+        )
+        return attach_shared_dtm(handle)
+    except (OSError, KeyError, TypeError, ValueError):
+        logging.warning("Invalid prepared DTM cache entry %s is removed", metadata_filename)
+        for filename in [metadata_filename, data_filename]:
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+        return None
+
+
+def save_prepared_dtm(cache_dir: str, key: str, dtm):
+    """
+    Save a prepared DTM in the cache. Files are written under temporary names and renamed,
+    the metadata file last, so that concurrent readers never see a partial entry.
+
+    :param cache_dir: cache directory, created if needed
+    :type cache_dir: str
+    :param key: cache key (see prepared_dtm_cache_key)
+    :type key: str
+    :param dtm: prepared DTM
+    :type dtm: shareloc.geofunctions.dtm_intersection.DTMIntersection or bindings_cpp.DTMIntersection
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    file_descriptor, tmp_data_filename = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+    os.close(file_descriptor)
+    file_descriptor, tmp_metadata_filename = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+    try:
+        handle = write_dtm_file(dtm, tmp_data_filename)
+        with os.fdopen(file_descriptor, "w", encoding="utf8") as metadata_file:
+            json.dump(
+                {
+                    "epsg": int(handle.epsg),
+                    "nb_rows": int(handle.nb_rows),
+                    "nb_columns": int(handle.nb_columns),
+                    "transform": [float(coef) for coef in handle.transform],
+                },
+                metadata_file,
+            )
+        os.replace(tmp_data_filename, os.path.join(cache_dir, key + ".dtm"))
+        os.replace(tmp_metadata_filename, os.path.join(cache_dir, key + ".json"))
+    except BaseException:
+        for filename in [tmp_data_filename, tmp_metadata_filename]:
+            if os.path.exists(filename):
+                os.remove(filename)
+        raise
+
+
+# pylint: disable=too-many-arguments
+def prepared_dtm(
+    dtm_filename,
+    geoid_filename=None,
+    roi=None,
+    roi_is_in_physical_space=False,
+    fill_nodata="rio_fillnodata",
+    fill_value=None,
+    cache_dir=None,
+    cpp=True,
+):
+    """
+    DTMIntersection of a DTM file read by dtm_reader, looked up first in the prepared DTM cache if cache_dir is given.
+    On a cache miss, the DTM is read, filled and geoid corrected, then saved with its cells min/max altitudes.
+    Cached DTMs map the cache entry read only and are pickled as its handle (see shareloc.geofunctions.shared_dtm).
+
+    :param dtm_filename: dtm filename
+    :type dtm_filename: str
+    :param geoid_filename: geoid filename, if None datum is ellispoid
+    :type geoid_filename: str
+    :param roi: region of interest, see dtm_reader
+    :type roi: list
+    :param roi_is_in_physical_space: roi value in physical space
+    :type roi_is_in_physical_space: bool
+    :param fill_nodata: fill_nodata strategy, see dtm_reader
+    :type fill_nodata: str
+    :param fill_value: fill value, see dtm_reader
+    :type fill_value: float
+    :param cache_dir: prepared DTM cache directory, no cache if None
+    :type cache_dir: str
+    :param cpp: True for a C++ DTMIntersection, False for a python one
+    :type cpp: bool
+    :return: DTM
+    :rtype: bindings_cpp.DTMIntersection or shareloc.geofunctions.dtm_intersection.DTMIntersection
+    """
+    if cache_dir is not None:
+        options = {
+            "roi": roi,
+            "roi_is_in_physical_space": roi_is_in_physical_space,
+            "fill_nodata": fill_nodata,
+            "fill_value": fill_value,
+        }
+        cache_key = prepared_dtm_cache_key(dtm_filename, geoid_filename, options)
+        dtm = load_prepared_dtm(cache_dir, cache_key, cpp)
+        if dtm is not None:
+            return dtm
+
+    dtm_image = dtm_reader(dtm_filename, geoid_filename, roi, roi_is_in_physical_space, fill_nodata, fill_value)
+    dtm_class = bindings_cpp.DTMIntersection if cpp else DTMIntersection
+    dtm = dtm_class(
+        dtm_image.epsg,
+        dtm_image.alt_data,
+        dtm_image.nb_rows,
+        dtm_image.nb_columns,
+        dtm_image.transform,
+    )
+    if cache_dir is None:
+        return dtm
+
+    save_prepared_dtm(cache_dir, cache_key, dtm)
+    return load_prepared_dtm(cache_dir, cache_key, cpp)
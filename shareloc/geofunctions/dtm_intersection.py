@@ -24,14 +24,24 @@ This module contains the DTMIntersection class to handle DTM intersection.
 
 # Standard imports
 import logging
+import os
+from ast import literal_eval
 
 # Third party imports
 import numpy as np
 from affine import Affine
+from numba import config, njit, prange
 
 # Shareloc imports
 from shareloc.math_utils import interpol_bilin
-from shareloc.proj_utils import transform_index_to_physical_point, transform_physical_point_to_index
+from shareloc.proj_utils import (
+    coordinates_conversion,
+    transform_index_to_physical_point,
+    transform_physical_point_to_index,
+)
+
+# Set numba type of threading layer before parallel target compilation
+config.THREADING_LAYER = "omp"
 
 
 class DTMIntersection:
@@ -50,6 +60,8 @@ class DTMIntersection:
         dtm_image_nb_rows,
         dtm_image_nb_columns,
         dtm_image_transform,
+        alt_min_cell=None,
+        alt_max_cell=None,
     ):
         """
         Constructor, designed to have a C++ twin.
@@ -70,7 +82,11 @@ class DTMIntersection:
         :param dtm_image_trans_inv: dtm_reader trans_inv attribut
                                     same coefficient order as GDAL's SetGeoTransform()
         :type dtm_image_trans_inv: tuple(c, a, b, f, d, e) from affine module
-
+        :param alt_min_cell: cells min altitudes computed by init_min_max(), used as is if given
+            (with alt_max_cell) to share them between DTMs, computed otherwise
+        :type alt_min_cell: np.ndarray of shape (nb_rows - 1, nb_columns - 1)
+        :param alt_max_cell: cells max altitudes computed by init_min_max()
+        :type alt_max_cell: np.ndarray of shape (nb_rows - 1, nb_columns - 1)
         """
 
         self.origin_x = None
@@ -84,7 +100,11 @@ class DTMIntersection:
         self.epsg = dtm_image_epsg
         self.alt_data = dtm_image_alt_data
 
-        self.init_min_max()
+        if alt_min_cell is not None and alt_max_cell is not None:
+            self.alt_min_cell = alt_min_cell
+            self.alt_max_cell = alt_max_cell
+        else:
+            self.init_min_max()
         self.alt_max = self.alt_data.max()
         self.alt_min = self.alt_data.min()
         self.plane_coef_a = np.array([1.0, 1.0, 0.0, 0.0, 0.0, 0.0])
@@ -197,6 +217,23 @@ class DTMIntersection:
         alt = interpol_bilin(self.alt_data, self.nb_rows, self.nb_columns, pos_row, pos_col)
         return alt
 
+    def interpolate_n(self, positions, crs=None):
+        """
+        interpolate altitudes of terrain positions, same values as interpolate() inside the DTM, nan outside
+
+        :param positions: terrain positions (x,y) or (x,y,z), z is unused
+        :type positions: np.ndarray (Nx2 or Nx3)
+        :param crs: epsg code of positions, dtm epsg if None
+        :type crs: int
+        :return: interpolated altitudes
+        :rtype: np.ndarray (N)
+        """
+        positions = np.ascontiguousarray(np.atleast_2d(positions)[:, :2], dtype=np.float64)
+        if crs is not None and crs != self.epsg:
+            positions = np.ascontiguousarray(coordinates_conversion(positions, crs, self.epsg), dtype=np.float64)
+        alt_data = np.ascontiguousarray(np.reshape(self.alt_data, (self.nb_rows, self.nb_columns)), dtype=np.float64)
+        return interpolate_positions(alt_data, positions, *self.trans_inv[:6])
+
     def init_min_max(self):
         """
         initialize min/max at each dtm cell
@@ -876,3 +913,59 @@ class DTMIntersection:
 
     def get_transform(self):  # same api as cpp for direct_loc_dtm
         return self.transform
+
+
+# pylint: disable=too-many-arguments
+@njit(
+    "f8[:](f8[:,::1], f8[:,::1], f8, f8, f8, f8, f8, f8)",
+    parallel=literal_eval(os.environ.get("SHARELOC_NUMBA_PARALLEL", "True")),
+    cache=True,
+)
+def interpolate_positions(alt_data, positions, inv_a, inv_b, inv_c, inv_d, inv_e, inv_f):
+    """
+    Bilinear interpolation of DTM altitudes at terrain positions using numba, nan outside the DTM.
+
+    :param alt_data: DTM altitudes (nb_rows, nb_cols)
+    :type alt_data: 2D np.array dtype np.float 64
+    :param positions: terrain positions Nx2 [x,y]
+    :type positions: 2D np.array dtype np.float 64
+    :param inv_a: inverse geotransform coefficient a (col = a * x + b * y + c)
+    :type inv_a: float 64
+    :param inv_b: inverse geotransform coefficient b
+    :type inv_b: float 64
+    :param inv_c: inverse geotransform coefficient c
+    :type inv_c: float 64
+    :param inv_d: inverse geotransform coefficient d (row = d * x + e * y + f)
+    :type inv_d: float 64
+    :param inv_e: inverse geotransform coefficient e
+    :type inv_e: float 64
+    :param inv_f: inverse geotransform coefficient f
+    :type inv_f: float 64
+    :return: interpolated altitudes
+    :rtype: 1D np.array dtype np.float 64
+    """
+    nb_rows = alt_data.shape[0]
+    nb_cols = alt_data.shape[1]
+    nb_points = positions.shape[0]
+    out = np.empty(nb_points, dtype=np.float64)
+
+    # pylint: disable=not-an-iterable
+    for i in prange(nb_points):
+        pos_col = inv_a * positions[i, 0] + inv_b * positions[i, 1] + inv_c - 0.5
+        pos_row = inv_d * positions[i, 0] + inv_e * positions[i, 1] + inv_f - 0.5
+        # negated test so that nan positions are outside
+        if not (0.0 <= pos_row <= nb_rows - 1 and 0.0 <= pos_col <= nb_cols - 1):
+            out[i] = np.nan
+            continue
+        lower_row = min(int(np.floor(pos_row)), nb_rows - 2)
+        lower_col = min(int(np.floor(pos_col)), nb_cols - 2)
+        col_shift = pos_col - lower_col
+        row_shift = pos_row - lower_row
+        out[i] = (
+            (1 - col_shift) * (1 - row_shift) * alt_data[lower_row, lower_col]
+            + col_shift * (1 - row_shift) * alt_data[lower_row, lower_col + 1]
+            + (1 - col_shift) * row_shift * alt_data[lower_row + 1, lower_col]
+            + col_shift * row_shift * alt_data[lower_row + 1, lower_col + 1]
+        )
+
+    return out
@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the virtual DTM mosaic : a set of DTM tiles (SRTM, Copernicus DEM, ...) on the same grid,
+indexed by extent, whose tiles are read by dtm_reader only when a window needs them.
+Windows across tiles borders are returned as DTMIntersection.
+
+DTMMosaic is not a DTMIntersection : it has no localization interface (intersection, interpolate, ...)
+and can not be given to geometric models directly. Localization functions take the DTMIntersection
+of the window containing the region of interest, returned by DTMMosaic.get_dtm.
+"""
+
+# Standard imports
+import logging
+import os
+from collections import OrderedDict
+
+# Third party imports
+import numpy as np
+import rasterio
+from affine import Affine
+
+import bindings_cpp
+
+# Shareloc imports
+from shareloc.dtm_reader import dtm_reader
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+from shareloc.proj_utils import transform_physical_point_to_index
+
+# extensions of the DTM tiles looked up in a mosaic directory
+DTM_TILE_EXTENSIONS = (".tif", ".tiff", ".hgt", ".dt1", ".dt2")
+
+# default maximum number of read tiles kept in memory by a DTMMosaic
+DTM_MOSAIC_CACHE_SIZE = 4
+
+# maximum distance to the mosaic grid, in pixels, of tiles origins
+_GRID_TOLERANCE = 1e-3
+
+
+class DTMTile:
+    """
+    Position of a DTM tile in its mosaic grid
+    """
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, filename, row_offset, col_offset, nb_rows, nb_columns):
+        """
+        Constructor
+
+        :param filename: tile filename
+        :type filename: str
+        :param row_offset: row of the tile first pixel in the mosaic
+        :type row_offset: int
+        :param col_offset: column of the tile first pixel in the mosaic
+        :type col_offset: int
+        :param nb_rows: tile number of rows
+        :type nb_rows: int
+        :param nb_columns: tile number of columns
+        :type nb_columns: int
+        """
+        self.filename = filename
+        self.row_offset = row_offset
+        self.col_offset = col_offset
+        self.nb_rows = nb_rows
+        self.nb_columns = nb_columns
+
+
+class DTMMosaic:
+    """
+    Virtual DTM made of tiles on the same grid (same CRS and pixel size, origins shifted by whole pixels).
+
+    Only tiles headers are read at construction. Tiles are read, filled and geoid corrected by dtm_reader
+    when a window needs them, and the last read ones are kept in memory (LRU). Tiles altitudes min/max are
+    kept once known, to bound lines of sight without reading tiles again.
+    Mosaic pixels outside every tile are set to fill_value, or to the minimum altitude of the window tiles if None.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        tiles,
+        geoid_filename=None,
+        fill_nodata="rio_fillnodata",
+        fill_value=None,
+        cache_size=DTM_MOSAIC_CACHE_SIZE,
+    ):
+        """
+        Constructor : index tiles by extent
+
+        :param tiles: directory of the tiles (files with DTM_TILE_EXTENSIONS) or list of tiles filenames
+        :type tiles: str or list
+        :param geoid_filename: geoid filename, if None datum is ellispoid
+        :type geoid_filename: str
+        :param fill_nodata: tiles fill_nodata strategy, see dtm_reader
+        :type fill_nodata: str
+        :param fill_value: fill value, see dtm_reader, also used outside tiles
+        :type fill_value: float
+        :param cache_size: maximum number of read tiles kept in memory
+        :type cache_size: int
+        """
+        if isinstance(tiles, str):
+            tiles = [
+                os.path.join(tiles, filename)
+                for filename in sorted(os.listdir(tiles))
+                if filename.lower().endswith(DTM_TILE_EXTENSIONS)
+            ]
+        if len(tiles) == 0:
+            raise ValueError("DTM mosaic without tiles")
+
+        self.geoid_filename = geoid_filename
+        self.fill_nodata = fill_nodata
+        self.fill_value = fill_value
+        self.cache_size = cache_size
+
+        headers = []
+        for filename in tiles:
+            with rasterio.open(filename) as dataset:
+                epsg = dataset.crs.to_epsg() if dataset.crs is not None else None
+                headers.append((filename, epsg, dataset.transform, dataset.height, dataset.width))
+
+        self.epsg = headers[0][1]
+        pixel_size_col = headers[0][2].a
+        pixel_size_row = headers[0][2].e
+        for filename, epsg, transform, _, _ in headers:
+            if epsg != self.epsg:
+                raise ValueError(f"DTM tile {filename} epsg {epsg} differs from mosaic epsg {self.epsg}")
+            if (transform.a, transform.b, transform.d, transform.e) != (pixel_size_col, 0.0, 0.0, pixel_size_row):
+                raise ValueError(f"DTM tile {filename} pixel size differs from mosaic one")
+
+        # tiles origins in pixels of the first tile grid, signs of pixel sizes are taken into account
+        first_transform = headers[0][2]
+        offsets = []
+        for filename, _, transform, _, _ in headers:
+            row_offset = (transform.f - first_transform.f) / pixel_size_row
+            col_offset = (transform.c - first_transform.c) / pixel_size_col
+            if max(abs(row_offset - round(row_offset)), abs(col_offset - round(col_offset))) > _GRID_TOLERANCE:
+                raise ValueError(f"DTM tile {filename} is not on the mosaic grid")
+            offsets.append((int(round(row_offset)), int(round(col_offset))))
+        row_min = min(row_offset for row_offset, _ in offsets)
+        col_min = min(col_offset for _, col_offset in offsets)
+
+        self.tiles = [
+            DTMTile(filename, row_offset - row_min, col_offset - col_min, height, width)
+            for (filename, _, _, height, width), (row_offset, col_offset) in zip(headers, offsets)
+        ]
+        self.nb_rows = max(tile.row_offset + tile.nb_rows for tile in self.tiles)
+        self.nb_columns = max(tile.col_offset + tile.nb_columns for tile in self.tiles)
+        self.transform = first_transform * Affine.translation(col_min, row_min)
+        self.trans_inv = ~self.transform  # pylint: disable=invalid-unary-operand-type
+
+        self.tiles_alt_min = {}
+        self.tiles_alt_max = {}
+        self.nb_tile_reads = 0
+        self._tiles_cache = OrderedDict()
+
+    def tiles_in_window(self, row_min, col_min, row_max, col_max):
+        """
+        Tiles intersecting a mosaic window
+
+        :param row_min: window first row
+        :type row_min: int
+        :param col_min: window first column
+        :type col_min: int
+        :param row_max: window last row + 1
+        :type row_max: int
+        :param col_max: window last column + 1
+        :type col_max: int
+        :return: tiles intersecting the window
+        :rtype: list of DTMTile
+        """
+        return [
+            tile
+            for tile in self.tiles
+            if tile.row_offset < row_max
+            and tile.row_offset + tile.nb_rows > row_min
+            and tile.col_offset < col_max
+            and tile.col_offset + tile.nb_columns > col_min
+        ]
+
+    def read_tile(self, tile):
+        """
+        Tile altitudes read by dtm_reader (filled, geoid corrected), from the tiles cache if possible
+
+        :param tile: mosaic tile
+        :type tile: DTMTile
+        :return: tile altitudes
+        :rtype: np.ndarray
+        """
+        if tile.filename in self._tiles_cache:
+            self._tiles_cache.move_to_end(tile.filename)
+            return self._tiles_cache[tile.filename]
+
+        dtm_image = dtm_reader(
+            tile.filename, self.geoid_filename, fill_nodata=self.fill_nodata, fill_value=self.fill_value
+        )
+        self.nb_tile_reads += 1
+        alt_data = dtm_image.alt_data
+        self.tiles_alt_min[tile.filename] = alt_data.min()
+        self.tiles_alt_max[tile.filename] = alt_data.max()
+
+        self._tiles_cache[tile.filename] = alt_data
+        while len(self._tiles_cache) > self.cache_size:
+            self._tiles_cache.popitem(last=False)
+        return alt_data
+
+    def read_window(self, row_min, col_min, row_max, col_max):
+        """
+        Altitudes of a mosaic window, assembled from the tiles intersecting it
+
+        :param row_min: window first row
+        :type row_min: int
+        :param col_min: window first column
+        :type col_min: int
+        :param row_max: window last row + 1
+        :type row_max: int
+        :param col_max: window last column + 1
+        :type col_max: int
+        :return: window altitudes
+        :rtype: np.ndarray
+        """
+        alt_data = np.full((row_max - row_min, col_max - col_min), np.nan)
+        tiles = self.tiles_in_window(row_min, col_min, row_max, col_max)
+        for tile in tiles:
+            tile_alt_data = self.read_tile(tile)
+            first_row = max(row_min, tile.row_offset)
+            first_col = max(col_min, tile.col_offset)
+            last_row = min(row_max, tile.row_offset + tile.nb_rows)
+            last_col = min(col_max, tile.col_offset + tile.nb_columns)
+            alt_data[first_row - row_min : last_row - row_min, first_col - col_min : last_col - col_min] = (
+                tile_alt_data[
+                    first_row - tile.row_offset : last_row - tile.row_offset,
+                    first_col - tile.col_offset : last_col - tile.col_offset,
+                ]
+            )
+
+        outside = np.isnan(alt_data)
+        if np.any(outside):
+            fill_value = self.fill_value
+            if fill_value is None:
+                fill_value = min(self.tiles_alt_min[tile.filename] for tile in tiles) if tiles else 0.0
+            logging.info("Shareloc DTMMosaic: %d pixels outside tiles, fill with %f", np.sum(outside), fill_value)
+            alt_data[outside] = fill_value
+        return alt_data
+
+    def roi_to_window(self, roi, roi_is_in_physical_space=True, margin=1):
+        """
+        Mosaic window containing a region of interest
+
+        :param roi: region of interest [row_min,col_min,row_max,col_max] or [y_min,x_min,y_max,x_max] if
+            roi_is_in_physical_space activated
+        :type roi: list
+        :param roi_is_in_physical_space: roi value in physical space
+        :type roi_is_in_physical_space: bool
+        :param margin: number of pixels added around the region of interest
+        :type margin: int
+        :return: window [row_min, col_min, row_max, col_max], clipped to the mosaic
+        :rtype: list
+        """
+        if roi_is_in_physical_space:
+            rows, cols = transform_physical_point_to_index(
+                self.trans_inv, np.array([roi[0], roi[0], roi[2], roi[2]]), np.array([roi[1], roi[3], roi[1], roi[3]])
+            )
+        else:
+            rows = np.array([roi[0], roi[2]], dtype=np.float64)
+            cols = np.array([roi[1], roi[3]], dtype=np.float64)
+        row_min = max(int(np.floor(rows.min())) - margin, 0)
+        col_min = max(int(np.floor(cols.min())) - margin, 0)
+        row_max = min(int(np.ceil(rows.max())) + 1 + margin, self.nb_rows)
+        col_max = min(int(np.ceil(cols.max())) + 1 + margin, self.nb_columns)
+        if row_min >= row_max or col_min >= col_max:
+            raise ValueError(f"roi {roi} is outside the DTM mosaic")
+        return [row_min, col_min, row_max, col_max]
+
+    def alt_min_max(self, roi, roi_is_in_physical_space=True):
+        """
+        Altitudes min/max of the tiles intersecting a region of interest, tiles are read only if not known yet.
+        If the region of interest is not fully covered by tiles (gaps between tiles), fill value is included,
+        see read_window.
+
+        :param roi: region of interest, see roi_to_window
+        :type roi: list
+        :param roi_is_in_physical_space: roi value in physical space
+        :type roi_is_in_physical_space: bool
+        :return: altitudes min and max
+        :rtype: tuple(float, float)
+        """
+        row_min, col_min, row_max, col_max = self.roi_to_window(roi, roi_is_in_physical_space, margin=0)
+        tiles = self.tiles_in_window(row_min, col_min, row_max, col_max)
+        covered = np.zeros((row_max - row_min, col_max - col_min), dtype=bool)
+        for tile in tiles:
+            if tile.filename not in self.tiles_alt_min:
+                self.read_tile(tile)
+            covered[
+                max(tile.row_offset - row_min, 0) : tile.row_offset + tile.nb_rows - row_min,
+                max(tile.col_offset - col_min, 0) : tile.col_offset + tile.nb_columns - col_min,
+            ] = True
+
+        alt_min = [self.tiles_alt_min[tile.filename] for tile in tiles]
+        alt_max = [self.tiles_alt_max[tile.filename] for tile in tiles]
+        if not np.all(covered) and (self.fill_value is not None or not tiles):
+            fill_value = self.fill_value if self.fill_value is not None else 0.0
+            alt_min.append(fill_value)
+            alt_max.append(fill_value)
+        return min(alt_min), max(alt_max)
+
+    def get_dtm(self, roi, roi_is_in_physical_space=True, margin=1, cpp=True):
+        """
+        DTMIntersection on the mosaic window containing a region of interest, across tiles borders
+
+        :param roi: region of interest, see roi_to_window
+        :type roi: list
+        :param roi_is_in_physical_space: roi value in physical space
+        :type roi_is_in_physical_space: bool
+        :param margin: number of pixels added around the region of interest
+        :type margin: int
+        :param cpp: True for a C++ DTMIntersection, False for a python one
+        :type cpp: bool
+        :return: DTM of the window
+        :rtype: bindings_cpp.DTMIntersection or shareloc.geofunctions.dtm_intersection.DTMIntersection
+        """
+        row_min, col_min, row_max, col_max = self.roi_to_window(roi, roi_is_in_physical_space, margin)
+        alt_data = self.read_window(row_min, col_min, row_max, col_max)
+        transform = self.transform * Affine.translation(col_min, row_min)
+        dtm_class = bindings_cpp.DTMIntersection if cpp else DTMIntersection
+        return dtm_class(self.epsg, alt_data, row_max - row_min, col_max - col_min, transform.to_gdal())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains functions to predict epipolar disparity ranges from rectification grids
+and an altitude envelope (DTM or altitude interval)
+"""
+
+# Standard imports
+import numbers
+import os
+from ast import literal_eval
+from typing import List, Tuple, Union
+
+# Third party imports
+import numpy as np
+from affine import Affine
+from numba import config, njit, prange, types
+
+# Shareloc imports
+import bindings_cpp
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+from shareloc.geofunctions.localization import coloc
+from shareloc.geofunctions.rectification_grid import REGULAR_GRID_INTERPOLATORS, regular_grid_interpolation
+from shareloc.geomodels.geomodel_template import GeoModelTemplate
+from shareloc.proj_utils import coordinates_conversion, transform_physical_point_to_index
+
+# Set numba type of threading layer before parallel target compilation
+config.THREADING_LAYER = "omp"
+
+
+def coloc_at_altitudes(
+    geom_model_1: GeoModelTemplate, geom_model_2: GeoModelTemplate, row: np.ndarray, col: np.ndarray, alt: np.ndarray
+) -> np.ndarray:
+    """
+    Colocalization of sensor positions, each one at its own altitude.
+    RPC models localize all points in one call, other models (grids) use one call per altitude value.
+
+    :param geom_model_1: geometric model of the input positions
+    :type geom_model_1: GeoModelTemplate
+    :param geom_model_2: geometric model of the output positions
+    :type geom_model_2: GeoModelTemplate
+    :param row: sensor rows
+    :type row: 1D np.ndarray
+    :param col: sensor cols
+    :type col: 1D np.ndarray
+    :param alt: altitudes
+    :type alt: 1D np.ndarray
+    :return: sensor positions in geom_model_2, (nb points, [row, col, alt])
+    :rtype: 2D np.ndarray
+    """
+    if geom_model_1.type in ["RPC", "RPCoptim"]:
+        return np.stack(coloc(geom_model_1, geom_model_2, row, col, alt), axis=1)
+
+    positions = np.empty((row.size, 3), dtype=np.float64)
+    for value in np.unique(alt):
+        points = alt == value
+        positions[points] = np.stack(coloc(geom_model_1, geom_model_2, row[points], col[points], float(value)), axis=1)
+    return positions
+
+
+def epipolar_tiles_node_ranges(
+    epipolar_size: List[int], tile_size: int, grid_shape: Tuple[int, int], epi_step: float, margin: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute, for each row (resp. column) of tiles, the range of grid nodes surrounding the tile pixels.
+    Tiles are the ones of shareloc.raster_utils.image_tiles().
+
+    :param epipolar_size: epipolar image size [nb_rows, nb_cols]
+    :type epipolar_size: List[int]
+    :param tile_size: tile size in pixels
+    :type tile_size: int
+    :param grid_shape: number of grid nodes (nb_rows, nb_cols)
+    :type grid_shape: Tuple[int, int]
+    :param epi_step: epipolar step
+    :type epi_step: float
+    :param margin: margin of the rectification grid (in grid pixels)
+    :type margin: int
+    :return: first and last (included) node index of each tiles row and tiles column, (nb tiles, 2) arrays
+    :rtype: Tuple(np.ndarray, np.ndarray)
+    """
+    ranges = []
+    for size, nb_nodes in zip(epipolar_size, grid_shape):
+        first_pixel = np.arange(0, size, tile_size)
+        last_pixel = np.minimum(first_pixel + tile_size, size) - 1
+        first_node = np.clip(np.floor(first_pixel / epi_step).astype(int) + margin, 0, nb_nodes - 1)
+        last_node = np.clip(np.ceil(last_pixel / epi_step).astype(int) + margin, 0, nb_nodes - 1)
+        ranges.append(np.stack((first_node, last_node), axis=1))
+    return ranges[0], ranges[1]
+
+
+@njit(
+    # altitudes may be a read only view of C++ DTMIntersection data
+    types.void(
+        types.Array(types.float64, 2, "C", readonly=True),
+        types.int64[::1],
+        types.int64[::1],
+        types.int64[::1],
+        types.int64[::1],
+        types.float64[::1],
+        types.float64[::1],
+    ),
+    parallel=literal_eval(os.environ.get("SHARELOC_NUMBA_PARALLEL", "True")),
+    nogil=True,
+    cache=True,
+)
+def windows_alt_min_max(alt_data, row_min, row_max, col_min, col_max, alt_min, alt_max):
+    """
+    Altitude minimum and maximum of DTM windows, NaN altitudes are ignored.
+    Windows without finite altitude keep alt_min and alt_max input values.
+
+    :param alt_data: DTM altitudes
+    :type alt_data: 2D np.ndarray
+    :param row_min: first row of each window
+    :type row_min: 1D np.ndarray
+    :param row_max: last row + 1 of each window
+    :type row_max: 1D np.ndarray
+    :param col_min: first column of each window
+    :type col_min: 1D np.ndarray
+    :param col_max: last column + 1 of each window
+    :type col_max: 1D np.ndarray
+    :param alt_min: altitude minimum of each window, modified in place
+    :type alt_min: 1D np.ndarray
+    :param alt_max: altitude maximum of each window, modified in place
+    :type alt_max: 1D np.ndarray
+    """
+    for box in prange(row_min.shape[0]):  # pylint: disable=not-an-iterable
+        window_min = np.inf
+        window_max = -np.inf
+        for row in range(row_min[box], row_max[box]):
+            for col in range(col_min[box], col_max[box]):
+                # min(value, nan) is value : NaN altitudes are ignored
+                window_min = min(window_min, alt_data[row, col])
+                window_max = max(window_max, alt_data[row, col])
+        if window_min <= window_max:
+            alt_min[box] = window_min
+            alt_max[box] = window_max
+
+
+def dtm_window_alt_min_max(
+    dtm: Union[DTMIntersection, bindings_cpp.DTMIntersection], epsg: int, ground_min: np.ndarray, ground_max: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    DTM altitude minimum and maximum inside ground boxes (one DTM cell is added around each box).
+    Boxes outside the DTM get the DTM global minimum and maximum.
+
+    :param dtm: DTM
+    :type dtm: DTMIntersection or bindings_cpp.DTMIntersection
+    :param epsg: EPSG code of the ground boxes coordinates
+    :type epsg: int
+    :param ground_min: lower corner of each box (nb boxes, [x, y])
+    :type ground_min: 2D np.ndarray
+    :param ground_max: upper corner of each box (nb boxes, [x, y])
+    :type ground_max: 2D np.ndarray
+    :return: altitude minimum and maximum of each box
+    :rtype: Tuple(1D np.ndarray, 1D np.ndarray)
+    """
+    if isinstance(dtm, DTMIntersection):
+        alt_data = dtm.alt_data
+    else:
+        alt_data = np.reshape(np.asarray(dtm.get_alt_data()), (dtm.get_nb_rows(), dtm.get_nb_columns()))
+    transform = dtm.get_transform()
+    if not isinstance(transform, Affine):
+        transform = Affine.from_gdal(*transform)
+
+    # box corners in DTM index
+    corners = np.concatenate(
+        [
+            np.stack((ground_min[:, 0], ground_min[:, 1]), axis=1),
+            np.stack((ground_min[:, 0], ground_max[:, 1]), axis=1),
+            np.stack((ground_max[:, 0], ground_min[:, 1]), axis=1),
+            np.stack((ground_max[:, 0], ground_max[:, 1]), axis=1),
+        ]
+    )
+    if epsg != dtm.get_epsg():
+        corners = coordinates_conversion(corners, epsg, dtm.get_epsg())
+    rows, cols = transform_physical_point_to_index(~transform, corners[:, 1], corners[:, 0])
+    rows = np.reshape(rows, (4, -1))
+    cols = np.reshape(cols, (4, -1))
+    row_min = np.clip(np.floor(np.min(rows, axis=0)).astype(np.int64) - 1, 0, alt_data.shape[0])
+    row_max = np.clip(np.ceil(np.max(rows, axis=0)).astype(np.int64) + 2, 0, alt_data.shape[0])
+    col_min = np.clip(np.floor(np.min(cols, axis=0)).astype(np.int64) - 1, 0, alt_data.shape[1])
+    col_max = np.clip(np.ceil(np.max(cols, axis=0)).astype(np.int64) + 2, 0, alt_data.shape[1])
+
+    alt_min = np.full(ground_min.shape[0], dtm.get_alt_min())
+    alt_max = np.full(ground_min.shape[0], dtm.get_alt_max())
+    windows_alt_min_max(
+        np.ascontiguousarray(alt_data, dtype=np.float64), row_min, row_max, col_min, col_max, alt_min, alt_max
+    )
+    return alt_min, alt_max
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+def compute_tiles_disparity_range(
+    geom_model_left: GeoModelTemplate,
+    geom_model_right: GeoModelTemplate,
+    left_grid: np.ndarray,
+    right_grid: np.ndarray,
+    epi_step: float,
+    epipolar_size: List[int],
+    elevation: Union[DTMIntersection, bindings_cpp.DTMIntersection, Tuple[float, float], float],
+    tile_size: int = 512,
+    margin: int = 0,
+    is_displacement_grid: bool = False,
+    disparity_margin: float = 1.0,
+) -> np.ndarray:
+    """
+    Predict the disparity interval of each epipolar tile.
+
+    For each tile, the altitude envelope is the DTM minimum and maximum under the ground footprint of the tile
+    (line of sight of the surrounding grid nodes between DTM global minimum and maximum),
+    or the given altitude interval. Left sensor positions of the grid nodes surrounding the tile are
+    colocalized in the right image at both envelope altitudes (all tiles in one vectorized colocalization),
+    then converted to right epipolar coordinates by inverting the bilinear right grid.
+    Disparity is right epipolar column minus left epipolar column.
+
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeoModelTemplate
+    :param left_grid: left epipolar grid (nb_rows, nb_cols, [row, col, altitude])
+    :type left_grid: np.ndarray
+    :param right_grid: right epipolar grid (nb_rows, nb_cols, [row, col, altitude])
+    :type right_grid: np.ndarray
+    :param epi_step: epipolar step of the grids
+    :type epi_step: float
+    :param epipolar_size: epipolar image size [nb_rows, nb_cols]
+    :type epipolar_size: List[int]
+    :param elevation: DTM, or altitude interval (alt_min, alt_max), or altitude
+    :type elevation: DTMIntersection, bindings_cpp.DTMIntersection, Tuple[float, float] or float
+    :param tile_size: tile size in pixels, tiles are the ones of shareloc.raster_utils.image_tiles()
+    :type tile_size: int
+    :param margin: margin of the rectification grids (in grid pixels)
+    :type margin: int
+    :param is_displacement_grid: True if grids are displacement grids
+    :type is_displacement_grid: bool
+    :param disparity_margin: margin added on both sides of each disparity interval (in pixels)
+    :type disparity_margin: float
+    :return: disparity [min, max] of each tile, (nb tiles rows, nb tiles cols, 2)
+    :rtype: np.ndarray
+    """
+    nb_rows, nb_cols = left_grid.shape[0], left_grid.shape[1]
+
+    # epipolar position (in epipolar image pixels) of the grid nodes
+    epi_rows = (np.arange(nb_rows, dtype=np.float64) - margin) * epi_step
+    epi_cols = (np.arange(nb_cols, dtype=np.float64) - margin) * epi_step
+    left_positions = np.array(left_grid[:, :, 0:2], dtype=np.float64)
+    right_positions = np.array(right_grid[:, :, 0:2], dtype=np.float64)
+    if is_displacement_grid:
+        # same node position convention as positions_to_displacement_grid
+        nodes_rows, nodes_cols = np.meshgrid(
+            np.arange(nb_rows) * float(epi_step), np.arange(nb_cols) * float(epi_step), indexing="ij"
+        )
+        for positions in [left_positions, right_positions]:
+            positions[:, :, 0] += nodes_rows
+            positions[:, :, 1] += nodes_cols
+
+    # nodes surrounding each tile
+    row_ranges, col_ranges = epipolar_tiles_node_ranges(epipolar_size, tile_size, (nb_rows, nb_cols), epi_step, margin)
+    nb_tiles = row_ranges.shape[0] * col_ranges.shape[0]
+    tiles_nodes = []
+    for first_row, last_row in row_ranges:
+        for first_col, last_col in col_ranges:
+            node_rows, node_cols = np.meshgrid(
+                np.arange(first_row, last_row + 1), np.arange(first_col, last_col + 1), indexing="ij"
+            )
+            tiles_nodes.append(np.ravel_multi_index((node_rows.ravel(), node_cols.ravel()), (nb_rows, nb_cols)))
+    tiles_start = np.cumsum([0] + [nodes.size for nodes in tiles_nodes[:-1]])
+    tiles_nodes = np.concatenate(tiles_nodes)
+    left_flat = np.reshape(left_positions, (-1, 2))[tiles_nodes]
+
+    # altitude envelope of each tile
+    if isinstance(elevation, (DTMIntersection, bindings_cpp.DTMIntersection)):
+        ground = np.concatenate(
+            [
+                geom_model_left.direct_loc_h(left_flat[:, 0], left_flat[:, 1], elevation.get_alt_min())[:, 0:2],
+                geom_model_left.direct_loc_h(left_flat[:, 0], left_flat[:, 1], elevation.get_alt_max())[:, 0:2],
+            ],
+            axis=1,
+        )
+        ground_min = np.stack(
+            (
+                np.fmin.reduceat(np.fmin(ground[:, 0], ground[:, 2]), tiles_start),
+                np.fmin.reduceat(np.fmin(ground[:, 1], ground[:, 3]), tiles_start),
+            ),
+            axis=1,
+        )
+        ground_max = np.stack(
+            (
+                np.fmax.reduceat(np.fmax(ground[:, 0], ground[:, 2]), tiles_start),
+                np.fmax.reduceat(np.fmax(ground[:, 1], ground[:, 3]), tiles_start),
+            ),
+            axis=1,
+        )
+        tiles_alt_min, tiles_alt_max = dtm_window_alt_min_max(elevation, geom_model_left.epsg, ground_min, ground_max)
+    elif isinstance(elevation, numbers.Real):
+        tiles_alt_min = np.full(nb_tiles, float(elevation))
+        tiles_alt_max = np.full(nb_tiles, float(elevation))
+    else:
+        tiles_alt_min = np.full(nb_tiles, float(min(elevation)))
+        tiles_alt_max = np.full(nb_tiles, float(max(elevation)))
+
+    # right sensor positions of the tiles nodes at both envelope altitudes
+    tiles_index = np.repeat(np.arange(nb_tiles), np.diff(np.append(tiles_start, tiles_nodes.size)))
+    sensor_right = coloc_at_altitudes(
+        geom_model_left,
+        geom_model_right,
+        np.tile(left_flat[:, 0], 2),
+        np.tile(left_flat[:, 1], 2),
+        np.concatenate((tiles_alt_min[tiles_index], tiles_alt_max[tiles_index])),
+    )
+
+    # right epipolar positions : Newton inversion of the bilinear right grid, started from the left node position
+    node_epi = np.stack(np.meshgrid(epi_rows, epi_cols, indexing="ij"), axis=-1)
+    node_epi = np.tile(np.reshape(node_epi, (-1, 2))[tiles_nodes], (2, 1))
+    jacobian = np.stack(np.gradient(right_positions, epi_step, axis=(0, 1)), axis=-1)
+    jacobian = np.tile(np.reshape(jacobian, (-1, 2, 2))[tiles_nodes], (2, 1, 1))
+    inverse_jacobian = np.linalg.inv(jacobian)
+    grid = np.ascontiguousarray(np.transpose(right_positions, (1, 0, 2)))
+    right_epi = np.copy(node_epi)
+    for _ in range(4):
+        estimated = regular_grid_interpolation(
+            grid,
+            np.ascontiguousarray(right_epi[:, ::-1]),
+            epi_cols[0],
+            epi_rows[0],
+            float(epi_step),
+            float(epi_step),
+            REGULAR_GRID_INTERPOLATORS["linear"],
+        )
+        right_epi -= np.einsum("nij,nj->ni", inverse_jacobian, estimated - sensor_right[:, 0:2])
+
+    disparity = right_epi[:, 1] - node_epi[:, 1]
+    nb_pairs = tiles_nodes.size
+    disparity_min = np.fmin.reduceat(np.fmin(disparity[:nb_pairs], disparity[nb_pairs:]), tiles_start)
+    disparity_max = np.fmax.reduceat(np.fmax(disparity[:nb_pairs], disparity[nb_pairs:]), tiles_start)
+    disparity_min -= disparity_margin
+    disparity_max += disparity_margin
+
+    return np.reshape(
+        np.stack((np.floor(disparity_min), np.ceil(disparity_max)), axis=1),
+        (row_ranges.shape[0], col_ranges.shape[0], 2),
+    )
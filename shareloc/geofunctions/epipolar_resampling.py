@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains functions to resample sensor images in epipolar geometry using rectification grids
+"""
+
+# Standard imports
+import math
+import os
+import threading
+from ast import literal_eval
+from typing import List, Tuple, Union
+
+# Third party imports
+import numpy as np
+from numba import config, njit, prange
+from rasterio.windows import Window
+
+# Shareloc imports
+from shareloc.geofunctions.rectification_grid import RectificationGrid, cubic_kernel, load_rectification_grid
+from shareloc.image import Image
+from shareloc.proj_utils import transform_physical_point_to_index
+from shareloc.raster_utils import write_tiled_geotiff
+
+# Set numba type of threading layer before parallel target compilation
+config.THREADING_LAYER = "omp"
+
+# image interpolation kernels computed by resample_window
+RESAMPLING_INTERPOLATORS = {"bilinear": 0, "bicubic": 1}
+
+# number of pixels needed around a position by each kernel
+_KERNEL_RADIUS = {"bilinear": 1, "bicubic": 2}
+
+
+@njit(
+    "f8[:,:,:](f8[:,:,::1], f8[:,::1], f8[:,::1], i8)",
+    parallel=literal_eval(os.environ.get("SHARELOC_NUMBA_PARALLEL", "True")),
+    nogil=True,
+    cache=True,
+)
+def resample_window(window, rows, cols, method):
+    """
+    Interpolate an image window at fractional positions using numba.
+    Bilinear interpolation is used for method 0, bicubic (Keys kernel) for method 1.
+    Positions whose kernel support is not fully inside the window, and nan positions, are set to nan.
+    nan values of the window are propagated.
+
+    :param window: image window (nb_bands, nb_rows, nb_cols)
+    :type window: 3D np.array dtype np.float 64
+    :param rows: row positions in window index (pixel centers at integer values), (out_rows, out_cols)
+    :type rows: 2D np.array dtype np.float 64
+    :param cols: col positions in window index (pixel centers at integer values), (out_rows, out_cols)
+    :type cols: 2D np.array dtype np.float 64
+    :param method: 0 for bilinear, 1 for bicubic
+    :type method: int 64
+    :return: interpolated values (nb_bands, out_rows, out_cols)
+    :rtype: 3D np.array dtype np.float 64
+    """
+    nb_bands = window.shape[0]
+    nb_rows = window.shape[1]
+    nb_cols = window.shape[2]
+    out = np.full((nb_bands, rows.shape[0], rows.shape[1]), np.nan)
+    radius = 1 + method
+
+    # pylint: disable=not-an-iterable
+    for i in prange(rows.shape[0]):
+        for j in range(rows.shape[1]):
+            row = rows[i, j]
+            col = cols[i, j]
+            if np.isnan(row) or np.isnan(col):
+                continue
+            idx_row = int(math.floor(row))
+            idx_col = int(math.floor(col))
+            if idx_row - radius + 1 < 0 or idx_col - radius + 1 < 0:
+                continue
+            if idx_row + radius >= nb_rows or idx_col + radius >= nb_cols:
+                continue
+            drow = row - idx_row
+            dcol = col - idx_col
+            for band in range(nb_bands):
+                value = 0.0
+                if method == 1:
+                    for k in range(-1, 3):
+                        weight_row = cubic_kernel(drow - k)
+                        for m in range(-1, 3):
+                            value += weight_row * cubic_kernel(dcol - m) * window[band, idx_row + k, idx_col + m]
+                else:
+                    top = (1.0 - dcol) * window[band, idx_row, idx_col] + dcol * window[band, idx_row, idx_col + 1]
+                    bottom = (1.0 - dcol) * window[band, idx_row + 1, idx_col] + dcol * window[
+                        band, idx_row + 1, idx_col + 1
+                    ]
+                    value = (1.0 - drow) * top + drow * bottom
+                out[band, i, j] = value
+
+    return out
+
+
+def tile_sensor_positions(image: Image, grid: RectificationGrid, tile: Window) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute sensor image index of each pixel of an epipolar tile.
+    Epipolar pixel (row, col) is at position [col, row] of the rectification grid.
+
+    :param image: sensor image
+    :type image: shareloc.image.Image
+    :param grid: rectification grid of the sensor image
+    :type grid: RectificationGrid
+    :param tile: epipolar tile window
+    :type tile: rasterio.windows.Window
+    :return: sensor rows and cols index, 2D np.ndarray of tile shape
+    :rtype: Tuple(np.ndarray, np.ndarray)
+    """
+    epi_rows, epi_cols = np.mgrid[
+        tile.row_off : tile.row_off + tile.height, tile.col_off : tile.col_off + tile.width
+    ].astype(np.float64)
+    positions = grid.interpolate(np.stack((epi_cols.ravel(), epi_rows.ravel()), axis=1))
+    rows, cols = transform_physical_point_to_index(image.trans_inv, positions[:, 1], positions[:, 0])
+    return np.reshape(rows, (tile.height, tile.width)), np.reshape(cols, (tile.height, tile.width))
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+def resample_epipolar_image(
+    image: Image,
+    grid: Union[str, RectificationGrid],
+    output_filename: str,
+    epipolar_size: List[int],
+    interpolator: str = "bicubic",
+    tile_size: int = 512,
+    nb_workers: int = 1,
+    is_displacement_grid: bool = False,
+    nodata: float = np.nan,
+):
+    """
+    Resample a sensor image in epipolar geometry, tile by tile.
+    For each epipolar tile, the rectification grid is interpolated to get sensor positions,
+    the sensor image window covering these positions is read through image dataset,
+    and the window is interpolated with resample_window.
+    Tiles are processed by a thread pool and written to a float32 GeoTIFF as they complete.
+    At most 2 * nb_workers tiles are in memory at the same time.
+
+    :param image: sensor image (data are not needed)
+    :type image: shareloc.image.Image
+    :param grid: rectification grid of the sensor image, or grid filename
+    :type grid: str or RectificationGrid
+    :param output_filename: output epipolar image filename
+    :type output_filename: str
+    :param epipolar_size: epipolar image size [nb_rows, nb_cols]
+        (rectified image size returned by compute_stereorectification_epipolar_grids)
+    :type epipolar_size: List[int]
+    :param interpolator: image interpolator, "bilinear" or "bicubic"
+    :type interpolator: str
+    :param tile_size: tile size in pixels, multiple of 16
+    :type tile_size: int
+    :param nb_workers: number of threads
+    :type nb_workers: int
+    :param is_displacement_grid: True if grid filename is a displacement grid
+    :type is_displacement_grid: bool
+    :param nodata: output value of epipolar pixels outside the sensor image or interpolated from sensor nodata
+    :type nodata: float
+    """
+    if interpolator not in RESAMPLING_INTERPOLATORS:
+        raise ValueError(f"interpolator {interpolator} is not available, use one of {list(RESAMPLING_INTERPOLATORS)}")
+    if tile_size % 16 != 0:
+        raise ValueError(f"tile size {tile_size} must be a multiple of 16")
+
+    grid = load_rectification_grid(grid, is_displacement_grid, "linear")
+    dataset = image.dataset
+    radius = _KERNEL_RADIUS[interpolator]
+
+    # image index to dataset index offset (image may be a dataset region of interest)
+    col_offset, row_offset = ~dataset.transform * (image.transform.c, image.transform.f)
+    col_offset, row_offset = int(round(col_offset)), int(round(row_offset))
+    read_lock = threading.Lock()
+
+    def resample_tile(tile):
+        """
+        Resample one epipolar tile
+        """
+        rows, cols = tile_sensor_positions(image, grid, tile)
+        rows += row_offset
+        cols += col_offset
+
+        out = np.full((dataset.count, tile.height, tile.width), np.nan)
+        valid = np.isfinite(rows) & np.isfinite(cols)
+        if np.any(valid):
+            row_min = max(int(math.floor(np.min(rows[valid]))) - radius, 0)
+            col_min = max(int(math.floor(np.min(cols[valid]))) - radius, 0)
+            row_max = min(int(math.ceil(np.max(rows[valid]))) + radius + 1, dataset.height)
+            col_max = min(int(math.ceil(np.max(cols[valid]))) + radius + 1, dataset.width)
+            if row_max > row_min and col_max > col_min:
+                sensor_window = Window(col_min, row_min, col_max - col_min, row_max - row_min)
+                with read_lock:
+                    window = dataset.read(window=sensor_window, out_dtype=np.float64)
+                if dataset.nodata is not None:
+                    window[window == dataset.nodata] = np.nan
+                out = resample_window(
+                    np.ascontiguousarray(window),
+                    np.ascontiguousarray(rows - row_min),
+                    np.ascontiguousarray(cols - col_min),
+                    RESAMPLING_INTERPOLATORS[interpolator],
+                )
+        out[np.isnan(out)] = nodata
+        return out.astype(np.float32)
+
+    profile = {
+        "driver": "GTiff",
+        "dtype": np.float32,
+        "width": epipolar_size[1],
+        "height": epipolar_size[0],
+        "count": dataset.count,
+        "nodata": nodata,
+    }
+    write_tiled_geotiff(output_filename, profile, resample_tile, tile_size, nb_workers)
@@ -29,6 +29,7 @@ import numbers
 
 # Third party imports
 import numpy as np
+from affine import Affine
 
 # Shareloc imports
 from shareloc.proj_utils import (
@@ -44,7 +45,8 @@ class Localization:
     Underlying model can be both multi layer localization grids or RPCs models
     """
 
-    def __init__(self, model, elevation=None, image=None, epsg=None):
+    # pylint: disable=too-many-arguments
+    def __init__(self, model, elevation=None, image=None, epsg=None, dtm_strategy="ray_march"):
         """
         Localization constructor
 
@@ -56,7 +58,14 @@ class Localization:
         :type image: shareloc.image.Image
         :param epsg: coordinate system of world points, if None model coordiante system will be used
         :type epsg: int
+        :param dtm_strategy: direct localization on dtm, "ray_march" (model.direct_loc_dtm) or "height_iteration"
+            (see direct_loc_dtm_height_iteration, RPC models only)
+        :type dtm_strategy: str
         """
+        if dtm_strategy not in ["ray_march", "height_iteration"]:
+            raise ValueError(f"Localization: unknown dtm strategy {dtm_strategy}")
+        if dtm_strategy == "height_iteration" and model.type not in ["RPC", "RPCoptim"]:
+            raise ValueError("Localization: height_iteration dtm strategy is available for RPC models only")
         self.use_rpc = model.type in ["RPC", "RPCoptim"]
         self.model = model
         self.default_elevation = 0.0
@@ -67,6 +76,11 @@ class Localization:
             self.dtm = elevation
         self.image = image
         self.epsg = epsg
+        # lines of sight altitude bounds on the DTM (RPC models), computed at each direct localization if None
+        self.los_alt_bounds = None
+        self.dtm_strategy = dtm_strategy
+        # number of points localized by each path of the last height iteration direct localization on the DTM
+        self.dtm_strategy_counts = None
 
     def direct(self, row, col, h=None, using_geotransform=False):
         """
@@ -90,7 +104,12 @@ class Localization:
             coords = self.model.direct_loc_h(row, col, h)
             epsg = self.model.epsg
         elif self.dtm is not None:
-            coords = self.model.direct_loc_dtm(row, col, self.dtm)
+            if self.dtm_strategy == "height_iteration":
+                coords, self.dtm_strategy_counts = direct_loc_dtm_height_iteration(self.model, row, col, self.dtm)
+            elif self.los_alt_bounds is not None:
+                coords = self.model.direct_loc_dtm(row, col, self.dtm, los_alt_bounds=self.los_alt_bounds)
+            else:
+                coords = self.model.direct_loc_dtm(row, col, self.dtm)
             epsg = self.dtm.get_epsg()
         else:
             coords = self.model.direct_loc_h(row, col, self.default_elevation)
@@ -166,6 +185,126 @@ class Localization:
         return row, col, h
 
 
+class LocalizationContext:
+    """
+    Localization functions prepared once for repeated calls with the same models and elevation.
+    Invariants of each (model, elevation) pair are computed at construction : lines of sight altitude bounds
+    on the DTM (RPC models, including the DTM to model altitude offset) and inverse localization predictor
+    of model 2 (grid models). Direct and inverse localizations use model 1, colocalization goes from model 1 to model 2.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self, model1, model2=None, elevation=None, image1=None, image2=None, epsg=None, dtm_strategy="ray_march"
+    ):
+        """
+        LocalizationContext constructor
+
+        :param model1: geometric model 1
+        :type model1: GeomodelTemplate
+        :param model2: geometric model 2, needed by coloc only
+        :type model2: GeomodelTemplate
+        :param elevation: dtm or default elevation over ellipsoid if None elevation is set to 0
+        :type elevation: shareloc.dtm or float or np.ndarray
+        :param image1: image class to handle geotransform of model 1
+        :type image1: shareloc.image.Image
+        :param image2: image class to handle geotransform of model 2
+        :type image2: shareloc.image.Image
+        :param epsg: coordinate system of world points of direct and inverse, if None model 1 one is used
+        :type epsg: int
+        :param dtm_strategy: direct localization on dtm with model 1, see Localization
+        :type dtm_strategy: str
+        """
+        self.localization1 = Localization(model1, elevation, image=image1, epsg=epsg, dtm_strategy=dtm_strategy)
+        self.localization2 = None
+        if model2 is not None:
+            self.localization2 = Localization(model2, elevation, image=image2)
+
+        # direct localizations on the DTM are done with model 1 only
+        if self.localization1.dtm is not None and hasattr(model1, "get_dtm_los_alt_bounds"):
+            self.localization1.los_alt_bounds = model1.get_dtm_los_alt_bounds(self.localization1.dtm)
+        # inverse localization predictor of model 2 (grid models), model 1 one is estimated at its first inverse
+        if (
+            self.localization2 is not None
+            and not self.localization2.use_rpc
+            and self.localization2.model.pred_ofset_scale_lon is None
+        ):
+            self.localization2.model.estimate_inverse_loc_predictor()
+
+    def direct(self, row, col, h=None, using_geotransform=False):
+        """
+        direct localization with model 1
+
+        :param row: sensor row
+        :type row: float or 1D np.ndarray
+        :param col: sensor col
+        :type col: float or 1D np.ndarray
+        :param h: altitude, if none elevation is used
+        :type h: float or 1D np.ndarray
+        :param using_geotransform: using_geotransform
+        :type using_geotransform: boolean
+        :return coordinates: [lon,lat,h] (2D np.array)
+        :rtype: np.ndarray of 2D dimension
+        """
+        return self.localization1.direct(row, col, h, using_geotransform)
+
+    def inverse(self, lon, lat, h=None, using_geotransform=False):
+        """
+        inverse localization with model 1
+
+        :param lon: longitude (or x)
+        :type lon: float or 1D np.ndarray
+        :param lat: latitude (or y)
+        :type lat: float or 1D np.ndarray
+        :param h: altitude, if none default elevation is used
+        :type h: float or 1D np.ndarray
+        :param using_geotransform: using_geotransform
+        :type using_geotransform: boolean
+        :return: coordinates [row,col,h] (1D np.ndarray)
+        :rtype: Tuple(1D np.ndarray row position, 1D np.ndarray col position, 1D np.ndarray alt)
+        """
+        return self.localization1.inverse(lon, lat, h, using_geotransform)
+
+    def coloc(self, row, col, using_geotransform=False):
+        """
+        Colocalization : direct localization with model 1, then inverse localization with model 2
+
+        :param row: sensor row
+        :type row: int or 1D numpy array
+        :param col: sensor col
+        :type col: int or 1D numpy array
+        :param using_geotransform: using_geotransform
+        :type using_geotransform: boolean
+        :return: Corresponding sensor position [row, col, altitude] in the geometric model 2
+        :rtype: Tuple(1D np.array row position, 1D np.array col position, 1D np.array alt)
+           using row and col input dimensions
+        """
+        if self.localization2 is None:
+            raise ValueError("coloc: model2 is not set in localization context")
+
+        # Standardize row and col inputs in ndarray
+        if not isinstance(row, (list, np.ndarray)):
+            row = np.array([row])
+            col = np.array([col])
+
+        # Check row and col
+        if row.shape[0] != col.shape[0]:
+            raise ValueError("coloc: row and col inputs sizes are not similar")
+        # get input row or col shape for ndarray output shape.
+        output_shape = row.shape[0]
+
+        # Direct loc on (row, col) with model 1
+        ground_coord = self.localization1.direct(row, col, using_geotransform=using_geotransform)
+
+        # Estimate sensor position (row, col, altitude) using inverse localization with model2
+        sensor_coord = np.zeros((output_shape, 3), dtype=np.float64)
+        sensor_coord[:, 0], sensor_coord[:, 1], sensor_coord[:, 2] = self.localization2.inverse(
+            ground_coord[:, 0], ground_coord[:, 1], ground_coord[:, 2], using_geotransform
+        )
+
+        return sensor_coord[:, 0], sensor_coord[:, 1], sensor_coord[:, 2]
+
+
 def coloc(model1, model2, row, col, elevation=None, image1=None, image2=None, using_geotransform=False):
     """
     Colocalization : direct localization with model1, then inverse localization with model2
@@ -190,28 +329,154 @@ def coloc(model1, model2, row, col, elevation=None, image1=None, image2=None, us
     :rtype: Tuple(1D np.array row position, 1D np.array col position, 1D np.array alt)
        using row and col input dimensions
     """
+    return LocalizationContext(model1, model2, elevation, image1, image2).coloc(row, col, using_geotransform)
+
+
+def coloc_two_altitudes(model1, model2, row, col, alt_first, alt_second):
+    """
+    Colocalization of the same sensor positions at two altitudes in one pass :
+    direct localization with model1 at both altitudes, then one inverse localization with model2.
+    Models providing direct_loc_h_two_altitudes (RPC) warm start the second direct localization
+    from the first one.
+
+    :param model1: geometric model 1
+    :type model1: GeomodelTemplate
+    :param model2: geometric model 2
+    :type model2: GeomodelTemplate
+    :param row: sensor row
+    :type row: float or 1D numpy array
+    :param col: sensor col
+    :type col: float or 1D numpy array
+    :param alt_first: first altitude
+    :type alt_first: float or 1D numpy array
+    :param alt_second: second altitude
+    :type alt_second: float or 1D numpy array
+    :return: Corresponding sensor positions [row, col, altitude] in the geometric model 2 at both altitudes
+    :rtype: Tuple(2D np.array (nb points, [row, col, altitude]), 2D np.array (nb points, [row, col, altitude]))
+    """
     # Standardize row and col inputs in ndarray
     if not isinstance(row, (list, np.ndarray)):
         row = np.array([row])
         col = np.array([col])
+    row = np.asarray(row, dtype=np.float64)
+    col = np.asarray(col, dtype=np.float64)
 
     # Check row and col
     if row.shape[0] != col.shape[0]:
-        raise ValueError("coloc: row and col inputs sizes are not similar")
-    # get input row or col shape for ndarray output shape.
-    output_shape = row.shape[0]
+        raise ValueError("coloc_two_altitudes: row and col inputs sizes are not similar")
+    nb_points = row.shape[0]
+    alt_first = np.broadcast_to(np.asarray(alt_first, dtype=np.float64), row.shape)
+    alt_second = np.broadcast_to(np.asarray(alt_second, dtype=np.float64), row.shape)
 
-    # prepare geomodel 1 and 2
-    geometric_model1 = Localization(model1, elevation, image=image1)
-    geometric_model2 = Localization(model2, elevation, image=image2)
+    # Direct loc on (row, col) with model 1 at both altitudes
+    if hasattr(model1, "direct_loc_h_two_altitudes"):
+        ground_first, ground_second = model1.direct_loc_h_two_altitudes(row, col, alt_first, alt_second)
+    else:
+        # one call per altitude : some models (grids) only use the first value of an altitude array
+        ground_first = model1.direct_loc_h(row, col, alt_first)
+        ground_second = model1.direct_loc_h(row, col, alt_second)
+    ground_coord = np.concatenate((ground_first, ground_second))
 
-    # Direct loc on (row, col) with model 1
-    ground_coord = geometric_model1.direct(row, col, using_geotransform=using_geotransform)
-
-    # Estimate sensor position (row, col, altitude) using inverse localization with model2
-    sensor_coord = np.zeros((output_shape, 3), dtype=np.float64)
-    sensor_coord[:, 0], sensor_coord[:, 1], sensor_coord[:, 2] = geometric_model2.inverse(
-        ground_coord[:, 0], ground_coord[:, 1], ground_coord[:, 2], using_geotransform
+    # Estimate sensor positions (row, col, altitude) using one inverse localization with model2
+    sensor_coord = np.zeros((2 * nb_points, 3), dtype=np.float64)
+    sensor_coord[:, 0], sensor_coord[:, 1], sensor_coord[:, 2] = Localization(model2).inverse(
+        ground_coord[:, 0], ground_coord[:, 1], ground_coord[:, 2]
     )
 
-    return sensor_coord[:, 0], sensor_coord[:, 1], sensor_coord[:, 2]
+    return sensor_coord[:nb_points], sensor_coord[nb_points:]
+
+
+# pylint: disable=too-many-locals
+def direct_loc_dtm_height_iteration(model, row, col, dtm, max_iterations=5, tolerance=0.01, max_check_samples=64):
+    """
+    Direct localization on dtm by height iteration, for gentle terrain : h_{k+1} = DTM(direct_loc_h(row, col, h_k)),
+    starting from the dtm mid altitude. A converged point is kept if its line of sight, sampled every half dtm cell
+    up to the dtm maximum altitude, stays above the terrain. Points not converged after max_iterations, outside the dtm,
+    occluded or whose line of sight footprint needs more than max_check_samples samples are localized by
+    model.direct_loc_dtm (dtm ray march).
+
+    :param model: geometric model, its direct_loc_h must handle one altitude per point (RPC models)
+    :type model: GeomodelTemplate
+    :param row: sensor row
+    :type row: float or 1D np.ndarray
+    :param col: sensor col
+    :type col: float or 1D np.ndarray
+    :param dtm: dtm intersection model
+    :type dtm: shareloc.geofunctions.dtm_intersection or bindings_cpp.DTMIntersection
+    :param max_iterations: maximum number of height iterations
+    :type max_iterations: int
+    :param tolerance: convergence and occlusion tolerance on heights, in meters
+    :type tolerance: float
+    :param max_check_samples: maximum number of occlusion check samples of a line of sight
+    :type max_check_samples: int
+    :return: ground positions (lon,lat,h) in dtm coordinates system, and number of points localized
+        by each path ("height_iteration", "ray_march")
+    :rtype: Tuple(np.ndarray (N,3), dict)
+    """
+    row = np.atleast_1d(np.asarray(row, dtype=np.float64))
+    col = np.atleast_1d(np.asarray(col, dtype=np.float64))
+    dtm_epsg = dtm.get_epsg()
+
+    def to_dtm(positions):
+        if model.epsg == dtm_epsg:
+            return positions
+        return coordinates_conversion(positions, model.epsg, dtm_epsg)
+
+    coords = np.full((row.size, 3), np.nan)
+    height = np.full(row.size, (dtm.get_alt_min() + dtm.get_alt_max()) / 2.0)
+    converged = np.zeros(row.size, dtype=bool)
+    index = np.flatnonzero(np.isfinite(row) & np.isfinite(col))
+    valid = index
+    for _ in range(max_iterations):
+        if index.size == 0:
+            break
+        ground = np.atleast_2d(model.direct_loc_h(row[index], col[index], height[index]))
+        ground_dtm = to_dtm(ground)
+        dtm_height = dtm.interpolate_n(ground_dtm)
+        # terrain altitude in the model altitude system
+        new_height = dtm_height + ground[:, 2] - ground_dtm[:, 2]
+        done = np.abs(new_height - height[index]) < tolerance
+        coords[index[done], :2] = ground_dtm[done, :2]
+        coords[index[done], 2] = dtm_height[done]
+        converged[index[done]] = True
+        height[index] = new_height
+        index = index[np.isfinite(new_height) & ~done]
+
+    # occlusion check : line of sight between the converged point and the dtm top, in dtm coordinates
+    index = np.flatnonzero(converged)
+    if index.size > 0:
+        top_height = height[index] + dtm.get_alt_max() + tolerance - coords[index, 2]
+        top_dtm = to_dtm(np.atleast_2d(model.direct_loc_h(row[index], col[index], top_height)))
+        transform = dtm.get_transform()
+        if not isinstance(transform, Affine):
+            transform = Affine.from_gdal(*transform)
+        span = np.maximum(
+            np.abs(top_dtm[:, 0] - coords[index, 0]) / abs(transform.a),
+            np.abs(top_dtm[:, 1] - coords[index, 1]) / abs(transform.e),
+        )
+        nb_samples = np.ceil(2.0 * span).astype(np.int64) + 1
+        too_long = nb_samples > max_check_samples
+        converged[index[too_long]] = False
+        index, top_dtm, nb_samples = index[~too_long], top_dtm[~too_long], nb_samples[~too_long]
+
+        sample_point = np.repeat(np.arange(index.size), nb_samples)
+        first_sample = np.cumsum(nb_samples) - nb_samples
+        ratio = (np.arange(sample_point.size) - first_sample[sample_point] + 1.0) / nb_samples[sample_point]
+        samples = coords[index[sample_point]] + ratio[:, np.newaxis] * (
+            top_dtm[sample_point] - coords[index[sample_point]]
+        )
+        above = dtm.interpolate_n(samples) > samples[:, 2] + tolerance
+        occluded = np.zeros(index.size, dtype=bool)
+        np.logical_or.at(occluded, sample_point, above)
+        converged[index[occluded]] = False
+
+    ray_march = valid[~converged[valid]]
+    if ray_march.size > 0:
+        coords[ray_march] = model.direct_loc_dtm(row[ray_march], col[ray_march], dtm)
+    nb_height_iteration = int(np.count_nonzero(converged))
+    logging.debug(
+        "direct localization on dtm : %d points by height iteration, %d by ray march",
+        nb_height_iteration,
+        ray_march.size,
+    )
+    return coords, {"height_iteration": nb_height_iteration, "ray_march": int(ray_march.size)}
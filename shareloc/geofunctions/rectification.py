@@ -24,21 +24,32 @@ This module contains functions to generate stereo-rectification epipolar grids
 
 # Standard imports
 import math
-from typing import List, Tuple, Union
+import numbers
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple, Union
 
 # Third party imports
 import numpy as np
 import rasterio
 from affine import Affine
 
+import bindings_cpp
 from shareloc.geofunctions.dtm_intersection import DTMIntersection
-from shareloc.geofunctions.localization import Localization, coloc
+from shareloc.geofunctions.localization import Localization, LocalizationContext, coloc, coloc_two_altitudes
+from shareloc.geofunctions.rectification_cache import (
+    epipolar_grids_cache_key,
+    load_epipolar_grids,
+    save_epipolar_grids,
+)
+from shareloc.geofunctions.rectification_coarse_to_fine import densify_epipolar_grids, refine_densified_epipolar_grids
 from shareloc.geomodels.geomodel_template import GeoModelTemplate
 
 # Shareloc imports
 from shareloc.image import Image
 from shareloc.proj_utils import transform_index_to_physical_point
 
+RECTIFICATION_BACKENDS = ["auto", "python", "cpp"]
+
 
 def write_epipolar_grid(grid: np.ndarray, filename: str, geotransform: Affine, xy_convention: bool = True):
     """
@@ -114,7 +125,9 @@ def compute_epipolar_angle(end_line, start_line):
     return alpha
 
 
-def compute_local_epipolar_line(geom_model_left, geom_model_right, left_point, elevation, elevation_offset):
+def compute_local_epipolar_line(
+    geom_model_left, geom_model_right, left_point, elevation, elevation_offset, localization_context=None
+):
     """
     Estimate the beginning and the ending of local epipolar line in left image
 
@@ -129,6 +142,8 @@ def compute_local_epipolar_line(geom_model_left, geom_model_right, left_point, e
     :type elevation: shareloc.dtm or float
     :param elevation_offset: elevation difference used to estimate the local tangent
     :type elevation_offset: float
+    :param localization_context: left to right localization context on elevation, reused between calls
+    :type localization_context: LocalizationContext
     :return: Coordinates of the beginning and the ending of local epipolar line in the left image
     :rtype: Tuple(1D np.array [row, col, altitude], 1D numpy array [row, col, altitude])
             or Tuple(2D np.array (nb points, [row, col, altitude]), 2D np.array (nb points, [row, col, altitude]))
@@ -138,24 +153,23 @@ def compute_local_epipolar_line(geom_model_left, geom_model_right, left_point, e
         left_point = np.expand_dims(left_point, axis=0)
 
     # Right correspondent of the left coordinates
+    if localization_context is None:
+        localization_context = LocalizationContext(geom_model_left, geom_model_right, elevation)
     right_corr = np.zeros((left_point.shape[0], 3))
-    right_corr[:, 0], right_corr[:, 1], right_corr[:, 2] = coloc(
-        geom_model_left, geom_model_right, left_point[:, 0], left_point[:, 1], elevation
+    right_corr[:, 0], right_corr[:, 1], right_corr[:, 2] = localization_context.coloc(
+        left_point[:, 0], left_point[:, 1]
     )
     ground_elev = np.array(right_corr[:, 2])
 
-    # Find the beginning of the epipolar line in the left image, using right correspondent at lower elevation
-    right_corr[:, 2] = ground_elev - elevation_offset
-    epi_line_start = np.zeros((left_point.shape[0], 3))
-    epi_line_start[:, 0], epi_line_start[:, 1], epi_line_start[:, 2] = coloc(
-        geom_model_right, geom_model_left, right_corr[:, 0], right_corr[:, 1], right_corr[:, 2]
-    )
-
-    # Find the ending of the epipolar line in the left image, using right correspondent at higher elevation
-    right_corr[:, 2] = ground_elev + elevation_offset
-    epi_line_end = np.zeros((left_point.shape[0], 3))
-    epi_line_end[:, 0], epi_line_end[:, 1], epi_line_end[:, 2] = coloc(
-        geom_model_right, geom_model_left, right_corr[:, 0], right_corr[:, 1], right_corr[:, 2]
+    # Find the beginning and the ending of the epipolar line in the left image,
+    # using right correspondent at lower and higher elevation
+    epi_line_start, epi_line_end = coloc_two_altitudes(
+        geom_model_right,
+        geom_model_left,
+        right_corr[:, 0],
+        right_corr[:, 1],
+        ground_elev - elevation_offset,
+        ground_elev + elevation_offset,
     )
 
     return epi_line_start, epi_line_end
@@ -345,7 +359,7 @@ def moving_along_axis(
     geom_model_right: GeoModelTemplate,
     current_coords: np.ndarray,
     spacing: float,
-    elevation: Union[float, DTMIntersection],
+    elevation: Union[float, DTMIntersection, LocalizationContext],
     epi_step: int,
     epi_angles: np.ndarray,
     axis: int,
@@ -363,8 +377,8 @@ def moving_along_axis(
         or 2D numpy array (number rows in epipolar geometry, [row, col, altitude])
     :param spacing: image spacing along axis dimension (in general mean image spacing)
     :type spacing: float
-    :param elevation: elevation
-    :type elevation: shareloc.dtm or float
+    :param elevation: elevation, or left to right localization context on elevation reused between calls
+    :type elevation: shareloc.dtm or float or LocalizationContext
     :param epi_step: epipolar step
     :type epi_step: int
     :param epi_angles: epipolar angle
@@ -390,10 +404,11 @@ def moving_along_axis(
     next_left[:, 1] += unit_vector_along_epi_x
 
     # Find the corresponding next pixels in the right image
+    localization_context = elevation
+    if not isinstance(localization_context, LocalizationContext):
+        localization_context = LocalizationContext(geom_model_left, geom_model_right, elevation)
     next_right = np.zeros(next_left.shape, dtype=next_left.dtype)
-    next_right[:, 0], next_right[:, 1], next_right[:, 2] = coloc(
-        geom_model_left, geom_model_right, next_left[:, 0], next_left[:, 1], elevation
-    )
+    next_right[:, 0], next_right[:, 1], next_right[:, 2] = localization_context.coloc(next_left[:, 0], next_left[:, 1])
 
     return next_left, next_right
 
@@ -478,12 +493,15 @@ def compute_strip_of_epipolar_grid(
     if current_left_point.ndim == 1:
         current_left_point = current_left_point[np.newaxis, :]
 
+    # left to right colocalization invariants are computed once for the whole strip
+    localization_context = LocalizationContext(geom_model_left, geom_model_right, elevation)
+
     # if epipolar angles is not given as input we first compute the epipolar direction, otherwise
     # we consider that baseline ratio has been already computed thus already_computed_ratio index is updated
     if epipolar_angles is None:
         already_computed_ratio = 0.0
         local_epi_start, local_epi_end = compute_local_epipolar_line(
-            geom_model_left, geom_model_right, current_left_point, elevation, elevation_offset
+            geom_model_left, geom_model_right, current_left_point, elevation, elevation_offset, localization_context
         )
 
         epipolar_angles = compute_epipolar_angle(local_epi_end, local_epi_start)
@@ -510,11 +528,18 @@ def compute_strip_of_epipolar_grid(
     # 5/ compute and increment the baseline ratio
     for point in range(1, strip_size):
         current_left_point, current_right_point = moving_along_axis(
-            geom_model_left, geom_model_right, current_left_point, spacing, elevation, epi_step, epipolar_angles, axis
+            geom_model_left,
+            geom_model_right,
+            current_left_point,
+            spacing,
+            localization_context,
+            epi_step,
+            epipolar_angles,
+            axis,
         )
 
         local_epi_start, local_epi_end = compute_local_epipolar_line(
-            geom_model_left, geom_model_right, current_left_point, elevation, elevation_offset
+            geom_model_left, geom_model_right, current_left_point, elevation, elevation_offset, localization_context
         )
 
         epipolar_angles = compute_epipolar_angle(local_epi_end, local_epi_start)
@@ -541,6 +566,92 @@ def compute_strip_of_epipolar_grid(
     return left_grid, right_grid, epi_angles_out, mean_baseline_ratio
 
 
+# pylint: disable=too-many-arguments
+def compute_strip_of_epipolar_grid_by_row_blocks(
+    geom_model_left: GeoModelTemplate,
+    geom_model_right: GeoModelTemplate,
+    left_positions_point: np.ndarray,
+    right_positions_point: np.ndarray,
+    spacing: float,
+    strip_size: int,
+    epi_step: int = 1,
+    elevation: Union[float, DTMIntersection] = 0.0,
+    elevation_offset: float = 50.0,
+    epipolar_angles: np.ndarray = None,
+    nb_workers: int = 1,
+    strip_function: Callable = compute_strip_of_epipolar_grid,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    Compute a strip of epipolar grid along lines (axis = 1) by splitting the input rows into independent blocks
+    processed by a thread pool. Each grid row only depends on its first node, so the result is the same as
+    a single call to strip_function. Threads only run concurrently if strip_function releases the GIL, which is the
+    case of bindings_cpp.compute_strip_of_epipolar_grid.
+
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeomodelTemplate
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeomodelTemplate
+    :param left_positions_point: array of size (rows,1,3) containing positions for left points
+    :type left_positions_point: np.ndarray
+    :param right_positions_point: array of size (rows,1,3) containing positions for right points
+    :type right_positions_point: np.ndarray
+    :param spacing: image spacing along axis dimension (in general mean image spacing)
+    :type spacing: float
+    :param strip_size: desired size of grid along lines
+    :type strip_size: int
+    :param epi_step: epipolar grid sampling step
+    :type epi_step: int
+    :param elevation: elevation
+    :type elevation: shareloc.dtm or float
+    :param elevation_offset: elevation difference used to estimate the local tangent
+    :type elevation_offset: float
+    :param epipolar_angles: 2D array (rows,1) containing epipolar angles of input positions
+    :type epipolar_angles: np.ndarray
+    :param nb_workers: number of threads, input rows are split in nb_workers blocks
+    :type nb_workers: int
+    :param strip_function: strip computation function,
+        compute_strip_of_epipolar_grid or bindings_cpp.compute_strip_of_epipolar_grid
+    :type strip_function: Callable
+    :return: same outputs as compute_strip_of_epipolar_grid with axis = 1
+    :rtype: Tuple
+    """
+    nb_rows = left_positions_point.shape[0]
+    blocks = [block for block in np.array_split(np.arange(nb_rows), max(1, min(nb_workers, nb_rows))) if block.size]
+
+    def compute_block(block):
+        """
+        Compute the strip of a block of rows
+        """
+        block_slice = slice(block[0], block[-1] + 1)
+        return strip_function(
+            geom_model_left,
+            geom_model_right,
+            np.copy(left_positions_point[block_slice]),
+            np.copy(right_positions_point[block_slice]),
+            spacing,
+            1,
+            strip_size,
+            epi_step,
+            elevation,
+            elevation_offset,
+            None if epipolar_angles is None else np.copy(epipolar_angles[block_slice]),
+        )
+
+    with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+        results = list(executor.map(compute_block, blocks))
+
+    left_grid = np.concatenate([res[0] for res in results], axis=0)
+    right_grid = np.concatenate([res[1] for res in results], axis=0)
+    epi_angles_out = np.concatenate([res[2] for res in results], axis=0)
+
+    # Each block mean baseline ratio is computed on its own number of new nodes
+    already_computed = 0 if epipolar_angles is None else 1
+    nb_nodes = np.array([block.size * (strip_size - already_computed) for block in blocks], dtype=np.float64)
+    mean_baseline_ratio = np.sum(np.array([res[3] for res in results]) * nb_nodes) / np.sum(nb_nodes)
+
+    return left_grid, right_grid, epi_angles_out, mean_baseline_ratio
+
+
 # disable for api symmetry between left and right data
 # pylint: disable=unused-argument
 def init_inputs_rectification(
@@ -649,6 +760,346 @@ def positions_to_displacement_grid(
     return left_grid, right_grid, transform
 
 
+def select_rectification_backend(
+    geom_model_left: GeoModelTemplate,
+    geom_model_right: GeoModelTemplate,
+    elevation: Union[float, DTMIntersection, bindings_cpp.DTMIntersection],
+    epi_step: float = 1,
+    backend: str = "auto",
+) -> str:
+    """
+    Select the backend used to compute the strips of the epipolar grids.
+    The C++ backend is only available when both geometric models are RPCoptim,
+    elevation is a constant altitude or a C++ DTMIntersection and epipolar step is integral.
+
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: DTMIntersection, bindings_cpp.DTMIntersection or float
+    :param epi_step: epipolar step
+    :type epi_step: float
+    :param backend: requested backend, "auto", "python" or "cpp"
+    :type backend: str
+    :return: selected backend, "python" or "cpp"
+    :rtype: str
+    """
+    if backend not in RECTIFICATION_BACKENDS:
+        raise ValueError(f"rectification backend {backend} is not available, use one of {RECTIFICATION_BACKENDS}")
+
+    cpp_available = (
+        geom_model_left.type == "RPCoptim"
+        and geom_model_right.type == "RPCoptim"
+        and isinstance(elevation, (numbers.Real, bindings_cpp.DTMIntersection))
+        and float(epi_step).is_integer()
+    )
+
+    if backend == "cpp" and not cpp_available:
+        raise ValueError(
+            "cpp rectification backend needs RPCoptim geometric models, a float or bindings_cpp.DTMIntersection"
+            " elevation and an integral epipolar step"
+        )
+    if backend == "auto":
+        backend = "cpp" if cpp_available else "python"
+    return backend
+
+
+def select_strip_function(
+    geom_model_left: GeoModelTemplate,
+    geom_model_right: GeoModelTemplate,
+    elevation: Union[float, DTMIntersection, bindings_cpp.DTMIntersection],
+    epi_step: float = 1,
+    backend: str = "auto",
+) -> Tuple[Callable, Union[float, int], Union[float, DTMIntersection, bindings_cpp.DTMIntersection]]:
+    """
+    Select the strip computation function of the backend given by select_rectification_backend,
+    and convert its epipolar step and elevation arguments
+
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: DTMIntersection, bindings_cpp.DTMIntersection or float
+    :param epi_step: epipolar step
+    :type epi_step: float
+    :param backend: requested backend, "auto", "python" or "cpp"
+    :type backend: str
+    :return: strip function, epipolar step and elevation arguments of the strip function
+    :rtype: Tuple(Callable, float or int, DTMIntersection or float)
+    """
+    if select_rectification_backend(geom_model_left, geom_model_right, elevation, epi_step, backend) == "cpp":
+        if isinstance(elevation, numbers.Real):
+            elevation = float(elevation)
+        return bindings_cpp.compute_strip_of_epipolar_grid, int(epi_step), elevation
+    return compute_strip_of_epipolar_grid, epi_step, elevation
+
+
+# pylint: disable=too-many-arguments
+def compute_epipolar_grids_from_starting_point(
+    geom_model_left: GeoModelTemplate,
+    geom_model_right: GeoModelTemplate,
+    left_starting_point: np.ndarray,
+    right_starting_point: np.ndarray,
+    spacing: float,
+    grid_size: List[int],
+    epi_step: float = 1.0,
+    elevation: Union[float, DTMIntersection] = 0.0,
+    elevation_offset: float = 50.0,
+    backend: str = "auto",
+    nb_workers: int = 1,
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Compute epipolar positions grids from their upper-left node :
+    - compute first grid row (one vertical strip by moving along rows)
+    - compute all columns (one horizontal strip along columns), optionally by blocks of rows in parallel
+
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeoModelTemplate
+    :param left_starting_point: left upper-left node, np.ndarray of size (1,1,3)
+    :type left_starting_point: np.ndarray
+    :param right_starting_point: right upper-left node, np.ndarray of size (1,3)
+    :type right_starting_point: np.ndarray
+    :param spacing: image spacing (in general mean image spacing)
+    :type spacing: float
+    :param grid_size: grid size [nb_rows, nb_cols]
+    :type grid_size: List[int]
+    :param epi_step: epipolar step
+    :type epi_step: float
+    :param elevation: elevation
+    :type elevation: DTMIntersection or float
+    :param elevation_offset: elevation difference used to estimate the local tangent
+    :type elevation_offset: float
+    :param backend: strips computation backend, see select_rectification_backend
+    :type backend: str
+    :param nb_workers: number of threads used to compute the horizontal strip by blocks of rows
+    :type nb_workers: int
+    :return: left and right positions grids (nb_rows,nb_cols,3) and mean baseline ratio
+    :rtype: Tuple(np.ndarray, np.ndarray, float)
+    """
+    strip_function, strip_epi_step, strip_elevation = select_strip_function(
+        geom_model_left, geom_model_right, elevation, epi_step, backend
+    )
+
+    # Create the first row by moving along columns (axis = 0) with number of rows of the grids.
+    # It returns (grid_size[0],1,3) shaped grids, epipolar angles, and mean baseline ratio for the first columns.
+    left_grid, right_grid, alphas, mean_br_col = strip_function(
+        geom_model_left,
+        geom_model_right,
+        left_starting_point,
+        right_starting_point,
+        spacing,
+        0,
+        grid_size[0],
+        strip_epi_step,
+        strip_elevation,
+        elevation_offset,
+        None,
+    )
+
+    # Moving along row (axis = 1) using previous results
+    # It returns (grid_size[0],grid_size[1],3) shaped grids, epipolar angles, and mean baseline ratio
+    # for the (grid_size[0] -1 ,grid_size[1],3) positions, already computed epipolar angles
+    # are not included in mean baseline ratio.
+    if nb_workers > 1:
+        left_grid, right_grid, alphas, mean_br = compute_strip_of_epipolar_grid_by_row_blocks(
+            geom_model_left,
+            geom_model_right,
+            left_grid,
+            right_grid,
+            spacing,
+            grid_size[1],
+            strip_epi_step,
+            strip_elevation,
+            elevation_offset,
+            alphas,
+            nb_workers,
+            strip_function,
+        )
+    else:
+        left_grid, right_grid, alphas, mean_br = strip_function(
+            geom_model_left,
+            geom_model_right,
+            left_grid,
+            right_grid,
+            spacing,
+            1,
+            grid_size[1],
+            strip_epi_step,
+            strip_elevation,
+            elevation_offset,
+            alphas,
+        )
+
+    # Compute global mean baseline ratio using the two strip
+    mean_baseline_ratio = (mean_br * (grid_size[1] * (grid_size[0] - 1)) + mean_br_col * grid_size[0]) / (
+        grid_size[1] * grid_size[0]
+    )
+
+    return left_grid, right_grid, mean_baseline_ratio
+
+
+# pylint: disable=too-many-locals
+def compute_coarse_to_fine_epipolar_grids(
+    geom_model_left: GeoModelTemplate,
+    geom_model_right: GeoModelTemplate,
+    left_starting_point: np.ndarray,
+    right_starting_point: np.ndarray,
+    spacing: float,
+    grid_size: List[int],
+    epi_step: float = 1.0,
+    elevation: Union[float, DTMIntersection] = 0.0,
+    elevation_offset: float = 50.0,
+    coarse_step_factor: int = 4,
+    tolerance: float = 0.01,
+    nb_check_passes: int = 4,
+    backend: str = "auto",
+    nb_workers: int = 1,
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Compute epipolar positions grids at epi_step * coarse_step_factor, and densify them to epi_step
+    with bicubic interpolation. One coarse node is added before and after the grid in each direction
+    so that bicubic interpolation is available on the whole fine grid.
+
+    Densified grids are checked and refined by rectification_coarse_to_fine.refine_densified_epipolar_grids :
+    exact rows (control rows and wrong rows) are computed at the fine step from the exact first grid column, as in
+    compute_epipolar_grids_from_starting_point. Python strips cost is driven by their number of steps :
+    control rows cost about as much as the whole grid at the fine step with the python backend.
+
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeoModelTemplate
+    :param left_starting_point: left upper-left node of the fine grid, np.ndarray of size (1,1,3)
+    :type left_starting_point: np.ndarray
+    :param right_starting_point: right upper-left node of the fine grid, np.ndarray of size (1,3)
+    :type right_starting_point: np.ndarray
+    :param spacing: image spacing (in general mean image spacing)
+    :type spacing: float
+    :param grid_size: fine grid size [nb_rows, nb_cols]
+    :type grid_size: List[int]
+    :param epi_step: fine epipolar step
+    :type epi_step: float
+    :param elevation: elevation
+    :type elevation: DTMIntersection or float
+    :param elevation_offset: elevation difference used to estimate the local tangent
+    :type elevation_offset: float
+    :param coarse_step_factor: ratio between coarse and fine epipolar steps
+    :type coarse_step_factor: int
+    :param tolerance: maximum error of the left grid and colocalization error of the right grid (in pixels)
+    :type tolerance: float
+    :param nb_check_passes: maximum number of checks of the right positions of each coarse cell
+    :type nb_check_passes: int
+    :param backend: coarse strips computation backend, see select_rectification_backend
+    :type backend: str
+    :param nb_workers: number of threads used to compute the coarse horizontal strip by blocks of rows
+    :type nb_workers: int
+    :return: left and right positions grids (nb_rows,nb_cols,3) and mean baseline ratio of the coarse grids
+    :rtype: Tuple(np.ndarray, np.ndarray, float)
+    """
+    coarse_step = epi_step * coarse_step_factor
+
+    # Move one coarse step backward along both axis to get the coarse grid upper-left node
+    coarse_start = np.reshape(left_starting_point, (1, 3))
+    for axis in [0, 1]:
+        local_epi_start, local_epi_end = compute_local_epipolar_line(
+            geom_model_left, geom_model_right, coarse_start, elevation, elevation_offset
+        )
+        coarse_start, coarse_start_right = moving_along_axis(
+            geom_model_left,
+            geom_model_right,
+            coarse_start,
+            spacing,
+            elevation,
+            -coarse_step,
+            compute_epipolar_angle(local_epi_end, local_epi_start),
+            axis,
+        )
+
+    # fine node i is at coarse coordinate 1 + i / coarse_step_factor
+    coarse_size = [(grid_size[0] - 1) // coarse_step_factor + 4, (grid_size[1] - 1) // coarse_step_factor + 4]
+    coarse_left, coarse_right, mean_baseline_ratio = compute_epipolar_grids_from_starting_point(
+        geom_model_left,
+        geom_model_right,
+        coarse_start[np.newaxis, :, :],
+        coarse_start_right,
+        spacing,
+        coarse_size,
+        coarse_step,
+        elevation,
+        elevation_offset,
+        backend,
+        nb_workers,
+    )
+
+    left_grid, right_grid = densify_epipolar_grids(coarse_left, coarse_right, grid_size, coarse_step_factor)
+
+    # Exact first grid column, then exact rows by moving along rows at the fine step
+    strip_function, strip_epi_step, strip_elevation = select_strip_function(
+        geom_model_left, geom_model_right, elevation, epi_step, backend
+    )
+    column_left, column_right, column_alphas, _ = strip_function(
+        geom_model_left,
+        geom_model_right,
+        left_starting_point,
+        right_starting_point,
+        spacing,
+        0,
+        grid_size[0],
+        strip_epi_step,
+        strip_elevation,
+        elevation_offset,
+        None,
+    )
+
+    def compute_exact_rows(rows):
+        """
+        Replace left and right positions of grid rows by positions computed at the fine step,
+        return the left positions errors (nb rows, nb_cols)
+        """
+        rows_left, rows_right, _, _ = strip_function(
+            geom_model_left,
+            geom_model_right,
+            column_left[rows],
+            column_right[rows],
+            spacing,
+            1,
+            grid_size[1],
+            strip_epi_step,
+            strip_elevation,
+            elevation_offset,
+            column_alphas[rows],
+        )
+        nodes = (rows[:, np.newaxis] * grid_size[1] + np.arange(grid_size[1])).ravel()
+        rows_left = np.reshape(rows_left, (-1, 3))
+        errors = np.hypot(rows_left[:, 0] - left_grid[nodes, 0], rows_left[:, 1] - left_grid[nodes, 1])
+        left_grid[nodes] = rows_left
+        right_grid[nodes] = np.reshape(rows_right, (-1, 3))
+        return np.reshape(errors, (rows.size, grid_size[1]))
+
+    refine_densified_epipolar_grids(
+        geom_model_left,
+        geom_model_right,
+        elevation,
+        left_grid,
+        right_grid,
+        grid_size,
+        coarse_step_factor,
+        compute_exact_rows,
+        tolerance,
+        nb_check_passes,
+    )
+
+    return (
+        np.reshape(left_grid, (grid_size[0], grid_size[1], 3)),
+        np.reshape(right_grid, (grid_size[0], grid_size[1], 3)),
+        mean_baseline_ratio,
+    )
+
+
 # following code structure is also used in tests
 # pylint: disable=duplicate-code
 def compute_stereorectification_epipolar_grids(
@@ -661,14 +1112,24 @@ def compute_stereorectification_epipolar_grids(
     elevation_offset: float = 50.0,
     as_displacement_grid: bool = False,
     margin: int = 0,
+    backend: str = "auto",
+    nb_workers: int = 1,
+    coarse_step_factor: int = 1,
+    densification_tolerance: float = 0.01,
+    nb_check_passes: int = 4,
+    cache_dir: str = None,
 ) -> Tuple[np.ndarray, np.ndarray, List[int], float, Affine]:
     """
     Compute stereo-rectification epipolar grids. Rectification scheme is composed of :
     - rectification grid initialisation
     - compute first grid row (one vertical strip by moving along rows)
-    - compute all columns (one horizontal strip along columns)
+    - compute all columns (one horizontal strip along columns), optionally by blocks of rows in parallel
     - transform position to displacement grid
 
+    If cache_dir is given, outputs are first looked up in this on-disk cache, keyed by a hash of
+    both models, images transform, elevation and parameters (see shareloc.geofunctions.rectification_cache),
+    and stored in it after computation.
+
     :param left_im: left image
     :type left_im: shareloc Image object
     :param geom_model_left: geometric model of the left image
@@ -685,6 +1146,26 @@ def compute_stereorectification_epipolar_grids(
     :type elevation_offset: float
     :param as_displacement_grid: False: generates localisation grids, True: displacement grids
     :type as_displacement_grid: bool
+    :param margin: margin of the rectification grid (in grid pixels)
+    :type margin: int
+    :param backend: strips computation backend:
+        "python", "cpp" (bindings_cpp.compute_strip_of_epipolar_grid), or "auto" which uses "cpp"
+        when both models are RPCoptim and elevation is a float or a bindings_cpp.DTMIntersection, "python" otherwise
+    :type backend: str
+    :param nb_workers: number of threads used to compute the horizontal strip by blocks of rows.
+        Speedup is only expected with the "cpp" backend which releases the GIL.
+    :type nb_workers: int
+    :param coarse_step_factor: if greater than 1, grids are computed at epi_step * coarse_step_factor
+        and densified with bicubic interpolation (see compute_coarse_to_fine_epipolar_grids)
+    :type coarse_step_factor: int
+    :param densification_tolerance: maximum left grid error and right grid colocalization error (in pixels)
+        for coarse to fine mode
+    :type densification_tolerance: float
+    :param nb_check_passes: maximum number of random checks of each coarse cell in coarse to fine mode
+    :type nb_check_passes: int
+    :param cache_dir: epipolar grids cache directory, no cache if None.
+        Its size is bounded by rectification_cache.EPIPOLAR_GRIDS_CACHE_MAX_SIZE bytes.
+    :type cache_dir: str
     :return:
         Returns left and right epipolar displacement/localisation  grid,
         epipolar image size, mean of base to height ratio
@@ -700,6 +1181,30 @@ def compute_stereorectification_epipolar_grids(
         - epipolar grid geotransform, Affine
     :rtype: Tuple(np.ndarray, np.ndarray, List[int], float, Affine)
     """
+    if cache_dir is not None:
+        # nb_workers is not part of the key : blocks of rows give the same grids
+        cache_key = epipolar_grids_cache_key(
+            left_im,
+            geom_model_left,
+            right_im,
+            geom_model_right,
+            elevation,
+            {
+                "epi_step": epi_step,
+                "elevation_offset": elevation_offset,
+                "as_displacement_grid": as_displacement_grid,
+                "margin": margin,
+                "backend": select_rectification_backend(
+                    geom_model_left, geom_model_right, elevation, epi_step, backend
+                ),
+                "coarse_step_factor": coarse_step_factor,
+                "densification_tolerance": densification_tolerance if coarse_step_factor > 1 else None,
+                "nb_check_passes": nb_check_passes if coarse_step_factor > 1 else None,
+            },
+        )
+        cached_grids = load_epipolar_grids(cache_dir, cache_key)
+        if cached_grids is not None:
+            return cached_grids
 
     # Initialize rectification with sensor image starting position and epipolar image and grid information.
     (
@@ -712,46 +1217,43 @@ def compute_stereorectification_epipolar_grids(
         left_im, geom_model_left, right_im, geom_model_right, elevation, epi_step, elevation_offset, margin
     )
 
-    # Create the first row by moving along columns (axis = 0) with number of rows of the grids.
-    # It returns (grid_size[0],1,3) shaped grids, epipolar angles, and mean baseline ratio for the first columns.
-    left_grid, right_grid, alphas, mean_br_col = compute_strip_of_epipolar_grid(
-        geom_model_left,
-        geom_model_right,
-        left_starting_point,
-        right_starting_point,
-        spacing,
-        axis=0,
-        strip_size=grid_size[0],
-        epi_step=epi_step,
-        elevation=elevation,
-        elevation_offset=elevation_offset,
-    )
-
-    # Moving along row (axis = 1) using previous results
-    # It returns (grid_size[0],grid_size[1],3) shaped grids, epipolar angles, and mean baseline ratio
-    # for the (grid_size[0] -1 ,grid_size[1],3) positions, already computed epipolar angles
-    # are not included in mean baseline ratio.
-    left_grid, right_grid, alphas, mean_br = compute_strip_of_epipolar_grid(
-        geom_model_left,
-        geom_model_right,
-        left_grid,
-        right_grid,
-        spacing,
-        axis=1,
-        strip_size=grid_size[1],
-        epi_step=epi_step,
-        elevation=elevation,
-        elevation_offset=elevation_offset,
-        epipolar_angles=alphas,
-    )
-
-    # Compute global mean baseline ratio using the two strip
-    mean_baseline_ratio = (mean_br * (grid_size[1] * (grid_size[0] - 1)) + mean_br_col * grid_size[0]) / (
-        grid_size[1] * grid_size[0]
-    )
+    if coarse_step_factor > 1:
+        left_grid, right_grid, mean_baseline_ratio = compute_coarse_to_fine_epipolar_grids(
+            geom_model_left,
+            geom_model_right,
+            left_starting_point,
+            right_starting_point,
+            spacing,
+            grid_size,
+            epi_step,
+            elevation,
+            elevation_offset,
+            coarse_step_factor,
+            densification_tolerance,
+            nb_check_passes,
+            backend,
+            nb_workers,
+        )
+    else:
+        left_grid, right_grid, mean_baseline_ratio = compute_epipolar_grids_from_starting_point(
+            geom_model_left,
+            geom_model_right,
+            left_starting_point,
+            right_starting_point,
+            spacing,
+            grid_size,
+            epi_step,
+            elevation,
+            elevation_offset,
+            backend,
+            nb_workers,
+        )
 
     if as_displacement_grid:
         # Convert position to displacement grids
         left_grid, right_grid, _ = positions_to_displacement_grid(left_grid, right_grid, epi_step)
 
+    if cache_dir is not None:
+        save_epipolar_grids(cache_dir, cache_key, left_grid, right_grid, rectified_image_size, mean_baseline_ratio)
+
     return left_grid, right_grid, rectified_image_size, mean_baseline_ratio
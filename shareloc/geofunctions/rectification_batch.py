@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the batch generation of stereo-rectification epipolar grids of one left image
+with several right images, sharing left image direct localizations on the DTM
+"""
+
+# Standard imports
+import numbers
+from typing import List, Tuple, Union
+
+# Third party imports
+import numpy as np
+from affine import Affine
+
+# Shareloc imports
+from shareloc.geofunctions.dtm_intersection import DTMIntersection, interpolate_positions
+from shareloc.geofunctions.localization import coloc
+from shareloc.geofunctions.rectification import (
+    compute_epipolar_grids_from_starting_point,
+    init_inputs_rectification,
+    positions_to_displacement_grid,
+    select_rectification_backend,
+)
+from shareloc.geofunctions.visibility import lines_of_sight_visibility
+from shareloc.geomodels.geomodel_template import GeoModelTemplate
+from shareloc.image import Image
+from shareloc.proj_utils import transform_index_to_physical_point
+
+
+class CachedGroundModel(GeoModelTemplate):
+    """
+    RPC model wrapper whose direct localization on one DTM starts from intersection altitudes computed once
+    on a regular sensor grid. Interpolated altitudes are refined by height iteration along the same lines of sight
+    as the DTM walk of the wrapped model. Other localization functions are forwarded to the wrapped model.
+    Used to share left image direct localizations between several rectification pairs.
+    """
+
+    # height iteration : maximum number of iterations, convergence and occlusion tolerances (meters)
+    max_iterations = 10
+    tolerance = 1e-4
+    occlusion_tolerance = 1e-2
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, geom_model: GeoModelTemplate, dtm: DTMIntersection, extent: List[float], step: float):
+        """
+        Constructor
+
+        :param geom_model: wrapped RPC model
+        :type geom_model: GeoModelTemplate
+        :param dtm: DTM whose intersections are cached
+        :type dtm: DTMIntersection
+        :param extent: cached sensor extent [row_min, col_min, row_max, col_max] in physical coordinates
+        :type extent: List[float]
+        :param step: cached grid step in physical coordinates
+        :type step: float
+        """
+        if geom_model.type not in ["RPC", "RPCoptim"]:
+            raise ValueError("CachedGroundModel: height iteration is available for RPC models only")
+        self.geom_model = geom_model
+        self.type = geom_model.type
+        self.epsg = geom_model.epsg
+        self.dtm = dtm
+        self.step = step
+
+        rows = np.arange(extent[0], extent[2] + step, step)
+        cols = np.arange(extent[1], extent[3] + step, step)
+        grid_rows, grid_cols = np.meshgrid(rows, cols, indexing="ij")
+        ground = geom_model.direct_loc_dtm(grid_rows.ravel(), grid_cols.ravel(), dtm)
+        # intersection altitudes (nb_rows, nb_cols), nodes at pixel centers of a (col, row) geotransform
+        self.ground_heights = np.ascontiguousarray(np.reshape(ground[:, 2], grid_rows.shape), dtype=np.float64)
+        self.heights_trans_inv = ~Affine(step, 0.0, extent[1] - 0.5 * step, 0.0, step, extent[0] - 0.5 * step)
+
+    def __getattr__(self, name):
+        """
+        Forward other attributes to the wrapped model
+        """
+        return getattr(self.__dict__["geom_model"], name)
+
+    @classmethod
+    def load(cls, geomodel_path: str):
+        """
+        No-op : CachedGroundModel wraps an already loaded geometric model
+
+        :param geomodel_path: filename of geomodel
+        """
+
+    def direct_loc_h(self, row, col, alt, fill_nan=False):
+        """
+        direct localization at constant altitude of the wrapped model
+
+        :param row:  line sensor position
+        :type row: float or 1D numpy.ndarray dtype=float64
+        :param col:  column sensor position
+        :type col: float or 1D numpy.ndarray dtype=float64
+        :param alt:  altitude
+        :param fill_nan: fill numpy.nan values with lon and lat offset if true (same as OTB/OSSIM), nan is returned
+            otherwise
+        :type fill_nan: boolean
+        :return: ground position (lon,lat,h)
+        :rtype: numpy.ndarray 2D dimension with (N,3) shape, where N is number of input coordinates
+        """
+        return self.geom_model.direct_loc_h(row, col, alt, fill_nan)
+
+    def inverse_loc(self, lon, lat, alt):
+        """
+        Inverse localization of the wrapped model
+
+        :param lon: longitude position
+        :type lon: float or 1D numpy.ndarray dtype=float64
+        :param lat: latitude position
+        :type lat: float or 1D numpy.ndarray dtype=float64
+        :param alt: altitude
+        :type alt: float
+        :return: sensor position (row, col, alt)
+        :rtype: tuple(1D np.array row position, 1D np.array col position, 1D np.array alt)
+        """
+        return self.geom_model.inverse_loc(lon, lat, alt)
+
+    def direct_loc_dtm(self, row, col, dtm, los_alt_bounds=None):
+        """
+        direct localization on dtm. On the cached dtm, the line of sight between the wrapped model los_extrema
+        (as in its dtm walk) is intersected by height iteration h_{k+1} = DTM(line of sight(h_k)), starting from
+        the bilinearly interpolated cached altitudes. Converged positions must be visible along their line of sight.
+        Positions outside the cached extent, with a nan cached neighbour, not converged or occluded are computed
+        by the wrapped model.
+
+        :param row:  line sensor position
+        :type row: float or 1D numpy.ndarray dtype=float64
+        :param col:  column sensor position
+        :type col: float or 1D numpy.ndarray dtype=float64
+        :param dtm: dtm intersection model
+        :type dtm: shareloc.geofunctions.dtm_intersection
+        :param los_alt_bounds: lines of sight altitude bounds of the wrapped model (RPC), computed if None
+        :type los_alt_bounds: Tuple(float, float)
+        :return: ground position (lon,lat,h) in dtm coordinates system
+        :rtype: numpy.ndarray 2D dimension with (N,3) shape, where N is number of input coordinates
+        """
+        if los_alt_bounds is None:
+            los_alt_bounds = self.geom_model.get_dtm_los_alt_bounds(dtm)
+        if dtm is not self.dtm:
+            return self.geom_model.direct_loc_dtm(row, col, dtm, los_alt_bounds=los_alt_bounds)
+
+        row = np.atleast_1d(np.asarray(row, dtype=np.float64))
+        col = np.atleast_1d(np.asarray(col, dtype=np.float64))
+        positions = np.ascontiguousarray(np.stack([col, row], axis=1))
+        height = interpolate_positions(self.ground_heights, positions, *self.heights_trans_inv[:6])
+
+        # lines of sight (top, bottom) in dtm coordinates system
+        los = np.reshape(self.geom_model.los_extrema(row, col, *los_alt_bounds, epsg=dtm.get_epsg()), (row.size, 2, 3))
+        los_top, los_bottom = los[:, 0, :], los[:, 1, :]
+
+        ground = np.full((row.size, 3), np.nan)
+        converged = np.zeros(row.size, dtype=bool)
+        index = np.flatnonzero(np.isfinite(height))
+        for _ in range(self.max_iterations):
+            if index.size == 0:
+                break
+            ratio = (height[index] - los_top[index, 2]) / (los_bottom[index, 2] - los_top[index, 2])
+            ground[index] = los_top[index] + ratio[:, np.newaxis] * (los_bottom[index] - los_top[index])
+            dtm_height = dtm.interpolate_n(ground[index])
+            done = np.abs(dtm_height - height[index]) < self.tolerance
+            converged[index[done]] = True
+            height[index] = dtm_height
+            index = index[np.isfinite(dtm_height) & ~done]
+
+        index = np.flatnonzero(converged)
+        converged[index] = lines_of_sight_visibility(dtm, ground[index], los_top[index], self.occlusion_tolerance)
+        exact = ~converged
+        if np.any(exact):
+            ground[exact] = self.geom_model.direct_loc_dtm(row[exact], col[exact], dtm, los_alt_bounds=los_alt_bounds)
+        return ground
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+def compute_stereorectification_epipolar_grids_batch(
+    left_im: Image,
+    geom_model_left: GeoModelTemplate,
+    right_ims: List[Image],
+    geom_models_right: List[GeoModelTemplate],
+    elevation: Union[float, DTMIntersection] = 0.0,
+    epi_step: float = 1.0,
+    elevation_offset: float = 50.0,
+    as_displacement_grid: bool = False,
+    margin: int = 0,
+    ground_step: float = None,
+    backend: str = "auto",
+) -> List[Tuple[np.ndarray, np.ndarray, List[int], float]]:
+    """
+    Compute stereo-rectification epipolar grids of one left image with several right images.
+    Each pair is computed by compute_stereorectification_epipolar_grids, but when elevation is a DTM,
+    the left model is a RPC and the pair is computed by the python backend, left image intersection altitudes
+    on the DTM are computed once on a regular sensor grid (CachedGroundModel). They are interpolated for every
+    pair and refined by height iteration on the exact left lines of sight, instead of walking them through the DTM.
+    Right grids are given by the inverse localization of these left ground positions.
+    Pairs computed by the C++ backend (RPCoptim models with a C++ DTM, see select_rectification_backend)
+    do not share left localizations : C++ strips localize on the DTM themselves.
+
+    :param left_im: left image
+    :type left_im: shareloc Image object
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param right_ims: right images
+    :type right_ims: List of shareloc Image object
+    :param geom_models_right: geometric models of the right images
+    :type geom_models_right: List of GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: DTMIntersection or float
+    :param epi_step: epipolar step
+    :type epi_step: float
+    :param elevation_offset: elevation difference used to estimate the local tangent
+    :type elevation_offset: float
+    :param as_displacement_grid: False: generates localisation grids, True: displacement grids
+    :type as_displacement_grid: bool
+    :param margin: margin of the rectification grid (in grid pixels)
+    :type margin: int
+    :param ground_step: step of the cached left ground positions grid (in pixels), epi_step if None
+    :type ground_step: float
+    :param backend: strips computation backend, see select_rectification_backend
+    :type backend: str
+    :return: list of compute_stereorectification_epipolar_grids outputs, one per right image
+    :rtype: List[Tuple(np.ndarray, np.ndarray, List[int], float)]
+    """
+    if len(right_ims) != len(geom_models_right):
+        raise ValueError("compute_stereorectification_epipolar_grids_batch: right images and models sizes differ")
+
+    cached_left_model = None
+    results = []
+    for right_im, geom_model_right in zip(right_ims, geom_models_right):
+        pair_backend = select_rectification_backend(geom_model_left, geom_model_right, elevation, epi_step, backend)
+        strip_model_left = geom_model_left
+        if (
+            pair_backend == "python"
+            and not isinstance(elevation, numbers.Real)
+            and geom_model_left.type in ["RPC", "RPCoptim"]
+        ):
+            if cached_left_model is None:
+                # cache covers the left image with a margin, epipolar grid nodes outside are computed exactly
+                mean_spacing = 0.5 * (abs(left_im.pixel_size_col) + abs(left_im.pixel_size_row))
+                pad = (margin + 2) * epi_step + 0.1 * max(left_im.nb_rows, left_im.nb_columns)
+                row_min, col_min = transform_index_to_physical_point(left_im.transform, -0.5 - pad, -0.5 - pad)
+                row_max, col_max = transform_index_to_physical_point(
+                    left_im.transform, left_im.nb_rows - 0.5 + pad, left_im.nb_columns - 0.5 + pad
+                )
+                extent = [min(row_min, row_max), min(col_min, col_max), max(row_min, row_max), max(col_min, col_max)]
+                step = (epi_step if ground_step is None else ground_step) * mean_spacing
+                cached_left_model = CachedGroundModel(geom_model_left, elevation, extent, step)
+            strip_model_left = cached_left_model
+
+        left_start, right_start, spacing, grid_size, rectified_image_size = init_inputs_rectification(
+            left_im, geom_model_left, right_im, geom_model_right, elevation, epi_step, elevation_offset, margin
+        )
+        left_grid, right_grid, mean_baseline_ratio = compute_epipolar_grids_from_starting_point(
+            strip_model_left,
+            geom_model_right,
+            left_start,
+            right_start,
+            spacing,
+            grid_size,
+            epi_step,
+            elevation,
+            elevation_offset,
+            pair_backend,
+        )
+        if strip_model_left is not geom_model_left:
+            # right positions of the left nodes : cached left ground positions, inverse localized by the right model
+            right_grid = np.reshape(right_grid, (-1, 3))
+            right_grid[:, 0], right_grid[:, 1], right_grid[:, 2] = coloc(
+                strip_model_left,
+                geom_model_right,
+                np.ravel(left_grid[:, :, 0]),
+                np.ravel(left_grid[:, :, 1]),
+                elevation,
+            )
+            right_grid = np.reshape(right_grid, left_grid.shape)
+        if as_displacement_grid:
+            left_grid, right_grid, _ = positions_to_displacement_grid(left_grid, right_grid, epi_step)
+        results.append((left_grid, right_grid, rectified_image_size, mean_baseline_ratio))
+    return results
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the on-disk cache of epipolar grids computed by
+shareloc.geofunctions.rectification.compute_stereorectification_epipolar_grids().
+Entries are compressed .npz files named by a content hash of the geometric inputs.
+"""
+
+# Standard imports
+import glob
+import hashlib
+import logging
+import numbers
+import os
+import tempfile
+import zipfile
+from typing import List, Tuple, Union
+
+# Third party imports
+import numpy as np
+
+import bindings_cpp
+
+# Shareloc imports
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+
+# version of the cached data layout, part of the cache key
+EPIPOLAR_GRIDS_CACHE_VERSION = 1
+
+# maximum size in bytes of a cache directory, least recently used entries are removed above it
+EPIPOLAR_GRIDS_CACHE_MAX_SIZE = 1 << 30
+
+# fields which define the geometry of each geometric model type and DTM class : derived and lazily computed
+# attributes (inverse localization predictors, cells min/max altitudes, ...) are not part of the key
+_RPC_FIELDS = [
+    "num_col",
+    "den_col",
+    "num_row",
+    "den_row",
+    "num_x",
+    "den_x",
+    "num_y",
+    "den_y",
+    "offset_row",
+    "scale_row",
+    "offset_col",
+    "scale_col",
+    "offset_alt",
+    "scale_alt",
+    "offset_x",
+    "scale_x",
+    "offset_y",
+    "scale_y",
+    "datum",
+    "lim_extrapol",
+    "epsg",
+]
+_RPC_OPTIM_GETTERS = [
+    "get_num_col",
+    "get_den_col",
+    "get_num_row",
+    "get_den_row",
+    "get_num_lon",
+    "get_den_lon",
+    "get_num_lat",
+    "get_den_lat",
+    "get_offset_row",
+    "get_scale_row",
+    "get_offset_col",
+    "get_scale_col",
+    "get_offset_alt",
+    "get_scale_alt",
+    "get_offset_lon",
+    "get_scale_lon",
+    "get_offset_lat",
+    "get_scale_lat",
+]
+_GRID_FIELDS = [
+    "row0",
+    "col0",
+    "nbrow",
+    "nbcol",
+    "steprow",
+    "stepcol",
+    "nbalt",
+    "alts_down",
+    "lon_data",
+    "lat_data",
+    "repter",
+    "epsg",
+]
+_DTM_FIELDS = ["epsg", "alt_data", "transform"]
+_DTM_CPP_GETTERS = ["get_epsg", "get_alt_data", "get_transform", "get_nb_rows", "get_nb_columns"]
+
+
+def _fields_state(value, fields: List[str]) -> dict:
+    """
+    State of an object given by its attributes
+
+    :param value: object
+    :type value: any
+    :param fields: attributes names
+    :type fields: List[str]
+    :return: attributes values by name
+    :rtype: dict
+    """
+    return {field: getattr(value, field) for field in fields}
+
+
+def _getters_state(value, getters: List[str]) -> dict:
+    """
+    State of a C++ object given by its getters
+
+    :param value: C++ object
+    :type value: any
+    :param getters: getters names
+    :type getters: List[str]
+    :return: getters outputs by name
+    :rtype: dict
+    """
+    return {getter: getattr(value, getter)() for getter in getters}
+
+
+# geometric models state handlers, by model type
+_GEOMODEL_STATE = {
+    "RPC": lambda geom_model: _fields_state(geom_model, _RPC_FIELDS),
+    "RPCoptim": lambda geom_model: dict(_getters_state(geom_model, _RPC_OPTIM_GETTERS), epsg=geom_model.epsg),
+    "multi H grid": lambda geom_model: _fields_state(geom_model, _GRID_FIELDS),
+}
+
+
+def _geometry_state(value) -> dict:
+    """
+    Hashable state of a geometric model or an elevation : type and fields which define its geometry
+
+    :param value: geometric model, DTM or constant altitude
+    :type value: GeoModelTemplate, DTMIntersection, bindings_cpp.DTMIntersection or float
+    :return: state
+    :rtype: dict
+    """
+    if isinstance(value, numbers.Number):
+        return {"altitude": float(value)}
+    if isinstance(value, bindings_cpp.DTMIntersection):
+        return {"dtm_cpp": _getters_state(value, _DTM_CPP_GETTERS)}
+    if isinstance(value, DTMIntersection):
+        return {"dtm": _fields_state(value, _DTM_FIELDS)}
+    model_type = getattr(value, "type", None)
+    if model_type not in _GEOMODEL_STATE:
+        raise ValueError(f"epipolar grids cache does not support {type(value).__name__} geometric inputs")
+    return {model_type: _GEOMODEL_STATE[model_type](value)}
+
+
+def _update_hash(hasher, value):
+    """
+    Update a hash with the content of a value : scalars, strings, arrays, sequences and dictionaries
+
+    :param hasher: hashlib hash object
+    :type hasher: hashlib hash
+    :param value: value to hash
+    :type value: None, bool, number, str, sequence, np.ndarray or dict
+    """
+    if value is None or isinstance(value, (bool, numbers.Number, str)):
+        hasher.update(repr(value).encode())
+    elif isinstance(value, dict):
+        hasher.update(f"dict{len(value)}".encode())
+        for key in sorted(value, key=str):
+            _update_hash(hasher, str(key))
+            _update_hash(hasher, value[key])
+    else:
+        array = np.asarray(value)
+        if array.dtype.kind in "biuf":
+            hasher.update(f"array{array.dtype.str}{array.shape}".encode())
+            hasher.update(np.ascontiguousarray(array).tobytes())
+        else:
+            hasher.update(f"seq{len(value)}".encode())
+            for item in value:
+                _update_hash(hasher, item)
+
+
+def epipolar_grids_cache_key(
+    left_im,
+    geom_model_left,
+    right_im,
+    geom_model_right,
+    elevation,
+    parameters: dict,
+) -> str:
+    """
+    Compute the cache key of epipolar grids : sha256 of both models coefficients,
+    images transform and size, elevation (value or DTM content) and rectification parameters.
+
+    :param left_im: left image
+    :type left_im: shareloc Image object
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param right_im: right image
+    :type right_im: shareloc Image object
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: DTMIntersection or float
+    :param parameters: parameters which change the grids (epi_step, margin, ...)
+    :type parameters: dict
+    :return: hexadecimal key
+    :rtype: str
+    """
+    hasher = hashlib.sha256()
+    _update_hash(hasher, EPIPOLAR_GRIDS_CACHE_VERSION)
+    for image, geom_model in [(left_im, geom_model_left), (right_im, geom_model_right)]:
+        _update_hash(hasher, tuple(image.transform))
+        _update_hash(hasher, (image.nb_rows, image.nb_columns))
+        _update_hash(hasher, _geometry_state(geom_model))
+    _update_hash(hasher, _geometry_state(elevation))
+    _update_hash(hasher, parameters)
+    return hasher.hexdigest()
+
+
+def load_epipolar_grids(cache_dir: str, key: str) -> Union[Tuple[np.ndarray, np.ndarray, List[int], float], None]:
+    """
+    Load epipolar grids from the cache, and mark the entry as recently used.
+
+    :param cache_dir: cache directory
+    :type cache_dir: str
+    :param key: cache key (see epipolar_grids_cache_key)
+    :type key: str
+    :return: left grid, right grid, rectified image size, mean baseline ratio, or None if not in cache
+    :rtype: Tuple(np.ndarray, np.ndarray, List[int], float) or None
+    """
+    filename = os.path.join(cache_dir, key + ".npz")
+    if not os.path.isfile(filename):
+        return None
+    try:
+        with np.load(filename) as data:
+            grids = (
+                data["left_grid"],
+                data["right_grid"],
+                [int(size) for size in data["rectified_image_size"]],
+                float(data["mean_baseline_ratio"]),
+            )
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        logging.warning("Invalid epipolar grids cache entry %s is removed", filename)
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+        return None
+    os.utime(filename)
+    return grids
+
+
+def save_epipolar_grids(
+    cache_dir: str,
+    key: str,
+    left_grid: np.ndarray,
+    right_grid: np.ndarray,
+    rectified_image_size: List[int],
+    mean_baseline_ratio: float,
+    max_size: int = None,
+):
+    """
+    Save epipolar grids in the cache as a compressed .npz file, then remove the least recently used
+    entries while the cache directory is larger than max_size.
+    The file is written under a temporary name and renamed so that concurrent readers never see a partial entry.
+
+    :param cache_dir: cache directory, created if needed
+    :type cache_dir: str
+    :param key: cache key (see epipolar_grids_cache_key)
+    :type key: str
+    :param left_grid: left epipolar grid
+    :type left_grid: np.ndarray
+    :param right_grid: right epipolar grid
+    :type right_grid: np.ndarray
+    :param rectified_image_size: epipolar image size [nb_rows, nb_cols]
+    :type rectified_image_size: List[int]
+    :param mean_baseline_ratio: mean value of the baseline to sensor altitude ratio
+    :type mean_baseline_ratio: float
+    :param max_size: maximum cache directory size in bytes, EPIPOLAR_GRIDS_CACHE_MAX_SIZE if None
+    :type max_size: int
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    file_descriptor, tmp_filename = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+    try:
+        with os.fdopen(file_descriptor, "wb") as tmp_file:
+            np.savez_compressed(
+                tmp_file,
+                left_grid=left_grid,
+                right_grid=right_grid,
+                rectified_image_size=np.asarray(rectified_image_size, dtype=np.int64),
+                mean_baseline_ratio=np.float64(mean_baseline_ratio),
+            )
+        os.replace(tmp_filename, os.path.join(cache_dir, key + ".npz"))
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
+
+    evict_epipolar_grids(cache_dir, EPIPOLAR_GRIDS_CACHE_MAX_SIZE if max_size is None else max_size)
+
+
+def evict_epipolar_grids(cache_dir: str, max_size: int):
+    """
+    Remove the least recently used cache entries while the cache directory is larger than max_size
+
+    :param cache_dir: cache directory
+    :type cache_dir: str
+    :param max_size: maximum cache directory size in bytes
+    :type max_size: int
+    """
+    entries = []
+    for filename in glob.glob(os.path.join(cache_dir, "*.npz")):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+
+    total_size = sum(entry[1] for entry in entries)
+    for _, size, filename in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+        total_size -= size
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the densification of coarse stereo-rectification epipolar grids : bicubic interpolation
+of grids computed at a coarse step, checked against exact positions and locally refined.
+Coarse grids and exact rows are computed by shareloc.geofunctions.rectification.compute_coarse_to_fine_epipolar_grids.
+"""
+
+# Standard imports
+import logging
+from typing import Callable, List, Tuple, Union
+
+# Third party imports
+import numpy as np
+
+# Shareloc imports
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+from shareloc.geofunctions.localization import coloc
+from shareloc.geofunctions.rectification_grid import REGULAR_GRID_INTERPOLATORS, regular_grid_interpolation
+from shareloc.geomodels.geomodel_template import GeoModelTemplate
+from shareloc.math_utils import refine_lattice_cells
+
+
+def densify_epipolar_grids(
+    coarse_left: np.ndarray, coarse_right: np.ndarray, grid_size: List[int], coarse_step_factor: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bicubic densification of coarse epipolar grids. Fine node i is at coarse coordinate 1 + i / coarse_step_factor :
+    coarse grids have one node before and after the fine grid in each direction.
+
+    :param coarse_left: left coarse positions grid (nb_coarse_rows, nb_coarse_cols, 3)
+    :type coarse_left: np.ndarray
+    :param coarse_right: right coarse positions grid (nb_coarse_rows, nb_coarse_cols, 3)
+    :type coarse_right: np.ndarray
+    :param grid_size: fine grid size [nb_rows, nb_cols]
+    :type grid_size: List[int]
+    :param coarse_step_factor: ratio between coarse and fine epipolar steps
+    :type coarse_step_factor: int
+    :return: left and right fine positions (nb_rows * nb_cols, 3), row major
+    :rtype: Tuple(np.ndarray, np.ndarray)
+    """
+    # interpolated grids are (nb_cols, nb_rows, 2) with [col, row] positions
+    fine_rows, fine_cols = np.meshgrid(np.arange(grid_size[0]), np.arange(grid_size[1]), indexing="ij")
+    positions = np.stack(
+        [1.0 + fine_cols.ravel() / coarse_step_factor, 1.0 + fine_rows.ravel() / coarse_step_factor], axis=1
+    )
+    grids = [
+        coarse_left[:, :, 0:2],
+        coarse_right[:, :, 0:2],
+        np.stack([coarse_left[:, :, 2], coarse_right[:, :, 2]], axis=2),
+    ]
+    left_row_col, right_row_col, alts = [
+        regular_grid_interpolation(
+            np.ascontiguousarray(np.transpose(grid, (1, 0, 2)), dtype=np.float64),
+            positions,
+            0.0,
+            0.0,
+            1.0,
+            1.0,
+            REGULAR_GRID_INTERPOLATORS["bicubic"],
+        )
+        for grid in grids
+    ]
+    left_grid = np.stack([left_row_col[:, 0], left_row_col[:, 1], alts[:, 0]], axis=1)
+    right_grid = np.stack([right_row_col[:, 0], right_row_col[:, 1], alts[:, 1]], axis=1)
+    return left_grid, right_grid
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+def refine_densified_epipolar_grids(
+    geom_model_left: GeoModelTemplate,
+    geom_model_right: GeoModelTemplate,
+    elevation: Union[float, DTMIntersection],
+    left_grid: np.ndarray,
+    right_grid: np.ndarray,
+    grid_size: List[int],
+    coarse_step_factor: int,
+    compute_exact_rows: Callable[[np.ndarray], np.ndarray],
+    tolerance: float = 0.01,
+    nb_check_passes: int = 4,
+):
+    """
+    Check and refine densified epipolar grids, in place.
+
+    Densified left positions are checked on one random control row per row of coarse cells, computed exactly
+    by compute_exact_rows. Rows of the coarse cells (and their neighbours) where the error exceeds tolerance
+    are computed exactly.
+
+    Densified right positions of the other cells are checked against the colocalization of densified left positions
+    on one random node per coarse cell. Right positions of the coarse cells (and their neighbours)
+    where the error exceeds tolerance are computed by colocalization. Checks are repeated on the
+    remaining cells until no error is found, at most nb_check_passes times.
+
+    :param geom_model_left: geometric model of the left image
+    :type geom_model_left: GeoModelTemplate
+    :param geom_model_right: geometric model of the right image
+    :type geom_model_right: GeoModelTemplate
+    :param elevation: elevation
+    :type elevation: DTMIntersection or float
+    :param left_grid: left fine positions (nb_rows * nb_cols, 3), row major, modified in place
+    :type left_grid: np.ndarray
+    :param right_grid: right fine positions (nb_rows * nb_cols, 3), row major, modified in place
+    :type right_grid: np.ndarray
+    :param grid_size: fine grid size [nb_rows, nb_cols]
+    :type grid_size: List[int]
+    :param coarse_step_factor: ratio between coarse and fine epipolar steps
+    :type coarse_step_factor: int
+    :param compute_exact_rows: function replacing left and right positions of grid rows (1D np.ndarray)
+        by exact positions, returning the left positions errors (nb rows, nb_cols)
+    :type compute_exact_rows: Callable
+    :param tolerance: maximum error of the left grid and colocalization error of the right grid (in pixels)
+    :type tolerance: float
+    :param nb_check_passes: maximum number of checks of the right positions of each coarse cell
+    :type nb_check_passes: int
+    """
+    nb_cells = [(grid_size[0] - 1) // coarse_step_factor + 1, (grid_size[1] - 1) // coarse_step_factor + 1]
+    cell_heights = np.minimum(coarse_step_factor, grid_size[0] - np.arange(nb_cells[0]) * coarse_step_factor)
+    fine_rows, fine_cols = np.meshgrid(np.arange(grid_size[0]), np.arange(grid_size[1]), indexing="ij")
+    node_cells = (fine_rows // coarse_step_factor, fine_cols // coarse_step_factor)
+    refined_cells = np.zeros(nb_cells, dtype=bool)
+    rng = np.random.default_rng(0)
+
+    # Check densified left positions on one random control row of each row of coarse cells,
+    # wrong rows of cells and their neighbours are computed exactly.
+    control_rows = np.arange(nb_cells[0]) * coarse_step_factor + rng.integers(0, cell_heights)
+    left_errors = np.max(compute_exact_rows(control_rows), axis=1)
+    logging.debug("coarse to fine epipolar grids: max left error %f pixels", np.max(left_errors, initial=0.0))
+    wrong_cell_rows = np.zeros(nb_cells[0], dtype=bool)
+    for cell_row in np.flatnonzero(left_errors > tolerance):
+        wrong_cell_rows[max(cell_row - 1, 0) : cell_row + 2] = True
+    refined_rows = np.flatnonzero(wrong_cell_rows[fine_rows[:, 0] // coarse_step_factor])
+    refined_rows = np.setdiff1d(refined_rows, control_rows)
+    if refined_rows.size > 0:
+        logging.debug("coarse to fine epipolar grids: %d rows computed at the fine step", refined_rows.size)
+        compute_exact_rows(refined_rows)
+    refined_cells[wrong_cell_rows, :] = True
+
+    # Check densified right positions on one random node of each coarse cell not yet refined,
+    # until no error above tolerance is found. Wrong cells and their neighbours are refined.
+    def colocalize_nodes(nodes):
+        """
+        Replace right positions of nodes by the colocalization of their left positions
+        """
+        exact_right = np.stack(
+            coloc(geom_model_left, geom_model_right, left_grid[nodes, 0], left_grid[nodes, 1], elevation), axis=1
+        )
+        errors = np.hypot(exact_right[:, 0] - right_grid[nodes, 0], exact_right[:, 1] - right_grid[nodes, 1])
+        right_grid[nodes] = exact_right
+        return errors
+
+    def refine_cells(wrong_cells):
+        """
+        Colocalize the nodes of wrong cells
+        """
+        colocalize_nodes(np.flatnonzero(wrong_cells[node_cells]))
+
+    refine_lattice_cells(
+        refined_cells,
+        coarse_step_factor,
+        grid_size,
+        lambda check_rows, check_cols: colocalize_nodes(check_rows * grid_size[1] + check_cols),
+        tolerance,
+        nb_check_passes,
+        rng,
+        refine_cells,
+    )
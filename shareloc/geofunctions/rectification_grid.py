@@ -23,11 +23,31 @@ This module contains the rectification_grids class to handle CARS rectification
 """
 # pylint: disable=no-member
 
+# Standard imports
+import os
+from ast import literal_eval
+from collections import OrderedDict
+from typing import Union
+
 # Third party imports
 import numpy as np
 import rasterio as rio
+from numba import config, njit, prange
 from scipy import interpolate
 
+# Set numba type of threading layer before parallel target compilation
+config.THREADING_LAYER = "omp"
+
+# interpolators computed by shareloc numba kernels, other ones use scipy RegularGridInterpolator
+REGULAR_GRID_INTERPOLATORS = {"linear": 0, "bicubic": 1}
+
+# fastmath flags without "nnan" so that nan positions are propagated
+_FASTMATH_FLAGS = {"ninf", "nsz", "arcp", "contract", "afn", "reassoc"}
+
+# maximum number of RectificationGrid kept in memory by load_rectification_grid()
+RECTIFICATION_GRID_CACHE_SIZE = 8
+_RECTIFICATION_GRID_CACHE: OrderedDict = OrderedDict()
+
 
 class RectificationGrid:
     """
@@ -41,10 +61,12 @@ class RectificationGrid:
         :type filename: string
         :param is_displacement_grid: True if is a displacement grid
         :type is_displacement_grid: bool
-        :param interpolator: grid interpolator for scipy/interpolate.RegularGridInterpolator
+        :param interpolator: grid interpolator, "linear" and "bicubic" are computed by shareloc regular grid
+            kernels, other values are given to scipy/interpolate.RegularGridInterpolator
         :type interpolator: str
         """
         self.grid_filename = grid_filename
+        self.method = interpolator
 
         dataset = rio.open(grid_filename)
 
@@ -61,6 +83,7 @@ class RectificationGrid:
         cols = np.arange(ori_col, last_col, step_col)
         rows = np.arange(ori_row, last_row, step_row)
         self.points = (cols, rows)
+        self.transform = transform
 
         if is_displacement_grid:
             # transform dep to positions
@@ -75,13 +98,39 @@ class RectificationGrid:
             self.row_positions = dataset.read(2).transpose()
             self.col_positions = dataset.read(1).transpose()
 
-        self.interpolator = interpolate.RegularGridInterpolator(
-            self.points,
-            np.stack((self.col_positions, self.row_positions), axis=2),
-            method=interpolator,
-            bounds_error=False,
-            fill_value=None,
-        )
+        # positions stacked as (nb_cols, nb_rows, [col, row])
+        self.positions = np.ascontiguousarray(np.stack((self.col_positions, self.row_positions), axis=2), np.float64)
+
+        if interpolator in REGULAR_GRID_INTERPOLATORS:
+            self.interpolator = self.interpolate_regular_grid
+        else:
+            self.interpolator = interpolate.RegularGridInterpolator(
+                self.points,
+                self.positions,
+                method=interpolator,
+                bounds_error=False,
+                fill_value=None,
+            )
+
+    @property
+    def origin(self):
+        """
+        grid first node position
+
+        :return grid first node position (col, row)
+        :rtype  tuple
+        """
+        return self.transform * (0.5, 0.5)
+
+    @property
+    def step(self):
+        """
+        grid step
+
+        :return grid step (col, row)
+        :rtype  tuple
+        """
+        return self.transform.a, self.transform.e
 
     def get_positions(self):
         """
@@ -103,3 +152,163 @@ class RectificationGrid:
         """
 
         return self.interpolator(positions)
+
+    def interpolate_regular_grid(self, positions):
+        """
+        interpolate position using the grid regularity: cell indexes are computed from grid origin and step,
+        both channels are evaluated in one pass. Positions outside the grid are linearly extrapolated.
+
+        :param positions : positions to interpolate : array  Nx2 [col,row]
+        :type positions: np.array
+        :return interpolated positions : array  Nx2 [col,row]
+        :rtype  np.array
+        """
+        positions = np.atleast_2d(np.asarray(positions, dtype=np.float64))
+        return regular_grid_interpolation(
+            self.positions,
+            positions,
+            self.origin[0],
+            self.origin[1],
+            self.step[0],
+            self.step[1],
+            REGULAR_GRID_INTERPOLATORS[self.method],
+        )
+
+
+@njit("f8(f8)", cache=True, fastmath=True)
+def cubic_kernel(dist):
+    """
+    Keys cubic convolution kernel (a=-0.5)
+
+    :param dist: distance to the node in grid step unit
+    :type dist: float 64
+    :return: kernel weight
+    :rtype: float 64
+    """
+    dist = abs(dist)
+    if dist <= 1.0:
+        return (1.5 * dist - 2.5) * dist * dist + 1.0
+    if dist < 2.0:
+        return ((-0.5 * dist + 2.5) * dist - 4.0) * dist + 2.0
+    return 0.0
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+@njit(
+    "f8[:,:](f8[:,:,::1], f8[:,:], f8, f8, f8, f8, i8)",
+    parallel=literal_eval(os.environ.get("SHARELOC_NUMBA_PARALLEL", "True")),
+    cache=True,
+    fastmath=_FASTMATH_FLAGS,
+)
+def regular_grid_interpolation(grid, positions, ori_col, ori_row, step_col, step_row, method):
+    """
+    Interpolate a regular grid of 2D positions using numba.
+    Bilinear interpolation is used for method 0, bicubic (Keys kernel) for method 1.
+    Outside the grid, positions are linearly extrapolated from the border cells
+    (same as scipy RegularGridInterpolator with fill_value=None).
+
+    :param grid: grid values (nb_cols, nb_rows, 2)
+    :type grid: 3D np.array dtype np.float 64
+    :param positions: positions to interpolate Nx2 [col,row]
+    :type positions: 2D np.array dtype np.float 64
+    :param ori_col: column coordinate of the first node
+    :type ori_col: float 64
+    :param ori_row: row coordinate of the first node
+    :type ori_row: float 64
+    :param step_col: column step
+    :type step_col: float 64
+    :param step_row: row step
+    :type step_row: float 64
+    :param method: 0 for bilinear, 1 for bicubic
+    :type method: int 64
+    :return: interpolated values Nx2
+    :rtype: 2D np.array dtype np.float 64
+    """
+    nb_cols = grid.shape[0]
+    nb_rows = grid.shape[1]
+    nb_points = positions.shape[0]
+    out = np.empty((nb_points, 2), dtype=np.float64)
+
+    # pylint: disable=not-an-iterable
+    for i in prange(nb_points):
+        pos_col = (positions[i, 0] - ori_col) / step_col
+        pos_row = (positions[i, 1] - ori_row) / step_row
+        if np.isnan(pos_col) or np.isnan(pos_row):
+            out[i, 0] = np.nan
+            out[i, 1] = np.nan
+            continue
+
+        inside = 0.0 <= pos_col <= nb_cols - 1 and 0.0 <= pos_row <= nb_rows - 1
+        if method == 1 and inside:
+            idx_col = min(int(np.floor(pos_col)), nb_cols - 1)
+            idx_row = min(int(np.floor(pos_row)), nb_rows - 1)
+            value_col = 0.0
+            value_row = 0.0
+            for k in range(-1, 3):
+                weight_col = cubic_kernel(pos_col - (idx_col + k))
+                node_col = min(max(idx_col + k, 0), nb_cols - 1)
+                for j in range(-1, 3):
+                    weight = weight_col * cubic_kernel(pos_row - (idx_row + j))
+                    node_row = min(max(idx_row + j, 0), nb_rows - 1)
+                    value_col += weight * grid[node_col, node_row, 0]
+                    value_row += weight * grid[node_col, node_row, 1]
+            out[i, 0] = value_col
+            out[i, 1] = value_row
+        else:
+            idx_col = min(max(int(np.floor(pos_col)), 0), nb_cols - 2)
+            idx_row = min(max(int(np.floor(pos_row)), 0), nb_rows - 2)
+            dcol = pos_col - idx_col
+            drow = pos_row - idx_row
+            for channel in range(2):
+                top = (1.0 - drow) * grid[idx_col, idx_row, channel] + drow * grid[idx_col, idx_row + 1, channel]
+                bottom = (1.0 - drow) * grid[idx_col + 1, idx_row, channel] + drow * grid[
+                    idx_col + 1, idx_row + 1, channel
+                ]
+                out[i, channel] = (1.0 - dcol) * top + dcol * bottom
+
+    return out
+
+
+def load_rectification_grid(
+    grid: Union[str, RectificationGrid], is_displacement_grid: bool = False, interpolator: str = "linear"
+) -> RectificationGrid:
+    """
+    Return a RectificationGrid, reusing an already loaded one when possible.
+
+    Grids given by filename are kept in a bounded LRU cache keyed by
+    (absolute filename, modification time, is_displacement_grid, interpolator),
+    so a rewritten grid file is reloaded. A RectificationGrid instance is returned as is.
+
+    :param grid: grid filename or RectificationGrid
+    :type grid: str or RectificationGrid
+    :param is_displacement_grid: True if is a displacement grid
+    :type is_displacement_grid: bool
+    :param interpolator: grid interpolator (see RectificationGrid)
+    :type interpolator: str
+    :return: rectification grid
+    :rtype: RectificationGrid
+    """
+    if isinstance(grid, RectificationGrid):
+        return grid
+
+    grid_filename = os.path.abspath(grid)
+    key = (grid_filename, os.path.getmtime(grid_filename), is_displacement_grid, interpolator)
+
+    rectif_grid = _RECTIFICATION_GRID_CACHE.get(key)
+    if rectif_grid is None:
+        rectif_grid = RectificationGrid(grid, is_displacement_grid=is_displacement_grid, interpolator=interpolator)
+        _RECTIFICATION_GRID_CACHE[key] = rectif_grid
+        while len(_RECTIFICATION_GRID_CACHE) > max(RECTIFICATION_GRID_CACHE_SIZE, 0):
+            _RECTIFICATION_GRID_CACHE.popitem(last=False)
+    else:
+        _RECTIFICATION_GRID_CACHE.move_to_end(key)
+
+    return rectif_grid
+
+
+def clear_rectification_grid_cache():
+    """
+    Empty the RectificationGrid cache used by load_rectification_grid()
+    """
+    _RECTIFICATION_GRID_CACHE.clear()
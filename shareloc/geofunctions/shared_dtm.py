@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the DTM shared between processes : altitudes and cells min/max altitudes
+of a DTMIntersection (python or C++) are written once in a memory-mapped file, processes map it
+read only and pickling a shared DTM only transfers the file handle.
+"""
+
+# Standard imports
+import os
+import tempfile
+
+# Third party imports
+import numpy as np
+
+import bindings_cpp
+
+# Shareloc imports
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+
+# default directory of shared DTM files : memory backed file system if available
+SHARED_DTM_DIRECTORY = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+class SharedDTMHandle:
+    """
+    Picklable description of a shared DTM file
+    """
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, filename, is_cpp, epsg, nb_rows, nb_columns, transform):
+        """
+        Constructor
+
+        :param filename: shared DTM file
+        :type filename: str
+        :param is_cpp: True for a bindings_cpp.DTMIntersection, False for a python DTMIntersection
+        :type is_cpp: bool
+        :param epsg: DTM epsg code
+        :type epsg: int
+        :param nb_rows: DTM number of rows
+        :type nb_rows: int
+        :param nb_columns: DTM number of columns
+        :type nb_columns: int
+        :param transform: DTM transform, same coefficient order as GDAL's SetGeoTransform()
+        :type transform: tuple(c, a, b, f, d, e)
+        """
+        self.filename = filename
+        self.is_cpp = is_cpp
+        self.epsg = epsg
+        self.nb_rows = nb_rows
+        self.nb_columns = nb_columns
+        self.transform = transform
+
+
+class SharedCppDTMIntersection(bindings_cpp.DTMIntersection):
+    """
+    C++ DTMIntersection borrowing the memory-mapped buffers of a shared DTM, pickled as its handle
+    """
+
+    def __init__(self, handle, alt_data, alt_min_cell, alt_max_cell):
+        """
+        Constructor
+
+        :param handle: shared DTM handle
+        :type handle: SharedDTMHandle
+        :param alt_data: mapped altitudes
+        :type alt_data: np.ndarray
+        :param alt_min_cell: mapped cells min altitudes
+        :type alt_min_cell: np.ndarray
+        :param alt_max_cell: mapped cells max altitudes
+        :type alt_max_cell: np.ndarray
+        """
+        super().__init__(
+            handle.epsg,
+            alt_data,
+            handle.nb_rows,
+            handle.nb_columns,
+            handle.transform,
+            alt_min_cell,
+            alt_max_cell,
+        )
+        self.shared_handle = handle
+
+    def __reduce__(self):
+        return attach_shared_dtm, (self.shared_handle,)
+
+
+class SharedDTMIntersection(DTMIntersection):
+    """
+    Python DTMIntersection on the memory-mapped arrays of a shared DTM, pickled as its handle
+    """
+
+    def __init__(self, handle, alt_data, alt_min_cell, alt_max_cell):
+        """
+        Constructor
+
+        :param handle: shared DTM handle
+        :type handle: SharedDTMHandle
+        :param alt_data: mapped altitudes
+        :type alt_data: np.ndarray
+        :param alt_min_cell: mapped cells min altitudes
+        :type alt_min_cell: np.ndarray
+        :param alt_max_cell: mapped cells max altitudes
+        :type alt_max_cell: np.ndarray
+        """
+        super().__init__(
+            handle.epsg,
+            alt_data,
+            handle.nb_rows,
+            handle.nb_columns,
+            handle.transform,
+            alt_min_cell,
+            alt_max_cell,
+        )
+        self.shared_handle = handle
+
+    def __reduce__(self):
+        return attach_shared_dtm, (self.shared_handle,)
+
+
+def attach_shared_dtm(handle):
+    """
+    Map a shared DTM file read only and build the DTMIntersection using it without copy
+
+    :param handle: shared DTM handle
+    :type handle: SharedDTMHandle
+    :return: DTM of the kind of the shared one
+    :rtype: SharedCppDTMIntersection or SharedDTMIntersection
+    """
+    nb_points = handle.nb_rows * handle.nb_columns
+    nb_cells = (handle.nb_rows - 1) * (handle.nb_columns - 1)
+    data = np.memmap(handle.filename, dtype=np.float64, mode="r", shape=(nb_points + 2 * nb_cells,))
+    alt_data = data[:nb_points].reshape((handle.nb_rows, handle.nb_columns))
+    alt_min_cell = data[nb_points : nb_points + nb_cells].reshape((handle.nb_rows - 1, handle.nb_columns - 1))
+    alt_max_cell = data[nb_points + nb_cells :].reshape((handle.nb_rows - 1, handle.nb_columns - 1))
+
+    if handle.is_cpp:
+        return SharedCppDTMIntersection(handle, alt_data, alt_min_cell, alt_max_cell)
+    return SharedDTMIntersection(handle, alt_data, alt_min_cell, alt_max_cell)
+
+
+def write_dtm_file(dtm, filename):
+    """
+    Write altitudes, cells min altitudes and cells max altitudes of a DTM one after the other in a float64 file,
+    which is mapped by attach_shared_dtm()
+
+    :param dtm: DTM to write
+    :type dtm: shareloc.geofunctions.dtm_intersection.DTMIntersection or bindings_cpp.DTMIntersection
+    :param filename: output file, overwritten
+    :type filename: str
+    :return: handle of the written file
+    :rtype: SharedDTMHandle
+    """
+    if isinstance(dtm, bindings_cpp.DTMIntersection):
+        arrays = [dtm.get_alt_data(), dtm.get_alt_min_cell(), dtm.get_alt_max_cell()]
+        transform = tuple(float(coef) for coef in dtm.get_transform())
+        handle_args = (True, dtm.get_epsg(), dtm.get_nb_rows(), dtm.get_nb_columns(), transform)
+    else:
+        arrays = [dtm.alt_data, dtm.alt_min_cell, dtm.alt_max_cell]
+        handle_args = (False, dtm.epsg, dtm.nb_rows, dtm.nb_columns, dtm.transform.to_gdal())
+
+    data = np.memmap(filename, dtype=np.float64, mode="w+", shape=(sum(np.size(array) for array in arrays),))
+    offset = 0
+    for array in arrays:
+        data[offset : offset + np.size(array)] = np.ravel(array)
+        offset += np.size(array)
+    data.flush()
+    del data
+
+    return SharedDTMHandle(filename, *handle_args)
+
+
+class SharedDTM:
+    """
+    DTM shared between processes through a memory-mapped file.
+
+    The owner process creates it from a DTMIntersection and passes get_dtm() to its workers :
+    each worker maps the same file instead of unpickling its own copy of the DTM.
+    The file is removed by close(), DTMs already attached remain valid.
+    """
+
+    def __init__(self, dtm, directory=SHARED_DTM_DIRECTORY):
+        """
+        Constructor : write DTM altitudes and cells min/max altitudes to a new shared file
+
+        :param dtm: DTM to share
+        :type dtm: shareloc.geofunctions.dtm_intersection.DTMIntersection or bindings_cpp.DTMIntersection
+        :param directory: directory of the shared file, memory backed if possible, temporary directory if None
+        :type directory: str
+        """
+        file_descriptor, filename = tempfile.mkstemp(prefix="shareloc_dtm_", suffix=".bin", dir=directory)
+        os.close(file_descriptor)
+        self.handle = write_dtm_file(dtm, filename)
+
+    def get_dtm(self):
+        """
+        DTM using the shared file, cheap to pickle
+
+        :return: DTM of the kind of the shared one
+        :rtype: SharedCppDTMIntersection or SharedDTMIntersection
+        """
+        return attach_shared_dtm(self.handle)
+
+    def close(self):
+        """
+        Remove the shared file
+        """
+        if os.path.exists(self.handle.filename):
+            os.remove(self.handle.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -26,7 +26,7 @@ This module contains triangulation methods.
 import numpy as np
 
 # Shareloc imports
-from shareloc.geofunctions.rectification_grid import RectificationGrid
+from shareloc.geofunctions.rectification_grid import load_rectification_grid
 from shareloc.geomodels.los import LOS
 from shareloc.proj_utils import coordinates_conversion
 
@@ -89,6 +89,132 @@ def sensor_triangulation(
     return intersections_ecef, intersections_wgs84, intersections_residues
 
 
+# pylint: disable=too-many-locals
+def multi_view_triangulation(
+    matches,
+    geometrical_models,
+    min_max=None,
+    residues=False,
+    fill_nan=False,
+    refinement_iterations=0,
+):
+    """
+    triangulation in sensor geometry of points seen in N views, using n_view_triangulation
+    (see sensor_triangulation for formula).
+    LOS intersections can optionally be refined in image space (see refine_triangulation).
+
+    A point may be missing in some views: its positions are then numpy.nan, and only available views
+    are used. Points seen in less than two views are not triangulated and numpy.nan is returned.
+
+    :param matches: matches in sensor coordinates, Nx[col (view 0), row (view 0), ..., col (view n), row (view n)]
+        or array of size (N,nb_views,2)
+    :type matches: np.array
+    :param geometrical_models: geometrical model of each view
+    :type geometrical_models: list of GeomodelTemplate
+    :param min_max: min/max for los creation of each view, if None model min/max will be used
+    :type min_max: list
+    :param residues: calculates residues (distance in meters between each view los and 3D points)
+    :type residues: boolean
+    :param fill_nan: fill numpy.nan values with lon and lat offset if true (same as OTB/OSSIM), nan is returned
+        otherwise
+    :type fill_nan: boolean
+    :param refinement_iterations: number of Gauss-Newton iterations of refine_triangulation, 0 for no refinement
+    :type refinement_iterations: int
+    :return: intersections in cartesian crs, intersections in wgs84 crs and optionnaly residues of size
+        (N,nb_views), numpy.nan for missing views
+    :rtype: (numpy.array,numpy,array,numpy.array)
+    """
+    nb_views = len(geometrical_models)
+    matches = np.asarray(matches, dtype=np.float64).reshape((-1, nb_views, 2))
+    nb_points = matches.shape[0]
+    if min_max is None:
+        min_max = [None] * nb_views
+
+    # LOS instantiation of all views, missing views are kept to nan
+    sis = np.full((nb_points, nb_views, 3), np.nan)
+    vis = np.full((nb_points, nb_views, 3), np.nan)
+    view_ok = np.all(np.isfinite(matches), axis=2)
+    for view, geometrical_model in enumerate(geometrical_models):
+        if np.any(view_ok[:, view]):
+            view_los = LOS(matches[view_ok[:, view], view, :], geometrical_model, min_max[view], fill_nan)
+            sis[view_ok[:, view], view, :] = view_los.starting_points
+            vis[view_ok[:, view], view, :] = view_los.viewing_vectors
+
+    # LOS intersection of points seen at least twice
+    intersections_ecef = np.full((nb_points, 3), np.nan)
+    intersections_wgs84 = np.full((nb_points, 3), np.nan)
+    points_ok = np.sum(np.all(np.isfinite(vis), axis=2), axis=1) >= 2
+    if np.any(points_ok):
+        intersections_ecef[points_ok, :] = n_view_triangulation(sis[points_ok], vis[points_ok])
+        in_crs = 4978
+        out_crs = 4326
+        intersections_wgs84[points_ok, :] = coordinates_conversion(intersections_ecef[points_ok, :], in_crs, out_crs)
+
+        if refinement_iterations > 0:
+            intersections_wgs84 = refine_triangulation(
+                matches, geometrical_models, intersections_wgs84, refinement_iterations
+            )
+            intersections_ecef[points_ok, :] = coordinates_conversion(
+                intersections_wgs84[points_ok, :], out_crs, in_crs
+            )
+
+    intersections_residues = None
+    if residues is True:
+        intersections_residues = n_view_distance(sis, vis, intersections_ecef)
+    return intersections_ecef, intersections_wgs84, intersections_residues
+
+
+def refine_triangulation(matches, geometrical_models, points_wgs84, nb_iterations=3):
+    """
+    Refine triangulated points by minimizing the reprojection error in image space of all views:
+    Gauss-Newton iterations on (lon, lat, alt) using inverse localization and its analytic partial derivatives
+    (inverse_loc_with_jacobian). Only RPC geometrical models (RPC and RPCoptim) provide these derivatives.
+
+    :param matches: matches in sensor coordinates, Nx[col (view 0), row (view 0), ..., col (view n), row (view n)]
+        or array of size (N,nb_views,2), numpy.nan for missing views
+    :type matches: np.array
+    :param geometrical_models: geometrical model of each view
+    :type geometrical_models: list of shareloc.geomodels.rpc.RPC or shareloc.geomodels.rpc_optim.RPCoptim
+    :param points_wgs84: initial points (lon, lat, alt), typically from n_view_triangulation, size (N,3)
+    :type points_wgs84: np.array
+    :param nb_iterations: fixed number of Gauss-Newton iterations
+    :type nb_iterations: int
+    :return: refined points (lon, lat, alt), numpy.nan for points seen in less than two views
+    :rtype: np.array
+    """
+    nb_views = len(geometrical_models)
+    matches = np.asarray(matches, dtype=np.float64).reshape((-1, nb_views, 2))
+    points = np.array(points_wgs84, dtype=np.float64)
+
+    view_ok = np.all(np.isfinite(matches), axis=2) & np.all(np.isfinite(points), axis=1)[:, np.newaxis]
+    points_ok = np.sum(view_ok, axis=1) >= 2
+    points[~points_ok, :] = np.nan
+
+    for __ in range(nb_iterations):
+        # residues (col, row) and jacobian d(col, row)/d(lon, lat, alt) of each view
+        residues = np.zeros((points.shape[0], nb_views, 2))
+        jacobian = np.zeros((points.shape[0], nb_views, 2, 3))
+        for view, geometrical_model in enumerate(geometrical_models):
+            pts = view_ok[:, view] & points_ok
+            if not np.any(pts):
+                continue
+            lon, lat, alt = points[pts, 0], points[pts, 1], points[pts, 2]
+            row, col, view_jacobian = geometrical_model.inverse_loc_with_jacobian(lon, lat, alt)
+            residues[pts, view, 0] = matches[pts, view, 0] - col
+            residues[pts, view, 1] = matches[pts, view, 1] - row
+            jacobian[pts, view, :, :] = view_jacobian[:, ::-1, :]
+
+        # normal equations, scaled to handle degrees and meters unknowns
+        jtj = np.einsum("nvki,nvkj->nij", jacobian[points_ok], jacobian[points_ok])
+        jtr = np.einsum("nvki,nvk->ni", jacobian[points_ok], residues[points_ok])
+        scale = np.sqrt(np.diagonal(jtj, axis1=1, axis2=2))
+        jtj_scaled = jtj / (scale[:, :, np.newaxis] * scale[:, np.newaxis, :])
+        delta = np.linalg.solve(jtj_scaled, (jtr / scale)[..., np.newaxis])[..., 0] / scale
+        points[points_ok, :] += delta
+
+    return points
+
+
 def distance_point_los(los, points):
     """
     distance between points and LOS
@@ -223,10 +349,11 @@ def epipolar_triangulation(
     :type geometrical_model_left: GeomodelTemplate
     :param geometrical_model_right: right image geometrical model
     :type geometrical_model_right: GeomodelTemplate
-    :param grid_left: left rectification grid filename
-    :type grid_left: str
-    :param grid_right: right rectification grid filename
-    :type grid_right: str
+    :param grid_left: left rectification grid filename or already loaded RectificationGrid.
+        Grids given by filename are cached (see load_rectification_grid)
+    :type grid_left: str or RectificationGrid
+    :param grid_right: right rectification grid filename or already loaded RectificationGrid
+    :type grid_right: str or RectificationGrid
     :param left_min_max: left min/max for los creation, if None model min/max will be used
     :type left_min_max: list
     :param right_min_max: right min/max for los creation, if None model min/max will be used
@@ -254,15 +381,15 @@ def epipolar_triangulation(
     else:
         raise KeyError("matches type should be sift or disp")
 
-    # interpolate left
-    rectif_grid_left = RectificationGrid(
+    # load (or reuse) rectification grids
+    rectif_grid_left = load_rectification_grid(
         grid_left, is_displacement_grid=is_displacement_grid, interpolator=interpolator
     )
-    rectif_grid_right = RectificationGrid(
+    rectif_grid_right = load_rectification_grid(
         grid_right, is_displacement_grid=is_displacement_grid, interpolator=interpolator
     )
 
-    # interpolate_right
+    # interpolate left and right
     matches_sensor_left = rectif_grid_left.interpolate(epi_pos_left)
     matches_sensor_right = rectif_grid_right.interpolate(epi_pos_right)
     matches_sensor = np.concatenate((matches_sensor_left, matches_sensor_right), axis=1)
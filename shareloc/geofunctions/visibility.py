@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the visibility of ground points from a sensor : lines of sight are marched through
+the DTM cells from each ground point up to the DTM top, a point is occluded if the terrain is above its line of sight.
+"""
+
+# Standard imports
+import os
+from ast import literal_eval
+
+# Third party imports
+import numpy as np
+from affine import Affine
+from numba import config, njit, prange, types
+
+import bindings_cpp
+
+# Shareloc imports
+from shareloc.geofunctions.localization import Localization
+
+# Set numba type of threading layer before parallel target compilation
+config.THREADING_LAYER = "omp"
+
+
+def dtm_arrays(dtm):
+    """
+    Altitudes and cells max altitudes of a python or C++ DTMIntersection
+
+    :param dtm: dtm intersection model
+    :type dtm: shareloc.geofunctions.dtm_intersection.DTMIntersection or bindings_cpp.DTMIntersection
+    :return: altitudes (nb_rows, nb_columns) and cells max altitudes (nb_rows - 1, nb_columns - 1)
+    :rtype: Tuple(np.ndarray, np.ndarray)
+    """
+    if isinstance(dtm, bindings_cpp.DTMIntersection):
+        nb_rows, nb_columns = dtm.get_nb_rows(), dtm.get_nb_columns()
+        alt_data, alt_max_cell = dtm.get_alt_data(), dtm.get_alt_max_cell()
+    else:
+        nb_rows, nb_columns = dtm.nb_rows, dtm.nb_columns
+        alt_data, alt_max_cell = dtm.alt_data, dtm.alt_max_cell
+    alt_data = np.ascontiguousarray(np.reshape(alt_data, (nb_rows, nb_columns)), dtype=np.float64)
+    alt_max_cell = np.ascontiguousarray(np.reshape(alt_max_cell, (nb_rows - 1, nb_columns - 1)), dtype=np.float64)
+    return alt_data, alt_max_cell
+
+
+def visibility(model, dtm, ground_points, tolerance=0.5):
+    """
+    Visibility of ground points from the sensor of a geometric model : the line of sight of each ground point
+    (sensor position given by inverse localization) is marched through the DTM cells up to the DTM top.
+    Ground points above the DTM top are visible.
+    Cells whose max altitude is below the line of sight are accepted without interpolation.
+    Ground points are occluded if the terrain is more than tolerance above their line of sight,
+    ground points below the terrain are then occluded. Terrain outside the DTM does not occlude.
+
+    :param model: geometric model
+    :type model: GeomodelTemplate
+    :param dtm: dtm intersection model
+    :type dtm: shareloc.geofunctions.dtm_intersection.DTMIntersection or bindings_cpp.DTMIntersection
+    :param ground_points: ground points (x, y, h) in dtm coordinates system
+    :type ground_points: np.ndarray (Nx3)
+    :param tolerance: altitude tolerance, in meters
+    :type tolerance: float
+    :return: True for visible points, False for occluded points and points with nan coordinates
+    :rtype: 1D np.ndarray dtype bool
+    """
+    ground_points = np.atleast_2d(np.asarray(ground_points, dtype=np.float64))
+    localization = Localization(model, epsg=dtm.get_epsg())
+
+    # line of sight from the ground point (sensor position given by inverse localization) up to the dtm top
+    row, col, _ = localization.inverse(ground_points[:, 0], ground_points[:, 1], ground_points[:, 2])
+    los_end = np.atleast_2d(localization.direct(row, col, dtm.get_alt_max() + tolerance))
+
+    return lines_of_sight_visibility(dtm, ground_points, los_end, tolerance)
+
+
+def lines_of_sight_visibility(dtm, ground_points, los_end, tolerance=0.5):
+    """
+    Visibility of ground points along given lines of sight, see visibility()
+
+    :param dtm: dtm intersection model
+    :type dtm: shareloc.geofunctions.dtm_intersection.DTMIntersection or bindings_cpp.DTMIntersection
+    :param ground_points: ground points (x, y, h) in dtm coordinates system
+    :type ground_points: np.ndarray (Nx3)
+    :param los_end: lines of sight ends (x, y, h) in dtm coordinates system, above the dtm top
+    :type los_end: np.ndarray (Nx3)
+    :param tolerance: altitude tolerance, in meters
+    :type tolerance: float
+    :return: True for visible points, False for occluded points and points with nan coordinates
+    :rtype: 1D np.ndarray dtype bool
+    """
+    alt_data, alt_max_cell = dtm_arrays(dtm)
+    transform = dtm.get_transform()
+    if not isinstance(transform, Affine):
+        transform = Affine.from_gdal(*transform)
+    trans_inv = ~transform
+    los_index = np.empty((ground_points.shape[0], 6), dtype=np.float64)
+    for offset, points in [(0, ground_points), (3, los_end)]:
+        los_index[:, offset] = trans_inv.d * points[:, 0] + trans_inv.e * points[:, 1] + trans_inv.f - 0.5
+        los_index[:, offset + 1] = trans_inv.a * points[:, 0] + trans_inv.b * points[:, 1] + trans_inv.c - 0.5
+        los_index[:, offset + 2] = points[:, 2]
+
+    return march_visibility(alt_data, alt_max_cell, los_index, float(tolerance))
+
+
+def visibility_raster(model, dtm, roi=None, tolerance=0.5):
+    """
+    Visibility of the DTM nodes from the sensor of a geometric model, see visibility()
+
+    :param model: geometric model
+    :type model: GeomodelTemplate
+    :param dtm: dtm intersection model
+    :type dtm: shareloc.geofunctions.dtm_intersection.DTMIntersection or bindings_cpp.DTMIntersection
+    :param roi: dtm window [first row, first col, last row, last col] (last ones excluded), whole dtm if None
+    :type roi: list
+    :param tolerance: altitude tolerance, in meters
+    :type tolerance: float
+    :return: True for visible nodes
+    :rtype: 2D np.ndarray dtype bool
+    """
+    alt_data, _ = dtm_arrays(dtm)
+    if roi is None:
+        roi = [0, 0, alt_data.shape[0], alt_data.shape[1]]
+    rows, cols = np.mgrid[roi[0] : roi[2], roi[1] : roi[3]]
+
+    transform = dtm.get_transform()
+    if not isinstance(transform, Affine):
+        transform = Affine.from_gdal(*transform)
+    ground_points = np.empty((rows.size, 3), dtype=np.float64)
+    ground_points[:, 0], ground_points[:, 1] = transform * (cols.ravel() + 0.5, rows.ravel() + 0.5)
+    ground_points[:, 2] = alt_data[rows.ravel(), cols.ravel()]
+
+    return visibility(model, dtm, ground_points, tolerance).reshape(rows.shape)
+
+
+# C++ DTMIntersection altitudes are read only views
+_READONLY_2D = types.Array(types.float64, 2, "C", readonly=True)
+
+
+@njit(types.float64(_READONLY_2D, types.int64, types.int64, types.float64[::1], types.float64), cache=True)
+def height_above_los(alt_data, cell_row, cell_col, los, t_los):
+    """
+    Height of the bilinear terrain of a DTM cell above a line of sight using numba
+
+    :param alt_data: DTM altitudes (nb_rows, nb_cols)
+    :type alt_data: 2D np.array dtype np.float 64
+    :param cell_row: cell row
+    :type cell_row: int
+    :param cell_col: cell col
+    :type cell_col: int
+    :param los: line of sight [row, col, alt] of its start then of its end, in dtm index
+    :type los: 1D np.array dtype np.float 64
+    :param t_los: line of sight position, 0 at its start and 1 at its end
+    :type t_los: float 64
+    :return: terrain altitude minus line of sight altitude
+    :rtype: float 64
+    """
+    row_shift = los[0] + (los[3] - los[0]) * t_los - cell_row
+    col_shift = los[1] + (los[4] - los[1]) * t_los - cell_col
+    return (
+        (1 - col_shift) * (1 - row_shift) * alt_data[cell_row, cell_col]
+        + col_shift * (1 - row_shift) * alt_data[cell_row, cell_col + 1]
+        + (1 - col_shift) * row_shift * alt_data[cell_row + 1, cell_col]
+        + col_shift * row_shift * alt_data[cell_row + 1, cell_col + 1]
+        - los[2]
+        - (los[5] - los[2]) * t_los
+    )
+
+
+@njit(types.Tuple((types.int64, types.int64, types.float64, types.float64))(types.float64, types.float64), cache=True)
+def traversal_start(start, end):
+    """
+    Cells traversal setup along one DTM axis of a line of sight using numba
+
+    :param start: line of sight start index along the axis
+    :type start: float 64
+    :param end: line of sight end index along the axis
+    :type end: float 64
+    :return: start cell, cell step, line of sight position of the first cell boundary crossing
+        and line of sight position increment between crossings (inf if the line of sight does not move along the axis)
+    :rtype: Tuple(int, int, float 64, float 64)
+    """
+    cell = int(np.floor(start))
+    direction = end - start
+    if direction == 0.0:
+        return cell, 1, np.inf, np.inf
+    if direction > 0.0:
+        return cell, 1, (cell + 1 - start) / direction, 1.0 / direction
+    return cell, -1, (cell - start) / direction, -1.0 / direction
+
+
+@njit(
+    types.boolean[:](_READONLY_2D, _READONLY_2D, types.float64[:, ::1], types.float64),
+    parallel=literal_eval(os.environ.get("SHARELOC_NUMBA_PARALLEL", "True")),
+    cache=True,
+)
+def march_visibility(alt_data, alt_max_cell, los_index, tolerance):
+    """
+    March lines of sight through the DTM cells using numba.
+    In each cell crossed by a line of sight, the line of sight is accepted if it is above the cell max altitude,
+    otherwise the maximum height of the terrain above it (quadratic along the line of sight) is computed.
+
+    :param alt_data: DTM altitudes (nb_rows, nb_cols)
+    :type alt_data: 2D np.array dtype np.float 64
+    :param alt_max_cell: DTM cells max altitudes (nb_rows - 1, nb_cols - 1)
+    :type alt_max_cell: 2D np.array dtype np.float 64
+    :param los_index: lines of sight Nx6 [row, col, alt] of the ground point then of the line of sight top,
+        in dtm index
+    :type los_index: 2D np.array dtype np.float 64
+    :param tolerance: altitude tolerance
+    :type tolerance: float 64
+    :return: True for visible ground points
+    :rtype: 1D np.array dtype bool
+    """
+    nb_cells_rows = alt_max_cell.shape[0]
+    nb_cells_cols = alt_max_cell.shape[1]
+    nb_points = los_index.shape[0]
+    out = np.empty(nb_points, dtype=np.bool_)
+
+    # pylint: disable=not-an-iterable
+    for point in prange(nb_points):
+        alt0 = los_index[point, 2]
+        dalt = los_index[point, 5] - alt0
+        if not np.all(np.isfinite(los_index[point])):
+            out[point] = False
+            continue
+        if dalt <= 0.0:
+            out[point] = True
+            continue
+
+        # cells traversal
+        cell_row, step_row, next_t_row, delta_t_row = traversal_start(los_index[point, 0], los_index[point, 3])
+        cell_col, step_col, next_t_col, delta_t_col = traversal_start(los_index[point, 1], los_index[point, 4])
+
+        visible = True
+        t_in = 0.0
+        while t_in < 1.0:
+            t_out = min(next_t_row, next_t_col, 1.0)
+            inside = 0 <= cell_row < nb_cells_rows and 0 <= cell_col < nb_cells_cols
+            # early acceptance : line of sight going up, above the cell max altitude when entering it
+            if inside and alt0 + dalt * t_in <= alt_max_cell[cell_row, cell_col] + tolerance:
+                # terrain height above the line of sight at cell entry, middle and exit
+                height_in = height_above_los(alt_data, cell_row, cell_col, los_index[point], t_in)
+                height_mid = height_above_los(alt_data, cell_row, cell_col, los_index[point], 0.5 * (t_in + t_out))
+                height_out = height_above_los(alt_data, cell_row, cell_col, los_index[point], t_out)
+                max_height = max(height_in, height_out)
+                # bilinear terrain is quadratic along the line of sight
+                coef_a = 2.0 * (height_in + height_out - 2.0 * height_mid)
+                coef_b = height_out - height_in - coef_a
+                if coef_a < 0.0 < -coef_b / (2.0 * coef_a) < 1.0:
+                    max_height = max(max_height, height_in - coef_b * coef_b / (4.0 * coef_a))
+                if max_height > tolerance:
+                    visible = False
+                    break
+            t_in = t_out
+            if next_t_row <= next_t_col:
+                cell_row += step_row
+                next_t_row += delta_t_row
+            else:
+                cell_col += step_col
+                next_t_col += delta_t_col
+        out[point] = visible
+
+    return out
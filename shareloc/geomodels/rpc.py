@@ -272,6 +272,50 @@ class RPC(GeoModelTemplate):
         points[:, 2] = alt
         return points
 
+    def direct_loc_h_two_altitudes(self, row, col, alt_first, alt_second, fill_nan=False):
+        """
+        direct localization of the same sensor positions at two altitudes.
+        Using inverse RPC, the iterative localization at alt_second starts from the solution at alt_first,
+        which saves Newton iterations when both altitudes are close.
+
+        :param row:  line sensor position
+        :type row: float or 1D numpy.ndarray dtype=float64
+        :param col:  column sensor position
+        :type col: float or 1D numpy.ndarray dtype=float64
+        :param alt_first: first altitude
+        :type alt_first: float or 1D numpy.ndarray dtype=float64
+        :param alt_second: second altitude
+        :type alt_second: float or 1D numpy.ndarray dtype=float64
+        :param fill_nan: fill numpy.nan values with lon and lat offset if true (same as OTB/OSSIM), nan is returned
+            otherwise
+        :type fill_nan: boolean
+        :return: ground positions (lon,lat,h) at alt_first and at alt_second
+        :rtype: Tuple(numpy.ndarray (N,3), numpy.ndarray (N,3))
+        """
+        if not self.inverse_coefficient:
+            return self.direct_loc_h(row, col, alt_first, fill_nan), self.direct_loc_h(row, col, alt_second, fill_nan)
+
+        if not isinstance(col, (list, np.ndarray)):
+            col = np.array([col])
+            row = np.array([row])
+        alt_second = np.broadcast_to(np.asarray(alt_second, dtype=np.float64), col.shape)
+
+        points_first = self.direct_loc_h(row, col, alt_first, fill_nan)
+
+        points_second = np.zeros((col.size, 3))
+        filter_nan, points_second[:, 0], points_second[:, 1] = self.filter_coordinates(row, col, fill_nan)
+        (points_second[filter_nan, 0], points_second[filter_nan, 1], __) = self.direct_loc_inverse_iterative(
+            row[filter_nan],
+            col[filter_nan],
+            np.array(alt_second[filter_nan]),
+            10,
+            fill_nan,
+            points_first[filter_nan, 0],
+            points_first[filter_nan, 1],
+        )
+        points_second[:, 2] = alt_second
+        return points_first, points_second
+
     def direct_loc_grid_h(self, row0, col0, steprow, stepcol, nbrow, nbcol, alt):
         """
         calculates a direct loc grid (lat, lon) from the direct RPCs at constant altitude
@@ -303,7 +347,26 @@ class RPC(GeoModelTemplate):
                 (gri_lon[line, column], gri_lat[line, column], __) = self.direct_loc_h(row, col, alt)
         return (gri_lon, gri_lat)
 
-    def direct_loc_dtm(self, row, col, dtm):
+    def get_dtm_los_alt_bounds(self, dtm):
+        """
+        Altitude bounds of the lines of sight intersected with a DTM : DTM altitude range expressed in the RPC
+        coordinates system, with a 1 meter margin
+
+        :param dtm: dtm intersection model
+        :type dtm: shareloc.geofunctions.dtm_intersection
+        :return: lines of sight minimum and maximum altitudes
+        :rtype: Tuple(float, float)
+        """
+        diff_alti_min, diff_alti_max = self.get_dtm_alt_offset(dtm.get_footprint_corners(), dtm)
+
+        (min_dtm, max_dtm) = (dtm.get_alt_min() - 1.0 + diff_alti_min, dtm.get_alt_max() + 1.0 + diff_alti_max)
+        if min_dtm < self.offset_alt - self.scale_alt:
+            logging.debug("minimum dtm value is outside RPC validity domain, extrapolation will be done")
+        if max_dtm > self.offset_alt + self.scale_alt:
+            logging.debug("maximum dtm value is outside RPC validity domain, extrapolation will be done")
+        return min_dtm, max_dtm
+
+    def direct_loc_dtm(self, row, col, dtm, los_alt_bounds=None):
         """
         direct localization on dtm
 
@@ -313,6 +376,9 @@ class RPC(GeoModelTemplate):
         :type col: float
         :param dtm: dtm intersection model
         :type dtm: shareloc.geofunctions.dtm_intersection
+        :param los_alt_bounds: lines of sight altitude bounds returned by get_dtm_los_alt_bounds(dtm),
+            computed if None
+        :type los_alt_bounds: Tuple(float, float)
         :return: ground position (lon,lat,h) in dtm coordinates system
         :rtype: numpy.ndarray 2D dimension with (N,3) shape, where N is number of input coordinates
         """
@@ -320,14 +386,9 @@ class RPC(GeoModelTemplate):
             row = np.array([row])
             col = np.array([col])
 
-        diff_alti_min, diff_alti_max = self.get_dtm_alt_offset(dtm.get_footprint_corners(), dtm)
-
-        # print("min {} max {}".format(dtm.Zmin,dtm.Zmax))
-        (min_dtm, max_dtm) = (dtm.get_alt_min() - 1.0 + diff_alti_min, dtm.get_alt_max() + 1.0 + diff_alti_max)
-        if min_dtm < self.offset_alt - self.scale_alt:
-            logging.debug("minimum dtm value is outside RPC validity domain, extrapolation will be done")
-        if max_dtm > self.offset_alt + self.scale_alt:
-            logging.debug("maximum dtm value is outside RPC validity domain, extrapolation will be done")
+        if los_alt_bounds is None:
+            los_alt_bounds = self.get_dtm_los_alt_bounds(dtm)
+        (min_dtm, max_dtm) = los_alt_bounds
 
         los = self.los_extrema(row, col, min_dtm, max_dtm, epsg=dtm.get_epsg())
 
@@ -392,6 +453,46 @@ class RPC(GeoModelTemplate):
             (col_out, row_out) = (None, None)
         return row_out, col_out, alt
 
+    def inverse_loc_with_jacobian(self, lon, lat, alt):
+        """
+        Inverse localization and its analytic jacobian in one evaluation
+
+        :param lon: longitude position
+        :type lon: float or 1D numpy.ndarray dtype=float64
+        :param lat: latitude position
+        :type lat: float or 1D numpy.ndarray dtype=float64
+        :param alt: altitude
+        :type alt: float or 1D numpy.ndarray dtype=float64
+        :return: sensor position (row, col) and jacobian d(row, col)/d(lon, lat, alt) of size (N,2,3)
+        :rtype: tuple(1D np.array row position, 1D np.array col position, 3D np.array jacobian)
+        """
+        if not self.inverse_coefficient:
+            logging.warning("inverse localisation can't be performed, inverse coefficients have not been defined")
+            return None, None, None
+
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        alt = np.atleast_1d(np.asarray(alt, dtype=np.float64))
+        if alt.shape[0] != lon.shape[0]:
+            alt = np.full(lon.shape[0], fill_value=alt[0])
+
+        return compute_loc_inverse_jacobian_numba(
+            (lon - self.offset_x) / self.scale_x,
+            (lat - self.offset_y) / self.scale_y,
+            (alt - self.offset_alt) / self.scale_alt,
+            self.num_col,
+            self.den_col,
+            self.num_row,
+            self.den_row,
+            self.scale_col,
+            self.offset_col,
+            self.scale_row,
+            self.offset_row,
+            self.scale_x,
+            self.scale_y,
+            self.scale_alt,
+        )
+
     def filter_coordinates(self, first_coord, second_coord, fill_nan=False, direction="direct"):
         """
         Filter nan input values
@@ -462,7 +563,73 @@ class RPC(GeoModelTemplate):
 
         return (dcol_dlon, dcol_dlat, drow_dlon, drow_dlat)
 
-    def direct_loc_inverse_iterative(self, row, col, alt, nb_iter_max=10, fill_nan=False):
+    def compute_loc_inverse_alt_derivates(self, lon, lat, alt):
+        """
+        Inverse loc partial derivatives with respect to altitude analytical compute
+
+        :param lon: longitude coordinate
+        :param lat: latitude coordinate
+        :param alt: altitude coordinate
+        :return: partials derivatives of inverse localization with respect to altitude
+        :rtype: Tuple(dcol_dalt np.array, drow_dalt np.array)
+        """
+        if not isinstance(alt, (list, np.ndarray)):
+            alt = np.array([alt])
+
+        if alt.shape[0] != lon.shape[0]:
+            alt = np.full(lon.shape[0], fill_value=alt[0])
+
+        lon_norm = (lon - self.offset_x) / self.scale_x
+        lat_norm = (lat - self.offset_y) / self.scale_y
+        alt_norm = (alt - self.offset_alt) / self.scale_alt
+
+        dcol_dalt, drow_dalt = compute_loc_inverse_alt_derivates_numba(
+            lon_norm,
+            lat_norm,
+            alt_norm,
+            self.num_col,
+            self.den_col,
+            self.num_row,
+            self.den_row,
+            self.scale_col,
+            self.scale_row,
+            self.scale_alt,
+        )
+
+        return (dcol_dalt, drow_dalt)
+
+    def inverse_iterative_start(self, row, col, alt, filter_nan, lon_start=None, lat_start=None):
+        """
+        Starting ground positions of the iterative direct localization, and their sensor residues
+
+        :param row: line sensor position of the valid points
+        :type row: 1D numpy.ndarray dtype=float64
+        :param col: column sensor position of the valid points
+        :type col: 1D numpy.ndarray dtype=float64
+        :param alt: altitude of the valid points
+        :type alt: 1D numpy.ndarray dtype=float64
+        :param filter_nan: valid points mask of the input points
+        :type filter_nan: 1D numpy.ndarray dtype=bool
+        :param lon_start: starting longitude of each input point (warm start), center of the scene if None
+        :type lon_start: 1D numpy.ndarray dtype=float64
+        :param lat_start: starting latitude of each input point (warm start), center of the scene if None
+        :type lat_start: 1D numpy.ndarray dtype=float64
+        :return: starting longitude, latitude, and row and column residues of the valid points
+        :rtype: Tuple of 1D numpy.ndarray
+        """
+        lon, lat = np.full((2, row.size), [[self.offset_x], [self.offset_y]], dtype=np.float64)
+        if lon_start is not None and lat_start is not None:
+            lon_start = np.broadcast_to(np.asarray(lon_start, dtype=np.float64), filter_nan.shape)[filter_nan]
+            lat_start = np.broadcast_to(np.asarray(lat_start, dtype=np.float64), filter_nan.shape)[filter_nan]
+            warm = np.isfinite(lon_start) & np.isfinite(lat_start)
+            lon[warm], lat[warm] = lon_start[warm], lat_start[warm]
+        (row_start, col_start, __) = self.inverse_loc(lon, lat, alt)
+        return lon, lat, row - row_start, col - col_start
+
+    # pylint: disable=too-many-arguments
+    def direct_loc_inverse_iterative(
+        self, row, col, alt, nb_iter_max=10, fill_nan=False, lon_start=None, lat_start=None
+    ):
         """
         Iterative direct localization using inverse RPC
 
@@ -477,6 +644,10 @@ class RPC(GeoModelTemplate):
         :param fill_nan: fill numpy.nan values with lon and lat offset if true (same as OTB/OSSIM), nan is returned
             otherwise
         :type fill_nan: boolean
+        :param lon_start: Newton starting longitude of each point (warm start), center of the scene if None
+        :type lon_start: 1D numpy.ndarray dtype=float64
+        :param lat_start: Newton starting latitude of each point (warm start), center of the scene if None
+        :type lat_start: 1D numpy.ndarray dtype=float64
         :return: ground position (lon,lat,h)
         :rtype: list of numpy.array
         """
@@ -502,22 +673,15 @@ class RPC(GeoModelTemplate):
             col = col[filter_nan]
             alt_filtered = alt[filter_nan]
 
-            # inverse localization starting from the center of the scene
-            lon = np.array([self.offset_x])
-            lat = np.array([self.offset_y])
-            (row_start, col_start, __) = self.inverse_loc(lon, lat, alt_filtered)
+            # inverse localization starting from the center of the scene, or from the given ground positions
+            lon, lat, delta_row, delta_col = self.inverse_iterative_start(
+                row, col, alt_filtered, filter_nan, lon_start, lat_start
+            )
 
             # desired precision in pixels
             eps = 1e-6
 
             iteration = 0
-            # computing the residue between the sensor positions and those estimated by the inverse localization
-            delta_col = col - col_start
-            delta_row = row - row_start
-
-            # ground coordinates (latitude and longitude) of each point
-            lon = np.repeat(lon, delta_col.size)
-            lat = np.repeat(lat, delta_col.size)
 
             # while the required precision is not achieved
             while (np.max(abs(delta_col)) > eps or np.max(abs(delta_row)) > eps) and iteration < nb_iter_max:
@@ -576,6 +740,8 @@ class RPC(GeoModelTemplate):
         :return: min/max altimetric difference between RPC's epsg minus dtm alti expressed in dtm epsg
         :rtype: list of float (1x2)
         """
+        if dtm.get_epsg() == self.epsg:
+            return [0.0, 0.0]
 
         alti_moy = (dtm.get_alt_min() + dtm.get_alt_max()) / 2.0
 
@@ -821,6 +987,38 @@ def derivative_polynomial_longitude(lon_norm, lat_norm, alt_norm, coeff):
     return derivate
 
 
+@njit("f8(f8, f8, f8, f8[:])", cache=True, fastmath=True)
+def derivative_polynomial_altitude(lon_norm, lat_norm, alt_norm, coeff):
+    """
+    Compute altitude derivative polynomial equation
+
+    :param lon_norm: Normalized longitude position
+    :type lon_norm: float 64
+    :param lat_norm: Normalized latitude position
+    :type lat_norm: float 64
+    :param alt_norm: Normalized altitude position
+    :type alt_norm: float 64
+    :param coeff: coefficients
+    :type coeff: 1D np.array dtype np.float 64
+    :return: rational derivative
+    :rtype: float 64
+    """
+    derivate = (
+        coeff[3]
+        + coeff[5] * lon_norm
+        + coeff[6] * lat_norm
+        + 2 * coeff[9] * alt_norm
+        + coeff[10] * lon_norm * lat_norm
+        + 2 * coeff[13] * lon_norm * alt_norm
+        + 2 * coeff[16] * lat_norm * alt_norm
+        + coeff[17] * lon_norm**2
+        + coeff[18] * lat_norm**2
+        + 3 * coeff[19] * alt_norm**2
+    )
+
+    return derivate
+
+
 # pylint: disable=too-many-arguments
 @njit(
     "Tuple((f8[:], f8[:], f8[:], f8[:]))(f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8, f8, f8, f8)",
@@ -888,3 +1086,240 @@ def compute_loc_inverse_derivates_numba(
         drow_dlat[i] = scale_lin / scale_lat * (num_drow_dlat * den_drow - den_drow_dlat * num_drow) / den_drow**2
 
     return dcol_dlon, dcol_dlat, drow_dlon, drow_dlat
+
+
+# pylint: disable=too-many-arguments
+@njit(
+    "Tuple((f8[:], f8[:]))(f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8, f8, f8)",
+    parallel=literal_eval(os.environ.get("SHARELOC_NUMBA_PARALLEL", "True")),
+    cache=True,
+    fastmath=True,
+)
+def compute_loc_inverse_alt_derivates_numba(
+    lon_norm, lat_norm, alt_norm, num_col, den_col, num_lin, den_lin, scale_col, scale_lin, scale_alt
+):
+    """
+    Analytically compute the partials derivatives of inverse localization with respect to altitude using numba
+    to reduce calculation time on multiple points
+
+    :param lon_norm: Normalized longitude position
+    :type lon_norm: 1D np.array dtype np.float 64
+    :param lat_norm: Normalized latitude position
+    :type lat_norm: 1D np.array dtype np.float 64
+    :param alt_norm: Normalized altitude position
+    :type alt_norm: 1D np.array dtype np.float 64
+    :param num_col: Column numerator coefficients
+    :type num_col: 1D np.array dtype np.float 64
+    :param den_col: Column denominator coefficients
+    :type den_col: 1D np.array dtype np.float 64
+    :param num_lin: Line numerator coefficients
+    :type num_lin: 1D np.array dtype np.float 64
+    :param den_lin: Line denominator coefficients
+    :type den_lin: 1D np.array dtype np.float 64
+    :param scale_col: Column scale
+    :type scale_col: float 64
+    :param scale_lin: Line scale
+    :type scale_lin: float 64
+    :param scale_alt: Altitude scale
+    :type scale_alt: float 64
+    :return: partials derivatives of inverse localization with respect to altitude
+    :rtype: Tuples(dcol_dalt np.array, drow_dalt np.array)
+    """
+    dcol_dalt = np.zeros((lon_norm.shape[0]), dtype=np.float64)
+    drow_dalt = np.zeros((lon_norm.shape[0]), dtype=np.float64)
+
+    # pylint: disable=not-an-iterable
+    for i in prange(lon_norm.shape[0]):
+        num_dcol = polynomial_equation(lon_norm[i], lat_norm[i], alt_norm[i], num_col)
+        den_dcol = polynomial_equation(lon_norm[i], lat_norm[i], alt_norm[i], den_col)
+        num_drow = polynomial_equation(lon_norm[i], lat_norm[i], alt_norm[i], num_lin)
+        den_drow = polynomial_equation(lon_norm[i], lat_norm[i], alt_norm[i], den_lin)
+
+        num_dcol_dalt = derivative_polynomial_altitude(lon_norm[i], lat_norm[i], alt_norm[i], num_col)
+        den_dcol_dalt = derivative_polynomial_altitude(lon_norm[i], lat_norm[i], alt_norm[i], den_col)
+        num_drow_dalt = derivative_polynomial_altitude(lon_norm[i], lat_norm[i], alt_norm[i], num_lin)
+        den_drow_dalt = derivative_polynomial_altitude(lon_norm[i], lat_norm[i], alt_norm[i], den_lin)
+
+        dcol_dalt[i] = scale_col / scale_alt * (num_dcol_dalt * den_dcol - den_dcol_dalt * num_dcol) / den_dcol**2
+        drow_dalt[i] = scale_lin / scale_alt * (num_drow_dalt * den_drow - den_drow_dalt * num_drow) / den_drow**2
+
+    return dcol_dalt, drow_dalt
+
+
+@njit("UniTuple(f8, 4)(f8, f8, f8, f8[:])", cache=True, fastmath=True, inline="always")
+def polynomial_equation_and_derivatives(xnorm, ynorm, znorm, coeff):
+    """
+    Compute polynomial equation and its derivatives, sharing the monomials evaluation
+
+    :param xnorm: Normalized longitude position
+    :type xnorm: float 64
+    :param ynorm: Normalized latitude position
+    :type ynorm: float 64
+    :param znorm: Normalized altitude position
+    :type znorm: float 64
+    :param coeff: coefficients
+    :type coeff: 1D np.array dtype np.float 64
+    :return: rational and its derivatives with respect to xnorm, ynorm and znorm
+    :rtype: Tuple(float 64, float 64, float 64, float 64)
+    """
+    xy = xnorm * ynorm
+    xz = xnorm * znorm
+    yz = ynorm * znorm
+    xx = xnorm * xnorm
+    yy = ynorm * ynorm
+    zz = znorm * znorm
+
+    rational = (
+        coeff[0]
+        + coeff[1] * xnorm
+        + coeff[2] * ynorm
+        + coeff[3] * znorm
+        + coeff[4] * xy
+        + coeff[5] * xz
+        + coeff[6] * yz
+        + coeff[7] * xx
+        + coeff[8] * yy
+        + coeff[9] * zz
+        + coeff[10] * xy * znorm
+        + coeff[11] * xx * xnorm
+        + coeff[12] * xnorm * yy
+        + coeff[13] * xnorm * zz
+        + coeff[14] * xx * ynorm
+        + coeff[15] * yy * ynorm
+        + coeff[16] * ynorm * zz
+        + coeff[17] * xx * znorm
+        + coeff[18] * yy * znorm
+        + coeff[19] * zz * znorm
+    )
+    derivate_x = (
+        coeff[1]
+        + coeff[4] * ynorm
+        + coeff[5] * znorm
+        + 2 * coeff[7] * xnorm
+        + coeff[10] * yz
+        + 3 * coeff[11] * xx
+        + coeff[12] * yy
+        + coeff[13] * zz
+        + 2 * coeff[14] * xy
+        + 2 * coeff[17] * xz
+    )
+    derivate_y = (
+        coeff[2]
+        + coeff[4] * xnorm
+        + coeff[6] * znorm
+        + 2 * coeff[8] * ynorm
+        + coeff[10] * xz
+        + 2 * coeff[12] * xy
+        + coeff[14] * xx
+        + 3 * coeff[15] * yy
+        + coeff[16] * zz
+        + 2 * coeff[18] * yz
+    )
+    derivate_z = (
+        coeff[3]
+        + coeff[5] * xnorm
+        + coeff[6] * ynorm
+        + 2 * coeff[9] * znorm
+        + coeff[10] * xy
+        + 2 * coeff[13] * xz
+        + 2 * coeff[16] * yz
+        + coeff[17] * xx
+        + coeff[18] * yy
+        + 3 * coeff[19] * zz
+    )
+
+    return rational, derivate_x, derivate_y, derivate_z
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+@njit(
+    "Tuple((f8[:], f8[:], f8[:,:,:]))(f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8, f8, f8, f8, f8, f8, f8)",
+    parallel=literal_eval(os.environ.get("SHARELOC_NUMBA_PARALLEL", "True")),
+    cache=True,
+    fastmath=True,
+)
+def compute_loc_inverse_jacobian_numba(
+    lon_norm,
+    lat_norm,
+    alt_norm,
+    num_col,
+    den_col,
+    num_lin,
+    den_lin,
+    scale_col,
+    offset_col,
+    scale_lin,
+    offset_lin,
+    scale_lon,
+    scale_lat,
+    scale_alt,
+):
+    """
+    Compute inverse localization and its analytic jacobian in one pass using numba,
+    polynomial values are shared between positions and derivatives.
+
+    :param lon_norm: Normalized longitude position
+    :type lon_norm: 1D np.array dtype np.float 64
+    :param lat_norm: Normalized latitude position
+    :type lat_norm: 1D np.array dtype np.float 64
+    :param alt_norm: Normalized altitude position
+    :type alt_norm: 1D np.array dtype np.float 64
+    :param num_col: Column numerator coefficients
+    :type num_col: 1D np.array dtype np.float 64
+    :param den_col: Column denominator coefficients
+    :type den_col: 1D np.array dtype np.float 64
+    :param num_lin: Line numerator coefficients
+    :type num_lin: 1D np.array dtype np.float 64
+    :param den_lin: Line denominator coefficients
+    :type den_lin: 1D np.array dtype np.float 64
+    :param scale_col: Column scale
+    :type scale_col: float 64
+    :param offset_col: Column offset
+    :type offset_col: float 64
+    :param scale_lin: Line scale
+    :type scale_lin: float 64
+    :param offset_lin: Line offset
+    :type offset_lin: float 64
+    :param scale_lon: Geodetic longitude scale
+    :type scale_lon: float 64
+    :param scale_lat: Geodetic latitude scale
+    :type scale_lat: float 64
+    :param scale_alt: Altitude scale
+    :type scale_alt: float 64
+    :return: sensor position (row, col) and jacobian d(row, col)/d(lon, lat, alt) of size (N,2,3)
+    :rtype: Tuple(np.ndarray, np.ndarray, np.ndarray)
+    """
+    nb_points = lon_norm.shape[0]
+    row_out = np.empty((nb_points), dtype=np.float64)
+    col_out = np.empty((nb_points), dtype=np.float64)
+    jacobian = np.empty((nb_points, 2, 3), dtype=np.float64)
+
+    # pylint: disable=not-an-iterable
+    for i in prange(nb_points):
+        num_c, num_c_dlon, num_c_dlat, num_c_dalt = polynomial_equation_and_derivatives(
+            lon_norm[i], lat_norm[i], alt_norm[i], num_col
+        )
+        den_c, den_c_dlon, den_c_dlat, den_c_dalt = polynomial_equation_and_derivatives(
+            lon_norm[i], lat_norm[i], alt_norm[i], den_col
+        )
+        num_l, num_l_dlon, num_l_dlat, num_l_dalt = polynomial_equation_and_derivatives(
+            lon_norm[i], lat_norm[i], alt_norm[i], num_lin
+        )
+        den_l, den_l_dlon, den_l_dlat, den_l_dalt = polynomial_equation_and_derivatives(
+            lon_norm[i], lat_norm[i], alt_norm[i], den_lin
+        )
+
+        row_out[i] = num_l / den_l * scale_lin + offset_lin
+        col_out[i] = num_c / den_c * scale_col + offset_col
+
+        coef_lin = scale_lin / (den_l * den_l)
+        coef_col = scale_col / (den_c * den_c)
+        jacobian[i, 0, 0] = coef_lin / scale_lon * (num_l_dlon * den_l - den_l_dlon * num_l)
+        jacobian[i, 0, 1] = coef_lin / scale_lat * (num_l_dlat * den_l - den_l_dlat * num_l)
+        jacobian[i, 0, 2] = coef_lin / scale_alt * (num_l_dalt * den_l - den_l_dalt * num_l)
+        jacobian[i, 1, 0] = coef_col / scale_lon * (num_c_dlon * den_c - den_c_dlon * num_c)
+        jacobian[i, 1, 1] = coef_col / scale_lat * (num_c_dlat * den_c - den_c_dlat * num_c)
+        jacobian[i, 1, 2] = coef_col / scale_alt * (num_c_dalt * den_c - den_c_dalt * num_c)
+
+    return row_out, col_out, jacobian
@@ -196,9 +196,56 @@ class RPCoptim(bindings_cpp.RPC, GeoModelTemplate):
 
         return res_optim
 
-    def direct_loc_dtm(self, row, col, dtm):
+    def direct_loc_h_two_altitudes(self, row, col, alt_first, alt_second, fill_nan=False):
         """
-        direct localization on dtm only if dtm's epsg code is 4326
+        direct localization of the same sensor positions at two altitudes.
+        Using inverse RPC, the iterative localization at alt_second starts from the solution at alt_first.
+
+        :param row:  line sensor position
+        :type row: float or 1D numpy.ndarray dtype=float64
+        :param col:  column sensor position
+        :type col: float or 1D numpy.ndarray dtype=float64
+        :param alt_first: first altitude
+        :type alt_first: float or 1D numpy.ndarray dtype=float64
+        :param alt_second: second altitude
+        :type alt_second: float or 1D numpy.ndarray dtype=float64
+        :param fill_nan: fill numpy.nan values with lon and lat offset if true (same as OTB/OSSIM), nan is returned
+            otherwise
+        :type fill_nan: boolean
+        :return: ground positions (lon,lat,h) at alt_first and at alt_second
+        :rtype: Tuple(numpy.ndarray (N,3), numpy.ndarray (N,3))
+        """
+        row = np.atleast_1d(np.asarray(row, dtype=np.float64))
+        col = np.atleast_1d(np.asarray(col, dtype=np.float64))
+        alt_first = np.broadcast_to(np.asarray(alt_first, dtype=np.float64), row.shape)
+        alt_second = np.broadcast_to(np.asarray(alt_second, dtype=np.float64), row.shape)
+
+        ground_first, ground_second = super().direct_loc_h_two_altitudes(row, col, alt_first, alt_second, fill_nan)
+        return np.array(ground_first).T, np.array(ground_second).T
+
+    def get_dtm_los_alt_bounds(self, dtm):
+        """
+        Altitude bounds of the lines of sight intersected with a DTM : DTM altitude range expressed in the RPC
+        coordinates system, with a 1 meter margin
+
+        :param dtm: dtm intersection c++ model
+        :type dtm: shareloc.bindings.dtm_intersection.cpp
+        :return: lines of sight minimum and maximum altitudes
+        :rtype: Tuple(float, float)
+        """
+        diff_alti_min, diff_alti_max = self.get_dtm_alt_offset(dtm.get_footprint_corners(), dtm)
+
+        (min_dtm, max_dtm) = (dtm.get_alt_min() - 1.0 + diff_alti_min, dtm.get_alt_max() + 1.0 + diff_alti_max)
+        if min_dtm < self.get_offset_alt() - self.get_scale_alt():
+            logging.debug("minimum dtm value is outside RPC validity domain, extrapolation will be done")
+        if max_dtm > self.get_offset_alt() + self.get_scale_alt():
+            logging.debug("maximum dtm value is outside RPC validity domain, extrapolation will be done")
+        return min_dtm, max_dtm
+
+    def direct_loc_dtm(self, row, col, dtm, los_alt_bounds=None):
+        """
+        direct localization on dtm, fully in c++ if the dtm coordinates system is EPSG 4326 or a projection
+        handled in c++ (UTM, Lambert-93 and RGF93 conic conformal zones, see dtm.has_projection())
 
         :param row:  line sensor position
         :type row: list or np.array
@@ -206,11 +253,14 @@ class RPCoptim(bindings_cpp.RPC, GeoModelTemplate):
         :type col: list or np.array
         :param dtm: dtm intersection c++ model
         :type dtm: shareloc.bindings.dtm_intersection.cpp
+        :param los_alt_bounds: lines of sight altitude bounds returned by get_dtm_los_alt_bounds(dtm),
+            computed if None (not used by the full c++ localization)
+        :type los_alt_bounds: Tuple(float, float)
         :return: ground position (lon,lat,h) in dtm coordinates system
         :rtype: numpy.ndarray 2D dimension with (N,3) shape, where N is number of input coordinates
         """
 
-        if dtm.get_epsg() == 4326:  # full c++
+        if dtm.has_projection():  # full c++
             res_optim = super().direct_loc_dtm(row, col, dtm)
 
             if not isinstance(res_optim[0], (list, np.ndarray)):
@@ -226,17 +276,13 @@ class RPCoptim(bindings_cpp.RPC, GeoModelTemplate):
 
         else:  # Beginning in python and core in c++
 
-            diff_alti_min, diff_alti_max = self.get_dtm_alt_offset(dtm.get_footprint_corners(), dtm)
-
             if not isinstance(col, (list, np.ndarray)):
                 row = np.array([row])
                 col = np.array([col])
 
-            (min_dtm, max_dtm) = (dtm.get_alt_min() - 1.0 + diff_alti_min, dtm.get_alt_max() + 1.0 + diff_alti_max)
-            if min_dtm < self.get_offset_alt() - self.get_scale_alt():
-                logging.debug("minimum dtm value is outside RPC validity domain, extrapolation will be done")
-            if max_dtm > self.get_offset_alt() + self.get_scale_alt():
-                logging.debug("maximum dtm value is outside RPC validity domain, extrapolation will be done")
+            if los_alt_bounds is None:
+                los_alt_bounds = self.get_dtm_los_alt_bounds(dtm)
+            (min_dtm, max_dtm) = los_alt_bounds
 
             los = self.los_extrema(row, col, min_dtm, max_dtm, epsg=dtm.get_epsg())
 
@@ -249,6 +295,44 @@ class RPCoptim(bindings_cpp.RPC, GeoModelTemplate):
 
         return res_optim
 
+    # pylint: disable=too-many-arguments
+    def direct_loc_grid_dtm(self, row0, col0, steprow, stepcol, nbrow, nbcol, dtm, warm_start_margin=-1.0):
+        """
+        direct localization grid on dtm, lines of sight of neighbouring pixels can be walked from
+        warm_start_margin above the previous pixel intersection (full c++ only, see direct_loc_dtm).
+        They are walked from the dtm top if the skipped part of the line of sight is not above the max altitude
+        of the dtm cells it crosses (occlusion), if this starting point is below the dtm
+        or if no intersection is found.
+
+        :param row0: grid origin (row)
+        :type row0: float
+        :param col0: grid origin (col)
+        :type col0: float
+        :param steprow: grid step (row)
+        :type steprow: float
+        :param stepcol: grid step (col)
+        :type stepcol: float
+        :param nbrow: grid nb row
+        :type nbrow: int
+        :param nbcol: grid nb col
+        :type nbcol: int
+        :param dtm: dtm intersection c++ model
+        :type dtm: shareloc.bindings.dtm_intersection.cpp
+        :param warm_start_margin: altitude margin above the previous pixel intersection, in meters.
+            All lines of sight are walked from the dtm top if negative (default, same localizations as
+            direct_loc_dtm). The warm start only pays off on dtm finer than the grid step.
+        :type warm_start_margin: float
+        :return: direct localization grid (lon,lat,h) in dtm coordinates system
+        :rtype: numpy.ndarray with (3, nbrow, nbcol) shape
+        """
+        if dtm.has_projection():  # full c++
+            res = super().direct_loc_grid_dtm(row0, col0, steprow, stepcol, nbrow, nbcol, dtm, warm_start_margin)
+            return np.array(res).reshape((3, nbrow, nbcol))
+
+        row, col = np.mgrid[0:nbrow, 0:nbcol]
+        res = self.direct_loc_dtm(row0 + steprow * row.ravel(), col0 + stepcol * col.ravel(), dtm)
+        return res.T.reshape((3, nbrow, nbcol))
+
     def inverse_loc(self, lon, lat, alt):
         """
         Inverse localization using c++ bindings
@@ -266,6 +350,21 @@ class RPCoptim(bindings_cpp.RPC, GeoModelTemplate):
 
         return np.array(row), np.array(col), np.array(alt)
 
+    def inverse_loc_with_jacobian(self, lon, lat, alt):
+        """
+        Inverse localization and its analytic jacobian in one evaluation using c++ bindings
+
+        :param lon: longitude position
+        :type lon: float or 1D numpy.ndarray dtype=float64
+        :param lat: latitude position
+        :type lat: float or 1D numpy.ndarray dtype=float64
+        :param alt: altitude
+        :type alt: float or 1D numpy.ndarray dtype=float64
+        :return: sensor position (row, col) and jacobian d(row, col)/d(lon, lat, alt) of size (N,2,3)
+        :rtype: tuple(1D np.array row position, 1D np.array col position, 3D np.array jacobian)
+        """
+        return super().inverse_loc_with_jacobian(np.atleast_1d(lon), np.atleast_1d(lat), np.atleast_1d(alt))
+
     def get_dtm_alt_offset(self, corners: np.ndarray, dtm: Union[DTMIntersection, bindings_cpp.DTMIntersection]):
         """
         returns min/max altitude offset between dtm coordinates system and RPC one
@@ -277,6 +376,8 @@ class RPCoptim(bindings_cpp.RPC, GeoModelTemplate):
         :return: min/max altimetric difference between RPC'sepsg minus dtm alti expressed in dtm epsg
         :rtype: list of float (1x2)
         """
+        if dtm.get_epsg() == self.epsg:
+            return [0.0, 0.0]
 
         alti_moy = (dtm.get_alt_min() + dtm.get_alt_max()) / 2.0
 
@@ -22,6 +22,11 @@
 This module contains the mathematical functions for shareloc
 """
 
+# Standard imports
+import logging
+from typing import Callable, List
+
+# Third party imports
 import numpy as np
 
 
@@ -166,3 +171,77 @@ def interpol_bilin_vectorized(
     lower_shift_col[delta_shift_col >= (nb_cols - 1)] = nb_cols - 2
 
     return inter(mats, delta_shift_col, delta_shift_row, lower_shift_col, lower_shift_row)
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+def refine_lattice_cells(
+    refined_cells: np.ndarray,
+    cell_size: int,
+    size: List[int],
+    check_nodes: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    tolerance: float,
+    nb_check_passes: int,
+    rng: np.random.Generator,
+    refine_cells: Callable[[np.ndarray], None] = None,
+    centers_first: bool = False,
+) -> np.ndarray:
+    """
+    Check the interpolation of a lattice on one node per cell, and refine wrong cells.
+    At each pass, one node of each cell not yet refined is checked by check_nodes (a random node, or the cell
+    center at the first pass if centers_first). Cells with an error above tolerance, and their neighbours,
+    are refined by refine_cells and marked as refined. Passes stop when no wrong cell is found.
+
+    :param refined_cells: refined cells mask (nb_cells_rows, nb_cells_cols), modified in place
+    :type refined_cells: 2D np.ndarray
+    :param cell_size: cell size in nodes, cell (i, j) covers nodes [i * cell_size, (i + 1) * cell_size[
+    :type cell_size: int
+    :param size: number of nodes [nb_rows, nb_cols], last cells may be smaller than cell_size
+    :type size: List[int]
+    :param check_nodes: function returning the interpolation error of nodes (rows, cols), nan errors are wrong
+    :type check_nodes: Callable
+    :param tolerance: maximum interpolation error
+    :type tolerance: float
+    :param nb_check_passes: maximum number of checks of each cell
+    :type nb_check_passes: int
+    :param rng: random generator of the checked nodes
+    :type rng: np.random.Generator
+    :param refine_cells: function refining the wrong cells (mask of cells), cells are only marked if None
+    :type refine_cells: Callable
+    :param centers_first: check cells centers at the first pass
+    :type centers_first: bool
+    :return: refined cells mask
+    :rtype: 2D np.ndarray
+    """
+    cell_rows, cell_cols = np.meshgrid(
+        np.arange(refined_cells.shape[0]), np.arange(refined_cells.shape[1]), indexing="ij"
+    )
+    cell_heights = np.minimum(cell_size, size[0] - cell_rows * cell_size)
+    cell_widths = np.minimum(cell_size, size[1] - cell_cols * cell_size)
+
+    for check_pass in range(nb_check_passes):
+        checked = ~refined_cells
+        if not np.any(checked):
+            break
+        if centers_first and check_pass == 0:
+            check_rows = cell_rows[checked] * cell_size + cell_heights[checked] // 2
+            check_cols = cell_cols[checked] * cell_size + cell_widths[checked] // 2
+        else:
+            check_rows = cell_rows[checked] * cell_size + rng.integers(0, cell_heights[checked])
+            check_cols = cell_cols[checked] * cell_size + rng.integers(0, cell_widths[checked])
+        errors = check_nodes(check_rows, check_cols)
+        wrong = ~(errors <= tolerance)
+        logging.debug("lattice refinement: max checked error %f", np.nanmax(errors, initial=0.0))
+
+        wrong_cells = np.zeros(refined_cells.shape, dtype=bool)
+        for cell_row, cell_col in zip(cell_rows[checked][wrong], cell_cols[checked][wrong]):
+            wrong_cells[max(cell_row - 1, 0) : cell_row + 2, max(cell_col - 1, 0) : cell_col + 2] = True
+        wrong_cells &= ~refined_cells
+        if not np.any(wrong_cells):
+            break
+        logging.debug("lattice refinement: %d cells refined", np.count_nonzero(wrong_cells))
+        if refine_cells is not None:
+            refine_cells(wrong_cells)
+        refined_cells |= wrong_cells
+
+    return refined_cells
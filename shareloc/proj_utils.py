@@ -23,10 +23,27 @@
 This module contains the projection functions for shareloc
 """
 
+# Standard imports
+from functools import lru_cache
+
+# Third party imports
 import numpy as np
 from rasterio import crs, warp
 
 
+@lru_cache(maxsize=None)
+def crs_from_epsg(epsg):
+    """
+    Get the CRS of an EPSG code, CRS objects are built once per code
+
+    :param epsg: EPSG code
+    :type epsg: int
+    :returns: coordinate reference system
+    :rtype: rasterio.crs.CRS
+    """
+    return crs.CRS.from_epsg(epsg)
+
+
 def coordinates_conversion(coords, epsg_in, epsg_out):
     """
     Convert coords from a SRS to another one.
@@ -39,8 +56,8 @@ def coordinates_conversion(coords, epsg_in, epsg_out):
     :returns: converted coordinates
     :rtype: numpy array of 2D coord (N,2) or 3D coords (N,3)
     """
-    srs_in = crs.CRS.from_epsg(epsg_in)
-    srs_out = crs.CRS.from_epsg(epsg_out)
+    srs_in = crs_from_epsg(epsg_in)
+    srs_out = crs_from_epsg(epsg_out)
     if (coords.size / 3 == 1 or coords.size / 2 == 1) and (coords.ndim == 1):
         coords = coords[np.newaxis, :]
     alti = None
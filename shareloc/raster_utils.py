@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+This module contains the tiled raster writing functions for shareloc
+"""
+
+# Standard imports
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Sequence
+
+# Third party imports
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+
+def image_tiles(size: List[int], tile_size: int) -> List[Window]:
+    """
+    Split an image in tiles, row by row
+
+    :param size: image size [nb_rows, nb_cols]
+    :type size: List[int]
+    :param tile_size: tile size in pixels
+    :type tile_size: int
+    :return: tiles windows
+    :rtype: List[rasterio.windows.Window]
+    """
+    return [
+        Window(col_off, row_off, min(tile_size, size[1] - col_off), min(tile_size, size[0] - row_off))
+        for row_off in range(0, size[0], tile_size)
+        for col_off in range(0, size[1], tile_size)
+    ]
+
+
+def write_tiled_geotiff(
+    output_filename: str,
+    profile: dict,
+    compute_tile: Callable[[Window], np.ndarray],
+    tile_size: int,
+    nb_workers: int = 1,
+    descriptions: Sequence[str] = None,
+):
+    """
+    Compute and write a tiled GeoTIFF tile by tile.
+    Tiles (see image_tiles) are computed by a thread pool and written as they complete,
+    at most 2 * nb_workers tiles are in memory at the same time.
+    Threads only speed up compute_tile functions which release the GIL.
+
+    :param output_filename: output GeoTIFF filename
+    :type output_filename: str
+    :param profile: rasterio profile of the output (driver, dtype, width, height, count, ...),
+        tiling options are set from tile_size
+    :type profile: dict
+    :param compute_tile: function returning the (count, tile height, tile width) data of a tile window
+    :type compute_tile: Callable
+    :param tile_size: tile size in pixels, multiple of 16
+    :type tile_size: int
+    :param nb_workers: number of threads
+    :type nb_workers: int
+    :param descriptions: bands descriptions
+    :type descriptions: Sequence[str]
+    """
+    if tile_size % 16 != 0:
+        raise ValueError(f"tile size {tile_size} must be a multiple of 16")
+
+    profile = dict(profile, tiled=True, blockxsize=tile_size, blockysize=tile_size)
+    with rasterio.open(output_filename, "w", **profile) as output_ds:
+        if descriptions is not None:
+            output_ds.descriptions = tuple(descriptions)
+        with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+            pending = {}
+            for tile in image_tiles([profile["height"], profile["width"]], tile_size):
+                pending[executor.submit(compute_tile, tile)] = tile
+                if len(pending) >= 2 * nb_workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        output_ds.write(future.result(), window=pending.pop(future))
+            for future, tile in pending.items():
+                output_ds.write(future.result(), window=tile)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for dense colocalization maps shareloc/geofunctions/dense_coloc.py
+"""
+
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+import rasterio
+
+# Shareloc imports
+from shareloc.geofunctions.dense_coloc import coloc_pixels, compute_dense_coloc_map
+from shareloc.geomodels import GeoModel
+from shareloc.image import Image
+
+# Shareloc test imports
+from ..helpers import DTMIntersection_constructor, data_path
+
+
+@pytest.mark.unit_tests
+@pytest.mark.filterwarnings("ignore", category=rasterio.errors.NotGeoreferencedWarning)
+def test_compute_dense_coloc_map_rpc(tmp_path):
+    """
+    Test dense colocalization map on DTM with RPC and RPCoptim models : map is close to exact colocalization,
+    pixels of exact cells are exact, tiles do not change the map
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"), roi=[50, 100, 250, 280])
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_py, dtm_cpp = DTMIntersection_constructor(dtm_file)
+
+    rows, cols = np.meshgrid(np.arange(0, 200, 3), np.arange(0, 180, 7), indexing="ij")
+    maps = []
+    for model_type, dtm in [("RPC", dtm_py), ("RPCoptim", dtm_cpp)]:
+        geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), model_type)
+        geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"), model_type)
+        output_filename = os.path.join(tmp_path, f"coloc_{model_type}.tif")
+        exact_cells = compute_dense_coloc_map(
+            geom_model_left, geom_model_right, dtm, left_im, output_filename, right_im, step=8, tile_size=64
+        )
+        assert exact_cells.shape == (25, 23)
+        assert 0 < np.count_nonzero(exact_cells) < exact_cells.size / 2
+        with rasterio.open(output_filename) as dataset:
+            assert dataset.shape == (200, 180)
+            coloc_map = dataset.read()
+        maps.append(coloc_map)
+
+        exact = coloc_pixels(geom_model_left, geom_model_right, dtm, rows.ravel(), cols.ravel(), left_im, right_im)
+        dense = coloc_map[:, rows.ravel(), cols.ravel()].T
+        np.testing.assert_allclose(dense, exact, rtol=0, atol=0.1)
+        exact_pixels = exact_cells[rows.ravel() // 8, cols.ravel() // 8]
+        np.testing.assert_allclose(dense[exact_pixels], exact[exact_pixels], rtol=0, atol=1e-9)
+
+    np.testing.assert_allclose(maps[0], maps[1], rtol=0, atol=1e-6)
+
+    geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+    geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"), "RPCoptim")
+    output_filename = os.path.join(tmp_path, "coloc_tile.tif")
+    compute_dense_coloc_map(geom_model_left, geom_model_right, dtm_cpp, left_im, output_filename, right_im, step=8)
+    with rasterio.open(output_filename) as dataset:
+        np.testing.assert_array_equal(dataset.read(), maps[1])
+
+
+@pytest.mark.unit_tests
+@pytest.mark.filterwarnings("ignore", category=rasterio.errors.NotGeoreferencedWarning)
+def test_compute_dense_coloc_map_grid(tmp_path):
+    """
+    Test dense colocalization map at constant altitude with grid models
+    """
+    grid_left = GeoModel(
+        os.path.join(data_path("ellipsoide", "P1BP--2017092838284574CP"), "GRID_P1BP--2017092838284574CP.tif"), "GRID"
+    )
+    grid_right = GeoModel(
+        os.path.join(data_path("ellipsoide", "P1BP--2017092838319324CP"), "GRID_P1BP--2017092838319324CP.tif"), "GRID"
+    )
+    # 2 sensor pixels per image pixel
+    image = Image(None)
+    image.set_metadata(100, 120, 1, [2.0, 0.0, 1000.0, 0.0, 2.0, 1500.0])
+
+    output_filename = os.path.join(tmp_path, "coloc.tif")
+    exact_cells = compute_dense_coloc_map(grid_left, grid_right, 100.0, image, output_filename, step=16, tile_size=32)
+    assert not np.any(exact_cells)
+    with rasterio.open(output_filename) as dataset:
+        coloc_map = dataset.read()
+
+    rows, cols = np.meshgrid(np.arange(0, 100, 9), np.arange(0, 120, 13), indexing="ij")
+    exact = coloc_pixels(grid_left, grid_right, 100.0, rows.ravel(), cols.ravel(), image)
+    np.testing.assert_allclose(coloc_map[:, rows.ravel(), cols.ravel()].T, exact, rtol=0, atol=2e-3)
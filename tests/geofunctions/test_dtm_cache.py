@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for prepared DTM cache shareloc/geofunctions/dtm_cache.py
+"""
+
+# Standard imports
+import glob
+import os
+import pickle
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Shareloc imports
+from shareloc.geofunctions import dtm_cache
+from shareloc.geofunctions.dtm_cache import prepared_dtm
+from shareloc.geofunctions.shared_dtm import SharedCppDTMIntersection, SharedDTMIntersection
+from shareloc.geomodels import GeoModel
+
+# Shareloc test imports
+from ..helpers import data_path
+
+
+@pytest.mark.unit_tests
+def test_prepared_dtm_cache(tmp_path, monkeypatch):
+    """
+    Test prepared DTM cache : cached DTMs are the read ones, second reading does not call dtm_reader,
+    options change the key, invalid entries are rebuilt
+    """
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    geoid_file = os.path.join(data_path(), "dtm", "geoid", "egm96_15.gtx")
+    geom_model = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+    row = np.arange(0.0, 500.0, 50.0)
+    col = np.arange(0.0, 500.0, 50.0)
+
+    dtm_read = prepared_dtm(dtm_file, geoid_file)
+    dtm_cached = prepared_dtm(dtm_file, geoid_file, cache_dir=tmp_path)
+    assert isinstance(dtm_cached, SharedCppDTMIntersection)
+    assert len(glob.glob(os.path.join(tmp_path, "*.dtm"))) == 1
+    np.testing.assert_array_equal(dtm_cached.get_alt_data(), dtm_read.get_alt_data())
+    np.testing.assert_array_equal(dtm_cached.get_alt_min_cell(), dtm_read.get_alt_min_cell())
+    np.testing.assert_array_equal(dtm_cached.get_transform(), dtm_read.get_transform())
+    np.testing.assert_array_equal(
+        geom_model.direct_loc_dtm(row, col, dtm_cached), geom_model.direct_loc_dtm(row, col, dtm_read)
+    )
+    assert len(pickle.dumps(dtm_cached)) < 1000
+
+    # cache hit : the DTM file is not read again, python DTM from the same entry
+    def fail_reader(*args):
+        raise AssertionError("dtm_reader called on cache hit")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(dtm_cache, "dtm_reader", fail_reader)
+        dtm_py_cached = prepared_dtm(dtm_file, geoid_file, cache_dir=tmp_path, cpp=False)
+    assert isinstance(dtm_py_cached, SharedDTMIntersection)
+    np.testing.assert_array_equal(np.ravel(dtm_py_cached.alt_max_cell), dtm_read.get_alt_max_cell())
+
+    # other options, other entry
+    prepared_dtm(dtm_file, cache_dir=tmp_path)
+    assert len(glob.glob(os.path.join(tmp_path, "*.dtm"))) == 2
+
+    # invalid entry is rebuilt
+    for metadata_filename in glob.glob(os.path.join(tmp_path, "*.json")):
+        with open(metadata_filename, "w", encoding="utf8") as metadata_file:
+            metadata_file.write("{")
+    dtm_rebuilt = prepared_dtm(dtm_file, geoid_file, cache_dir=tmp_path)
+    np.testing.assert_array_equal(dtm_rebuilt.get_alt_data(), dtm_read.get_alt_data())
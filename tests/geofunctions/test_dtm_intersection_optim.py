@@ -37,6 +37,7 @@ from shareloc.dtm_reader import dtm_reader
 # Shareloc imports
 from shareloc.geofunctions.dtm_intersection import DTMIntersection
 from shareloc.geomodels import GeoModel
+from shareloc.proj_utils import coordinates_conversion
 
 # Shareloc test imports
 from ..helpers import data_path
@@ -567,3 +568,116 @@ def test_intersection_n_los_dtm():
     res_py = dtm_ventoux_py.intersection_n_los_dtm(los)
 
     np.testing.assert_array_equal(res_optim, res_py)
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize(
+    "epsg,lon_center,lat_center",
+    [(32631, 5.0, 44.0), (32725, -33.0, -30.0), (25832, 9.0, 50.0), (2154, 3.0, 46.5), (3944, 3.0, 44.0)],
+)
+def test_geodetic_to_ter(epsg, lon_center, lat_center):
+    """
+    Test c++ conversion of WGS84 geodetic coordinates to projected dtm coordinates systems against rasterio,
+    projection is kept by pickling
+    """
+    dtm = bindings_cpp.DTMIntersection()
+    dtm.set_epsg(epsg)
+    dtm = pickle.loads(pickle.dumps(dtm))
+    assert dtm.has_projection()
+
+    rng = np.random.default_rng(0)
+    coords = np.stack(
+        (lon_center + rng.uniform(-3.0, 3.0, 50), lat_center + rng.uniform(-2.0, 2.0, 50), np.zeros(50)), axis=1
+    )
+    ter = np.array([dtm.geodetic_to_ter(lon, lat) for lon, lat in coords[:, 0:2]])
+    np.testing.assert_allclose(ter, coordinates_conversion(coords, 4326, epsg)[:, 0:2], rtol=0, atol=1e-6)
+
+    dtm.set_epsg(3857)
+    assert not dtm.has_projection()
+
+
+@pytest.mark.unit_tests
+def test_dtm_intersection_zero_copy():
+    """
+    Test C++ DTMIntersection construction without copy : altitudes are a read only view on the input array,
+    cells min/max altitudes views are the init_min_max ones, pickling keeps the data
+    """
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_image = dtm_reader(dtm_file)
+    dtm_ventoux_optim = bindings_cpp.DTMIntersection(
+        dtm_image.epsg,
+        dtm_image.alt_data,
+        dtm_image.nb_rows,
+        dtm_image.nb_columns,
+        dtm_image.transform,
+    )
+
+    alt_data = dtm_ventoux_optim.get_alt_data()
+    assert isinstance(alt_data, np.ndarray)
+    assert np.shares_memory(alt_data, dtm_image.alt_data)
+    assert not alt_data.flags.writeable
+    alt_min_cell, alt_max_cell = bindings_cpp.init_min_max(alt_data, dtm_image.nb_rows, dtm_image.nb_columns)
+    np.testing.assert_array_equal(dtm_ventoux_optim.get_alt_min_cell(), alt_min_cell)
+    np.testing.assert_array_equal(dtm_ventoux_optim.get_alt_max_cell(), alt_max_cell)
+    # getters return views on the same buffers, not copies
+    assert np.shares_memory(dtm_ventoux_optim.get_alt_min_cell(), dtm_ventoux_optim.get_alt_min_cell())
+
+    dtm_deserialized = pickle.loads(pickle.dumps(dtm_ventoux_optim))
+    np.testing.assert_array_equal(dtm_deserialized.get_alt_data(), alt_data)
+    np.testing.assert_array_equal(dtm_deserialized.get_alt_max_cell(), alt_max_cell)
+    assert dtm_deserialized.interpolate(10.5, 20.5) == dtm_ventoux_optim.interpolate(10.5, 20.5)
+
+    # non float64 inputs are converted once
+    dtm_int = bindings_cpp.DTMIntersection(
+        dtm_image.epsg,
+        dtm_image.alt_data.astype(np.int32),
+        dtm_image.nb_rows,
+        dtm_image.nb_columns,
+        dtm_image.transform,
+    )
+    np.testing.assert_array_equal(dtm_int.get_alt_data(), np.ravel(dtm_image.alt_data.astype(np.int32)))
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize(
+    "dtm_path",
+    [["srtm90_non_void_filled", "N44E005.hgt"], ["srtm90_resampled_UTM31", "N44E005_UTM.tif"]],
+)
+def test_interpolate_n(dtm_path):
+    """
+    Test DTMIntersection interpolate_n : same altitudes as interpolate for python and c++ DTMs,
+    nan outside the DTM, WGS84 positions on projected DTM
+    """
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", *dtm_path)
+    dtm_image = dtm_reader(dtm_file)
+    dtm_args = (dtm_image.epsg, dtm_image.alt_data, dtm_image.nb_rows, dtm_image.nb_columns, dtm_image.transform)
+    dtm_py = DTMIntersection(*dtm_args)
+    dtm_cpp = bindings_cpp.DTMIntersection(*dtm_args)
+
+    rng = np.random.default_rng(0)
+    index = np.stack(
+        (rng.uniform(-5.0, dtm_image.nb_rows + 5.0, 2000), rng.uniform(-5.0, dtm_image.nb_columns + 5.0, 2000)),
+        axis=1,
+    )
+    index = np.concatenate((index, [[0.0, 0.0], [dtm_image.nb_rows - 1.0, dtm_image.nb_columns - 1.0]]))
+    positions = np.array([dtm_cpp.index_to_ter([row, col, 0.0])[0:2] for row, col in index])
+    positions[0] = np.nan
+
+    index = np.array([dtm_cpp.ter_to_index([*pos, 0.0])[0:2] for pos in positions])
+    inside = np.all((index >= 0.0) & (index <= [dtm_image.nb_rows - 1.0, dtm_image.nb_columns - 1.0]), axis=1)
+    alt_ref = np.full(len(index), np.nan)
+    alt_ref[inside] = [dtm_cpp.interpolate(row, col) for row, col in index[inside]]
+
+    alt_cpp = dtm_cpp.interpolate_n(positions)
+    alt_py = dtm_py.interpolate_n(positions)
+    np.testing.assert_array_equal(alt_cpp, alt_ref)
+    np.testing.assert_allclose(alt_py, alt_ref, rtol=0, atol=1e-9)
+
+    # DTM corners are left out : projection round trip can move them outside
+    geodetic = positions[:-2]
+    if dtm_image.epsg != 4326:
+        geodetic = coordinates_conversion(geodetic, dtm_image.epsg, 4326)
+    np.testing.assert_allclose(dtm_cpp.interpolate_n(geodetic, crs=4326), alt_ref[:-2], rtol=0, atol=1e-3)
+    np.testing.assert_allclose(dtm_py.interpolate_n(geodetic, crs=4326), alt_ref[:-2], rtol=0, atol=1e-3)
+    with pytest.raises(ValueError):
+        dtm_cpp.interpolate_n(positions, crs=3857)
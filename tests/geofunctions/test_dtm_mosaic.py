@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for virtual DTM mosaic shareloc/geofunctions/dtm_mosaic.py
+"""
+
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+import rasterio
+from rasterio.windows import Window
+
+import bindings_cpp
+
+# Shareloc imports
+from shareloc.dtm_reader import dtm_reader
+from shareloc.geofunctions.dtm_mosaic import DTMMosaic
+from shareloc.geomodels import GeoModel
+
+# Shareloc test imports
+from ..helpers import data_path
+
+
+def split_dtm(dtm_image, directory, tile_size):
+    """
+    Write a filled DTM as tiles of tile_size + 1 pixels sharing their borders, like SRTM tiles
+    """
+    profile = {
+        "driver": "GTiff",
+        "dtype": dtm_image.data.dtype,
+        "count": 1,
+        "crs": dtm_image.dataset.crs,
+    }
+    for row in range(0, dtm_image.nb_rows - 1, tile_size):
+        for col in range(0, dtm_image.nb_columns - 1, tile_size):
+            window = Window(col, row, tile_size + 1, tile_size + 1)
+            data = dtm_image.data[row : row + tile_size + 1, col : col + tile_size + 1]
+            with rasterio.open(
+                os.path.join(directory, f"tile_{row}_{col}.tif"),
+                "w",
+                height=data.shape[0],
+                width=data.shape[1],
+                transform=dtm_image.dataset.window_transform(window),
+                **profile,
+            ) as tile:
+                tile.write(data, 1)
+
+
+@pytest.mark.unit_tests
+def test_dtm_mosaic(tmp_path):
+    """
+    Test DTM mosaic : windows across tiles borders are the ones of the whole DTM, only needed tiles are read,
+    direct localization on a mosaic window is the one on the whole DTM
+    """
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    geoid_file = os.path.join(data_path(), "dtm", "geoid", "egm96_15.gtx")
+    dtm_image = dtm_reader(dtm_file, geoid_file)
+    split_dtm(dtm_image, tmp_path, 600)
+
+    mosaic = DTMMosaic(str(tmp_path), geoid_file, cache_size=2)
+    assert (mosaic.nb_rows, mosaic.nb_columns) == (dtm_image.nb_rows, dtm_image.nb_columns)
+    np.testing.assert_allclose(mosaic.transform.to_gdal(), dtm_image.transform, rtol=0, atol=1e-12)
+    assert mosaic.nb_tile_reads == 0
+
+    # window across the two upper tiles
+    dtm = mosaic.get_dtm([100, 550, 200, 650], roi_is_in_physical_space=False, margin=0)
+    assert mosaic.nb_tile_reads == 2
+    np.testing.assert_allclose(dtm.get_alt_data().reshape(101, 101), dtm_image.alt_data[100:201, 550:651], atol=1e-9)
+
+    # upper tiles are in cache, lower tiles are read
+    alt_min, alt_max = mosaic.alt_min_max([100, 100, 1100, 1100], roi_is_in_physical_space=False)
+    assert mosaic.nb_tile_reads == 4
+    np.testing.assert_allclose([alt_min, alt_max], [dtm_image.alt_data.min(), dtm_image.alt_data.max()])
+    mosaic.get_dtm([700, 700, 800, 800], roi_is_in_physical_space=False)
+    assert mosaic.nb_tile_reads == 4
+
+    # direct localization on the mosaic window containing the image footprint, in physical space
+    geom_model = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+    dtm_full = bindings_cpp.DTMIntersection(
+        dtm_image.epsg, dtm_image.alt_data, dtm_image.nb_rows, dtm_image.nb_columns, dtm_image.transform
+    )
+    row = np.arange(0.0, 600.0, 50.0)
+    col = np.arange(0.0, 600.0, 50.0)
+    footprint = geom_model.direct_loc_dtm(row, col, dtm_full)
+    roi = [footprint[:, 1].min(), footprint[:, 0].min(), footprint[:, 1].max(), footprint[:, 0].max()]
+    dtm_window = mosaic.get_dtm(roi, margin=2)
+    assert dtm_window.get_nb_rows() < dtm_image.nb_rows
+    # the window altitudes range changes the first line of sight steps, results agree up to intersection precision
+    # (measured 8e-8 degrees and 6e-4 meters)
+    footprint_window = geom_model.direct_loc_dtm(row, col, dtm_window)
+    np.testing.assert_allclose(footprint_window[:, 0:2], footprint[:, 0:2], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(footprint_window[:, 2], footprint[:, 2], rtol=0, atol=1e-3)
+
+    # pixels outside tiles are filled with fill_value
+    mosaic = DTMMosaic(sorted(str(path) for path in tmp_path.iterdir())[:3], geoid_file, fill_value=-10.0)
+    dtm = mosaic.get_dtm([1150, 1150, 1160, 1160], roi_is_in_physical_space=False, margin=0, cpp=False)
+    assert np.all(dtm.alt_data == -10.0)
+    # altitudes range of a region of interest in the gap between tiles, or partly in it, includes fill_value
+    assert mosaic.alt_min_max([1150, 1150, 1160, 1160], roi_is_in_physical_space=False) == (-10.0, -10.0)
+    alt_min, alt_max = mosaic.alt_min_max([550, 550, 650, 650], roi_is_in_physical_space=False)
+    assert alt_min == -10.0 and alt_max == max(mosaic.tiles_alt_max.values())
+    mosaic = DTMMosaic(sorted(str(path) for path in tmp_path.iterdir())[:3], geoid_file)
+    assert mosaic.alt_min_max([1150, 1150, 1160, 1160], roi_is_in_physical_space=False) == (0.0, 0.0)
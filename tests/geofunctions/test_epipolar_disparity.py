@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for disparity range prediction shareloc/geofunctions/epipolar_disparity.py
+"""
+
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Shareloc imports
+from shareloc.geofunctions.epipolar_disparity import compute_tiles_disparity_range
+from shareloc.geofunctions.localization import coloc
+from shareloc.geofunctions.rectification import (
+    compute_stereorectification_epipolar_grids,
+    positions_to_displacement_grid,
+)
+from shareloc.geofunctions.rectification_grid import regular_grid_interpolation
+from shareloc.geomodels import GeoModel
+from shareloc.image import Image
+
+# Shareloc test imports
+from ..helpers import DTMIntersection_constructor, data_path
+
+
+def interpolate_grid(grid, epi_step, rows, cols):
+    """
+    Bilinear interpolation of an epipolar grid at epipolar positions
+    """
+    grid = np.ascontiguousarray(np.transpose(grid[:, :, 0:2], (1, 0, 2)))
+    positions = np.ascontiguousarray(np.stack((cols, rows), axis=1))
+    return regular_grid_interpolation(grid, positions, 0.0, 0.0, float(epi_step), float(epi_step), 0)
+
+
+@pytest.mark.unit_tests
+def test_compute_tiles_disparity_range():
+    """
+    Test per tile disparity ranges on DTM : disparities of random epipolar pixels localized on the DTM,
+    found by a dense search along the right epipolar line, are inside the range of their tile,
+    and per tile DTM ranges are tighter than the DTM global altitude range.
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+    geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"))
+    geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"))
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_py, dtm_cpp = DTMIntersection_constructor(dtm_file)
+
+    epi_step = 30
+    tile_size = 128
+    left_grid, right_grid, epipolar_size, _ = compute_stereorectification_epipolar_grids(
+        left_im, geom_model_left, right_im, geom_model_right, dtm_py, epi_step, 50
+    )
+    disparity_range = compute_tiles_disparity_range(
+        geom_model_left, geom_model_right, left_grid, right_grid, epi_step, epipolar_size, dtm_py, tile_size
+    )
+    assert disparity_range.shape == (5, 5, 2)
+    assert np.all(disparity_range[:, :, 0] < disparity_range[:, :, 1])
+
+    # same ranges with cpp DTM and displacement grids
+    left_disp, right_disp, _ = positions_to_displacement_grid(np.copy(left_grid), np.copy(right_grid), epi_step)
+    np.testing.assert_array_equal(
+        compute_tiles_disparity_range(
+            geom_model_left,
+            geom_model_right,
+            left_disp,
+            right_disp,
+            epi_step,
+            epipolar_size,
+            dtm_cpp,
+            tile_size,
+            is_displacement_grid=True,
+        ),
+        disparity_range,
+    )
+
+    global_range = compute_tiles_disparity_range(
+        geom_model_left,
+        geom_model_right,
+        left_grid,
+        right_grid,
+        epi_step,
+        epipolar_size,
+        (dtm_py.get_alt_min(), dtm_py.get_alt_max()),
+        tile_size,
+    )
+    assert np.all(global_range[:, :, 0] <= disparity_range[:, :, 0])
+    assert np.all(global_range[:, :, 1] >= disparity_range[:, :, 1])
+    assert np.mean(disparity_range[:, :, 1] - disparity_range[:, :, 0]) < 0.2 * np.mean(
+        global_range[:, :, 1] - global_range[:, :, 0]
+    )
+
+    rng = np.random.default_rng(0)
+    for epi_row, epi_col in rng.uniform(0, epipolar_size[0] - 1, (50, 2)):
+        left_sensor = interpolate_grid(left_grid, epi_step, np.array([epi_row]), np.array([epi_col]))
+        ground = geom_model_left.direct_loc_dtm(left_sensor[:, 0], left_sensor[:, 1], dtm_py)
+        right_sensor = np.squeeze(
+            coloc(geom_model_left, geom_model_right, left_sensor[:, 0], left_sensor[:, 1], ground[:, 2])
+        )
+
+        candidates = np.arange(epi_col - 500, epi_col + 500, 0.02)
+        right_positions = interpolate_grid(right_grid, epi_step, np.full(candidates.size, epi_row), candidates)
+        distance = np.hypot(right_positions[:, 0] - right_sensor[0], right_positions[:, 1] - right_sensor[1])
+        assert np.min(distance) < 0.05
+        disparity = candidates[np.argmin(distance)] - epi_col
+
+        tile_range = disparity_range[int(epi_row // tile_size), int(epi_col // tile_size)]
+        assert tile_range[0] <= disparity <= tile_range[1]
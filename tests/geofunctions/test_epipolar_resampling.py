@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for epipolar resampling shareloc/geofunctions/epipolar_resampling.py
+"""
+
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+from scipy import ndimage
+
+# Shareloc imports
+from shareloc.geofunctions.epipolar_resampling import resample_epipolar_image, resample_window
+from shareloc.geofunctions.rectification import compute_stereorectification_epipolar_grids, write_epipolar_grid
+from shareloc.geofunctions.rectification_grid import RectificationGrid
+from shareloc.geomodels import GeoModel
+from shareloc.image import Image
+from shareloc.proj_utils import transform_physical_point_to_index
+
+# Shareloc test imports
+from ..helpers import data_path
+
+
+@pytest.mark.unit_tests
+def test_resample_window():
+    """
+    Test window interpolation kernels : both kernels reproduce linear functions,
+    positions whose kernel support is outside the window are nan
+    """
+    rows, cols = np.mgrid[0:20, 0:30].astype(np.float64)
+    window = np.stack([2.0 * rows + 3.0 * cols + 1.0, -rows])
+
+    pos_rows = np.array([[2.3, 10.7, 16.01], [0.2, 18.5, np.nan]])
+    pos_cols = np.array([[4.1, 20.25, 26.9], [5.0, 3.0, 7.0]])
+    for method in [0, 1]:
+        out = resample_window(np.ascontiguousarray(window), pos_rows, pos_cols, method)
+        np.testing.assert_allclose(out[0, 0, :], 2.0 * pos_rows[0, :] + 3.0 * pos_cols[0, :] + 1.0, rtol=0, atol=1e-10)
+        np.testing.assert_allclose(out[1, 0, :], -pos_rows[0, :], rtol=0, atol=1e-10)
+        assert np.isnan(out[:, 1, 2]).all()
+    # bicubic needs one more pixel around the position
+    assert np.isnan(resample_window(window, pos_rows, pos_cols, 1)[:, 1, 0:2]).all()
+    assert not np.isnan(resample_window(window, pos_rows, pos_cols, 0)[:, 1, 0:2]).any()
+
+
+@pytest.mark.unit_tests
+@pytest.mark.filterwarnings("ignore", category=rasterio.errors.NotGeoreferencedWarning)
+def test_resample_epipolar_image(tmp_path):
+    """
+    Test tiled epipolar resampling : bilinear resampling must be equal to a full image interpolation
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+    geom_model_left = os.path.join(data_path(), "rectification", "left_image.geom")
+    geom_model_right = os.path.join(data_path(), "rectification", "right_image.geom")
+
+    epi_step = 30
+    left_grid, _, epipolar_size, _ = compute_stereorectification_epipolar_grids(
+        left_im, GeoModel(geom_model_left), right_im, GeoModel(geom_model_right), 0.0, epi_step, 50
+    )
+    grid_filename = os.path.join(tmp_path, "left_grid.tif")
+    write_epipolar_grid(left_grid, grid_filename, Affine(epi_step, 0, -epi_step * 0.5, 0, epi_step, -epi_step * 0.5))
+    grid = RectificationGrid(grid_filename)
+
+    output_filename = os.path.join(tmp_path, "left_epi.tif")
+    resample_epipolar_image(left_im, grid, output_filename, epipolar_size, "bilinear", tile_size=128, nb_workers=2)
+    with rasterio.open(output_filename) as output_ds:
+        assert output_ds.shape == tuple(epipolar_size)
+        epipolar_image = output_ds.read(1)
+
+    # reference : interpolation of the whole sensor image
+    epi_rows, epi_cols = np.mgrid[0 : epipolar_size[0], 0 : epipolar_size[1]].astype(np.float64)
+    positions = grid.interpolate(np.stack([epi_cols.ravel(), epi_rows.ravel()], axis=1))
+    rows, cols = transform_physical_point_to_index(left_im.trans_inv, positions[:, 1], positions[:, 0])
+    sensor_image = left_im.dataset.read(1).astype(np.float64)
+    reference = ndimage.map_coordinates(sensor_image, [rows, cols], order=1, mode="constant", cval=np.nan)
+    reference = np.reshape(reference, epipolar_size)
+    inside = (rows >= 0) & (rows <= left_im.nb_rows - 2) & (cols >= 0) & (cols <= left_im.nb_columns - 2)
+    inside = np.reshape(inside, epipolar_size)
+
+    assert not np.isnan(epipolar_image[inside]).any()
+    np.testing.assert_allclose(epipolar_image[inside], reference[inside], rtol=0, atol=1e-3)
+    assert np.isnan(epipolar_image[np.isnan(reference)]).all()
+
+    # bicubic resampling on the same tiles
+    bicubic_filename = os.path.join(tmp_path, "left_epi_bicubic.tif")
+    resample_epipolar_image(left_im, grid_filename, bicubic_filename, epipolar_size, tile_size=256)
+    with rasterio.open(bicubic_filename) as output_ds:
+        bicubic_image = output_ds.read(1)
+    assert np.isnan(bicubic_image[np.isnan(reference)]).all()
+    assert np.nanmean(np.abs(bicubic_image - epipolar_image)) < 5.0
@@ -34,8 +34,9 @@ import pytest
 import bindings_cpp
 from shareloc.dtm_reader import dtm_reader
 from shareloc.geofunctions.dtm_intersection import DTMIntersection
-from shareloc.geofunctions.localization import Localization
+from shareloc.geofunctions.localization import Localization, LocalizationContext
 from shareloc.geofunctions.localization import coloc as coloc_rpc
+from shareloc.geofunctions.localization import coloc_two_altitudes, direct_loc_dtm_height_iteration
 from shareloc.geomodels import GeoModel
 
 # Shareloc imports
@@ -48,7 +49,7 @@ from shareloc.proj_utils import (
 )
 
 # Shareloc test imports
-from ..helpers import data_path
+from ..helpers import DTMIntersection_constructor, data_path
 
 
 @pytest.mark.unit_tests
@@ -707,6 +708,150 @@ def test_colocalization(col, row, alt):
     assert col == pytest.approx(col_coloc_optim, abs=1e-1)
 
 
+@pytest.mark.unit_tests
+def test_colocalization_two_altitudes():
+    """
+    Test colocalization at two altitudes : same results as two colocalizations,
+    for python and cpp RPC and for cpp bindings
+    """
+    geom_left = os.path.join(data_path(), "rectification", "left_image.geom")
+    geom_right = os.path.join(data_path(), "rectification", "right_image.geom")
+    row = np.array([5010.5, 5250.0, 5490.25, np.nan])
+    col = np.array([5020.0, 5300.5, 5480.0, 5100.0])
+    alt_low = np.array([50.0, 300.0, 1000.0, 0.0])
+    alt_high = alt_low + 100.0
+
+    for model_type in ["RPC", "RPCoptim"]:
+        model_left = GeoModel(geom_left, model_type)
+        model_right = GeoModel(geom_right, model_type)
+        coloc_low, coloc_high = coloc_two_altitudes(model_right, model_left, row, col, alt_low, alt_high)
+        for alt, fused in [(alt_low, coloc_low), (alt_high, coloc_high)]:
+            reference = np.stack(coloc_rpc(model_right, model_left, row, col, alt), axis=1)
+            np.testing.assert_allclose(fused, reference, rtol=0, atol=1e-8)
+
+    model_left = GeoModel(geom_left, "RPCoptim")
+    model_right = GeoModel(geom_right, "RPCoptim")
+    for idx in range(3):
+        coloc_low, coloc_high = bindings_cpp.coloc_two_altitudes(
+            model_right, model_left, row[idx], col[idx], alt_low[idx], alt_high[idx]
+        )
+        np.testing.assert_allclose(
+            coloc_low, bindings_cpp.coloc(model_right, model_left, row[idx], col[idx], alt_low[idx]), rtol=0, atol=1e-8
+        )
+        np.testing.assert_allclose(
+            coloc_high,
+            bindings_cpp.coloc(model_right, model_left, row[idx], col[idx], alt_high[idx]),
+            rtol=0,
+            atol=1e-8,
+        )
+
+
+@pytest.mark.unit_tests
+def test_localization_context():
+    """
+    Test localization context : same results as Localization and coloc on geographic and projected DTM,
+    invariants computed at construction
+    """
+    geom_left = os.path.join(data_path(), "rectification", "left_image.geom")
+    geom_right = os.path.join(data_path(), "rectification", "right_image.geom")
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_py, dtm_cpp = DTMIntersection_constructor(dtm_file)
+    row = np.array([10.5, 250.0, 490.25, np.nan])
+    col = np.array([20.0, 300.5, 480.0, 100.0])
+
+    for model_type, dtm in [("RPC", dtm_py), ("RPCoptim", dtm_cpp)]:
+        model_left = GeoModel(geom_left, model_type)
+        model_right = GeoModel(geom_right, model_type)
+        context = LocalizationContext(model_left, model_right, dtm)
+        assert context.localization1.los_alt_bounds == (dtm.get_alt_min() - 1.0, dtm.get_alt_max() + 1.0)
+        for _ in range(2):
+            np.testing.assert_array_equal(context.direct(row, col), Localization(model_left, dtm).direct(row, col))
+            np.testing.assert_array_equal(
+                context.direct(row, col, 100.0), Localization(model_left, dtm).direct(row, col, 100.0)
+            )
+            np.testing.assert_array_equal(
+                np.array(context.coloc(row, col)), np.array(coloc_rpc(model_left, model_right, row, col, dtm))
+            )
+        ground = context.direct(row[:3], col[:3])
+        np.testing.assert_array_equal(
+            np.array(context.inverse(ground[:, 0], ground[:, 1], ground[:, 2])),
+            np.array(Localization(model_left, dtm).inverse(ground[:, 0], ground[:, 1], ground[:, 2])),
+        )
+
+    # projected DTM : altitude bounds include the DTM to model altitude offset
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_resampled_UTM31", "N44E005_UTM.tif")
+    dtm_image = dtm_reader(dtm_file, geoid_filename=None, roi=None, roi_is_in_physical_space=False)
+    dtm_utm = DTMIntersection(
+        dtm_image.epsg, dtm_image.alt_data, dtm_image.nb_rows, dtm_image.nb_columns, dtm_image.transform
+    )
+    model_left = GeoModel(geom_left)
+    context = LocalizationContext(model_left, elevation=dtm_utm, epsg=4326)
+    diff_alti_min, diff_alti_max = model_left.get_dtm_alt_offset(dtm_utm.get_footprint_corners(), dtm_utm)
+    assert context.localization1.los_alt_bounds == (
+        dtm_utm.get_alt_min() - 1.0 + diff_alti_min,
+        dtm_utm.get_alt_max() + 1.0 + diff_alti_max,
+    )
+    np.testing.assert_array_equal(
+        context.direct(row[:3], col[:3]), Localization(model_left, dtm_utm, epsg=4326).direct(row[:3], col[:3])
+    )
+
+    with pytest.raises(ValueError):
+        context.coloc(row, col)
+
+    # grid inverse localization predictor, of model 2 only
+    _, gri = prepare_loc()
+    _, gri_direct = prepare_loc()
+    coloc_rpc(gri_direct, gri, np.array([100.5]), np.array([200.5]), 0.0)
+    assert gri_direct.pred_ofset_scale_lon is None
+    assert gri.pred_ofset_scale_lon is not None
+    context = LocalizationContext(gri, gri, 0.0)
+    row_coloc, col_coloc, _ = context.coloc(np.array([100.5, 300.5]), np.array([200.5, 400.5]))
+    np.testing.assert_allclose(row_coloc, [100.5, 300.5], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(col_coloc, [200.5, 400.5], rtol=0, atol=1e-6)
+
+
+@pytest.mark.unit_tests
+def test_direct_loc_dtm_height_iteration():
+    """
+    Test height iteration direct localization on dtm : same localizations as the dtm ray march,
+    occluded points behind a wall are localized by the ray march
+    """
+    geom = os.path.join(data_path(), "rectification", "left_image.geom")
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_image = dtm_reader(dtm_file)
+    row, col = np.mgrid[0:600:30, 0:600:30]
+    row = row.ravel().astype(np.float64)
+    col = col.ravel().astype(np.float64)
+    row[0] = np.nan
+
+    # 300 meters wall north of the image center
+    alt_data = np.array(dtm_image.alt_data)
+    wall_row = int((44.2295 - dtm_image.transform[3]) / dtm_image.transform[5])
+    alt_data[wall_row - 1 : wall_row + 1, :] += 300.0
+
+    for model_type, dtm_class in [("RPC", DTMIntersection), ("RPCoptim", bindings_cpp.DTMIntersection)]:
+        model = GeoModel(geom, model_type)
+        for altitudes in [dtm_image.alt_data, alt_data]:
+            dtm = dtm_class(dtm_image.epsg, altitudes, dtm_image.nb_rows, dtm_image.nb_columns, dtm_image.transform)
+            res_ref = model.direct_loc_dtm(row, col, dtm)
+            res, counts = direct_loc_dtm_height_iteration(model, row, col, dtm)
+            assert counts["height_iteration"] + counts["ray_march"] == row.size - 1
+            assert (counts["ray_march"] > 0) == (altitudes is alt_data)
+            assert np.all(np.isnan(res[0]))
+            np.testing.assert_allclose(res[1:, :2], res_ref[1:, :2], rtol=0, atol=2e-7)
+            np.testing.assert_allclose(res[1:, 2], res_ref[1:, 2], rtol=0, atol=1e-2)
+
+        localization = Localization(model, dtm, dtm_strategy="height_iteration")
+        np.testing.assert_array_equal(localization.direct(row, col), res)
+        assert localization.dtm_strategy_counts == counts
+
+    with pytest.raises(ValueError):
+        Localization(model, dtm, dtm_strategy="bisection")
+    _, gri = prepare_loc()
+    with pytest.raises(ValueError):
+        Localization(gri, dtm, dtm_strategy="height_iteration")
+
+
 @pytest.mark.parametrize("col,row,h", [(500.0, 200.0, 100.0)])
 @pytest.mark.unit_tests
 def test_sensor_coloc_using_geotransform(col, row, h):
@@ -107,11 +107,13 @@ def test_compute_stereorectification_epipolar_grids_geomodel_rpc(init_rpc_geom_m
     ).read()
 
     # Check epipolar grids
-    np.testing.assert_array_equal(reference_left_grid[1], left_grid[:, :, 0])
-    np.testing.assert_array_equal(reference_left_grid[0], left_grid[:, :, 1])
+    # the second altitude inverse iterative localization is warm started from the first one (Newton stopping
+    # tolerance 1e-6) : grids differ from the references by less than 1.6e-9 pixel
+    np.testing.assert_allclose(reference_left_grid[1], left_grid[:, :, 0], rtol=0, atol=5.0e-9)
+    np.testing.assert_allclose(reference_left_grid[0], left_grid[:, :, 1], rtol=0, atol=5.0e-9)
 
-    np.testing.assert_array_equal(reference_right_grid[1], right_grid[:, :, 0])
-    np.testing.assert_allclose(reference_right_grid[0], right_grid[:, :, 1], atol=2.0e-12)
+    np.testing.assert_allclose(reference_right_grid[1], right_grid[:, :, 0], rtol=0, atol=5.0e-9)
+    np.testing.assert_allclose(reference_right_grid[0], right_grid[:, :, 1], rtol=0, atol=5.0e-9)
 
     # Check mean_baseline_ratio
     reference_mean_br = 0.7040047235162911
@@ -178,11 +180,13 @@ def test_compute_stereorectification_epipolar_grids_geomodel_rpc_displacement(in
     ).read()
 
     # Check epipolar grids
-    np.testing.assert_array_equal(reference_left_grid[1], left_grid[:, :, 0])
-    np.testing.assert_array_equal(reference_left_grid[0], left_grid[:, :, 1])
+    # the second altitude inverse iterative localization is warm started from the first one (Newton stopping
+    # tolerance 1e-6) : grids differ from the references by less than 1.6e-9 pixel
+    np.testing.assert_allclose(reference_left_grid[1], left_grid[:, :, 0], rtol=0, atol=5.0e-9)
+    np.testing.assert_allclose(reference_left_grid[0], left_grid[:, :, 1], rtol=0, atol=5.0e-9)
 
-    np.testing.assert_array_equal(reference_right_grid[1], right_grid[:, :, 0])
-    np.testing.assert_allclose(reference_right_grid[0], right_grid[:, :, 1], atol=2.0e-12)
+    np.testing.assert_allclose(reference_right_grid[1], right_grid[:, :, 0], rtol=0, atol=5.0e-9)
+    np.testing.assert_allclose(reference_right_grid[0], right_grid[:, :, 1], rtol=0, atol=5.0e-9)
 
     # Check mean_baseline_ratio
     reference_mean_br = 0.7040047235162911
@@ -258,11 +262,13 @@ def test_compute_stereorectification_epipolar_grids_geomodel_rpc_with_margins(in
     ).read()
 
     # Check epipolar grids
-    np.testing.assert_array_equal(reference_left_grid[1], left_grid[:, :, 0])
-    np.testing.assert_array_equal(reference_left_grid[0], left_grid[:, :, 1])
+    # the second altitude inverse iterative localization is warm started from the first one (Newton stopping
+    # tolerance 1e-6) : grids differ from the references by less than 1.6e-9 pixel
+    np.testing.assert_allclose(reference_left_grid[1], left_grid[:, :, 0], rtol=0, atol=5.0e-9)
+    np.testing.assert_allclose(reference_left_grid[0], left_grid[:, :, 1], rtol=0, atol=5.0e-9)
 
-    np.testing.assert_array_equal(reference_right_grid[1], right_grid[:, :, 0])
-    np.testing.assert_allclose(reference_right_grid[0], right_grid[:, :, 1], atol=2.0e-12)
+    np.testing.assert_allclose(reference_right_grid[1], right_grid[:, :, 0], rtol=0, atol=5.0e-9)
+    np.testing.assert_allclose(reference_right_grid[0], right_grid[:, :, 1], rtol=0, atol=5.0e-9)
 
 
 @pytest.mark.unit_tests
@@ -627,6 +633,37 @@ def test_rectification_grid_extrapolation():
     assert pytest.approx(coords[1, 1], abs=1e-10) == 4883.84894205729142413474619389
 
 
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("is_displacement_grid", [True, False])
+def test_rectification_grid_regular_interpolators(is_displacement_grid):
+    """
+    Test shareloc regular grid interpolators against scipy RegularGridInterpolator
+    """
+    grid_filename = os.path.join(data_path(), "rectification_grids", "left_epipolar_grid_ventoux.tif")
+    rectif_grid = RectificationGrid(grid_filename, is_displacement_grid=is_displacement_grid)
+    rectif_grid_scipy = RectificationGrid(
+        grid_filename, is_displacement_grid=is_displacement_grid, interpolator="slinear"
+    )
+    rectif_grid_bicubic = RectificationGrid(
+        grid_filename, is_displacement_grid=is_displacement_grid, interpolator="bicubic"
+    )
+
+    # interpolation and extrapolation
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-100.0, 800.0, (1000, 2))
+    np.testing.assert_allclose(rectif_grid.interpolate(positions), rectif_grid_scipy.interpolate(positions), atol=1e-8)
+
+    # bicubic interpolation goes through grid nodes
+    (ori_col, ori_row), (step_col, step_row) = rectif_grid.origin, rectif_grid.step
+    nodes = np.array([[ori_col + 3 * step_col, ori_row + 5 * step_row], [ori_col, ori_row]])
+    np.testing.assert_allclose(rectif_grid_bicubic.interpolate(nodes)[0], rectif_grid.positions[3, 5], atol=1e-8)
+    np.testing.assert_allclose(rectif_grid_bicubic.interpolate(nodes)[1], rectif_grid.positions[0, 0], atol=1e-8)
+
+    # nan positions are propagated
+    coords = rectif_grid.interpolate(np.array([[np.nan, 15.0]]))
+    assert np.all(np.isnan(coords))
+
+
 @pytest.mark.unit_tests
 def test_prepare_rectification(init_rpc_geom_model):
     """
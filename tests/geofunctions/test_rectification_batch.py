@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for batch epipolar grids generation shareloc/geofunctions/rectification_batch.py
+"""
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Shareloc imports
+from shareloc.dtm_reader import dtm_reader
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+from shareloc.geofunctions.rectification import compute_stereorectification_epipolar_grids
+from shareloc.geofunctions.rectification_batch import (
+    CachedGroundModel,
+    compute_stereorectification_epipolar_grids_batch,
+)
+from shareloc.geomodels import GeoModel
+from shareloc.image import Image
+
+# Shareloc test imports
+from ..helpers import data_path
+
+
+@pytest.mark.unit_tests
+def test_compute_stereorectification_epipolar_grids_batch(init_rpc_geom_model):
+    """
+    Test one left / several right epipolar grids generation with cached left ground positions :
+    grids must be the same as pair by pair generation
+    """
+    geom_model_left, geom_model_right = init_rpc_geom_model
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_image = dtm_reader(dtm_file)
+    dtm_ventoux = DTMIntersection(
+        dtm_image.epsg,
+        dtm_image.alt_data,
+        dtm_image.nb_rows,
+        dtm_image.nb_columns,
+        dtm_image.transform,
+    )
+
+    # cached direct localization : height iteration from interpolated altitudes inside the cached extent,
+    # dtm walk outside
+    cached_model = CachedGroundModel(geom_model_left, dtm_ventoux, [5000.0, 5000.0, 5500.0, 5500.0], 10.0)
+    assert CachedGroundModel.load("left_image.geom") is None
+    rows = np.array([5100.3, 5421.7, 4900.0])
+    cols = np.array([5250.2, 5002.1, 5100.0])
+    ground_ref = geom_model_left.direct_loc_dtm(rows, cols, dtm_ventoux)
+    ground = cached_model.direct_loc_dtm(rows, cols, dtm_ventoux)
+    np.testing.assert_allclose(ground[:, 0:2], ground_ref[:, 0:2], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(ground[:, 2], ground_ref[:, 2], rtol=0, atol=1e-3)
+    np.testing.assert_array_equal(ground[2, :], ground_ref[2, :])
+    np.testing.assert_array_equal(
+        cached_model.direct_loc_h(rows, cols, 0.0), geom_model_left.direct_loc_h(rows, cols, 0.0)
+    )
+
+    epi_step = 30
+    elevation_offset = 50
+    geom_models_right = [geom_model_right, GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"))]
+    results = compute_stereorectification_epipolar_grids_batch(
+        left_im,
+        geom_model_left,
+        [right_im, right_im],
+        geom_models_right,
+        dtm_ventoux,
+        epi_step,
+        elevation_offset,
+        as_displacement_grid=True,
+    )
+    assert len(results) == 2
+    for (left_grid, right_grid, img_size, mean_br), model_right in zip(results, geom_models_right):
+        left_ref, right_ref, img_size_ref, mean_br_ref = compute_stereorectification_epipolar_grids(
+            left_im,
+            geom_model_left,
+            right_im,
+            model_right,
+            dtm_ventoux,
+            epi_step,
+            elevation_offset,
+            as_displacement_grid=True,
+        )
+        np.testing.assert_allclose(left_grid, left_ref, rtol=0, atol=1e-7)
+        # right positions of cached ground positions : height iteration tolerance of 1e-4 m
+        np.testing.assert_allclose(right_grid, right_ref, rtol=0, atol=5e-4)
+        assert img_size == img_size_ref
+        assert mean_br == pytest.approx(mean_br_ref, abs=1e-7)
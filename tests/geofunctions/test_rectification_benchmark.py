@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark module for epipolar grids generation backends shareloc/geofunctions/rectification.py
+Benchmarks are not run by default, run them with :
+pytest -m benchmark -s tests/geofunctions/test_rectification_benchmark.py
+"""
+# Standard imports
+import os
+import time
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Shareloc imports
+from shareloc.geofunctions.rectification import compute_stereorectification_epipolar_grids
+from shareloc.geomodels import GeoModel
+from shareloc.image import Image
+
+# Shareloc test imports
+from ..helpers import DTMIntersection_constructor, data_path
+
+# number of runs of each backend, the best time is kept
+NB_RUNS = 5
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("use_dtm", [False, True])
+@pytest.mark.parametrize("epi_step", [30, 5])
+def test_benchmark_epipolar_grids_backend(use_dtm, epi_step):
+    """
+    Benchmark end-to-end epipolar grids generation on the rectification test pair
+    with python and cpp strips computation backends
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+    geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+    geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"), "RPCoptim")
+    if use_dtm:
+        _, elevation = DTMIntersection_constructor(
+            os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+        )
+    else:
+        elevation = 100.0
+
+    timings = {}
+    grids = {}
+    for backend in ["python", "cpp"]:
+        timings[backend] = np.inf
+        for _ in range(NB_RUNS):
+            start = time.perf_counter()
+            grids[backend] = compute_stereorectification_epipolar_grids(
+                left_im, geom_model_left, right_im, geom_model_right, elevation, epi_step, 50.0, backend=backend
+            )
+            timings[backend] = min(timings[backend], time.perf_counter() - start)
+
+    print(
+        f"\nepipolar grids, {'SRTM C++ DTM' if use_dtm else 'constant altitude'}, step {epi_step} :"
+        f" python {timings['python'] * 1e3:.1f} ms, cpp {timings['cpp'] * 1e3:.1f} ms"
+        f" (x{timings['python'] / timings['cpp']:.1f})"
+    )
+    np.testing.assert_allclose(grids["python"][0], grids["cpp"][0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(grids["python"][1], grids["cpp"][1], rtol=0, atol=1e-9)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for epipolar grids cache shareloc/geofunctions/rectification_cache.py
+"""
+
+# Standard imports
+import glob
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Shareloc imports
+from shareloc.geofunctions import rectification
+from shareloc.geofunctions.rectification import compute_stereorectification_epipolar_grids
+from shareloc.geofunctions.rectification_cache import (
+    epipolar_grids_cache_key,
+    evict_epipolar_grids,
+    load_epipolar_grids,
+    save_epipolar_grids,
+)
+from shareloc.geomodels import GeoModel
+from shareloc.image import Image
+
+# Shareloc test imports
+from ..helpers import DTMIntersection_constructor, data_path
+
+
+@pytest.mark.unit_tests
+def test_epipolar_grids_cache_key():
+    """
+    Test cache key : stable for equal inputs, different when a model, the DTM or a parameter changes
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_py, dtm_cpp = DTMIntersection_constructor(dtm_file)
+
+    for model_type, dtm in [("RPC", dtm_py), ("RPCoptim", dtm_cpp)]:
+        geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), model_type)
+        geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"), model_type)
+        other_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), model_type)
+        params = {"epi_step": 30}
+
+        key = epipolar_grids_cache_key(left_im, geom_model_left, right_im, geom_model_right, 0.0, params)
+        assert key == epipolar_grids_cache_key(left_im, other_model_left, right_im, geom_model_right, 0.0, params)
+        other_keys = [
+            epipolar_grids_cache_key(left_im, geom_model_right, right_im, geom_model_left, 0.0, params),
+            epipolar_grids_cache_key(left_im, geom_model_left, right_im, geom_model_right, 10.0, params),
+            epipolar_grids_cache_key(left_im, geom_model_left, right_im, geom_model_right, dtm, params),
+            epipolar_grids_cache_key(left_im, geom_model_left, right_im, geom_model_right, 0.0, {"epi_step": 1}),
+            epipolar_grids_cache_key(right_im, geom_model_left, right_im, geom_model_right, 0.0, params),
+        ]
+        assert len(set(other_keys + [key])) == len(other_keys) + 1
+
+    dtm_py.alt_data[0, 0] += 1.0
+    assert epipolar_grids_cache_key(
+        left_im, geom_model_left, right_im, geom_model_right, dtm_py, params
+    ) != epipolar_grids_cache_key(left_im, geom_model_left, right_im, geom_model_right, dtm_cpp, params)
+
+
+@pytest.mark.unit_tests
+def test_compute_stereorectification_epipolar_grids_cache(tmp_path, monkeypatch):
+    """
+    Test cached epipolar grids : same outputs, geometric computation skipped on cache hit
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+    geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"))
+    geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"))
+    cache_dir = os.path.join(tmp_path, "cache")
+
+    reference = compute_stereorectification_epipolar_grids(
+        left_im, geom_model_left, right_im, geom_model_right, 0.0, 30, 50, as_displacement_grid=True
+    )
+    computed = compute_stereorectification_epipolar_grids(
+        left_im,
+        geom_model_left,
+        right_im,
+        geom_model_right,
+        0.0,
+        30,
+        50,
+        as_displacement_grid=True,
+        cache_dir=cache_dir,
+    )
+    assert len(glob.glob(os.path.join(cache_dir, "*.npz"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("grids should be read from the cache")
+
+    monkeypatch.setattr(rectification, "init_inputs_rectification", fail)
+    cached = compute_stereorectification_epipolar_grids(
+        left_im,
+        geom_model_left,
+        right_im,
+        geom_model_right,
+        0.0,
+        30,
+        50,
+        as_displacement_grid=True,
+        cache_dir=cache_dir,
+    )
+    for outputs in [computed, cached]:
+        np.testing.assert_array_equal(outputs[0], reference[0])
+        np.testing.assert_array_equal(outputs[1], reference[1])
+        assert outputs[2] == reference[2]
+        assert outputs[3] == reference[3]
+
+    # different parameters are not read from the cache
+    with pytest.raises(AssertionError):
+        compute_stereorectification_epipolar_grids(
+            left_im, geom_model_left, right_im, geom_model_right, 0.0, 30, 50, cache_dir=cache_dir
+        )
+
+
+@pytest.mark.unit_tests
+def test_compute_stereorectification_epipolar_grids_cache_grid_models(tmp_path, monkeypatch):
+    """
+    Test cached epipolar grids with Grid models : inverse localization predictors computed by the first
+    rectification are not part of the key, the repeated rectification is read from the cache
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+    geom_model_left = GeoModel(
+        os.path.join(data_path(), "grid/phr_ventoux/GRID_PHR1B_P_201308051042194_SEN_690908101-001.tif"), "GRID"
+    )
+    geom_model_right = GeoModel(
+        os.path.join(data_path(), "grid/phr_ventoux/GRID_PHR1B_P_201308051042523_SEN_690908101-002.tif"), "GRID"
+    )
+    cache_dir = os.path.join(tmp_path, "cache")
+
+    computed = compute_stereorectification_epipolar_grids(
+        left_im, geom_model_left, right_im, geom_model_right, 0.0, 30, 50, cache_dir=cache_dir
+    )
+    assert geom_model_left.pred_ofset_scale_lon is not None
+
+    def fail(*args, **kwargs):
+        raise AssertionError("grids should be read from the cache")
+
+    monkeypatch.setattr(rectification, "init_inputs_rectification", fail)
+    cached = compute_stereorectification_epipolar_grids(
+        left_im, geom_model_left, right_im, geom_model_right, 0.0, 30, 50, cache_dir=cache_dir
+    )
+    assert len(glob.glob(os.path.join(cache_dir, "*.npz"))) == 1
+    np.testing.assert_array_equal(cached[0], computed[0])
+    np.testing.assert_array_equal(cached[1], computed[1])
+
+
+@pytest.mark.unit_tests
+def test_epipolar_grids_cache_eviction(tmp_path):
+    """
+    Test least recently used eviction and invalid entries
+    """
+    grid = np.random.default_rng(0).random((20, 20, 3))
+    for key in ["a", "b", "c"]:
+        save_epipolar_grids(tmp_path, key, grid, grid, [10, 10], 0.5)
+    entry_size = os.path.getsize(os.path.join(tmp_path, "a.npz"))
+    for age, key in enumerate(["c", "b", "a"]):
+        os.utime(os.path.join(tmp_path, key + ".npz"), (1000 + age, 1000 + age))
+
+    # "c" becomes the most recently used entry
+    assert load_epipolar_grids(tmp_path, "c")[3] == 0.5
+    evict_epipolar_grids(tmp_path, 2 * entry_size)
+    assert sorted(os.listdir(tmp_path)) == ["a.npz", "c.npz"]
+
+    save_epipolar_grids(tmp_path, "d", grid, grid, [10, 10], 0.5, max_size=entry_size)
+    assert os.listdir(tmp_path) == ["d.npz"]
+    assert load_epipolar_grids(tmp_path, "a") is None
+
+    with open(os.path.join(tmp_path, "e.npz"), "w", encoding="utf8") as invalid_file:
+        invalid_file.write("not a npz file")
+    assert load_epipolar_grids(tmp_path, "e") is None
+    assert not os.path.exists(os.path.join(tmp_path, "e.npz"))
@@ -35,11 +35,16 @@ import pytest
 import bindings_cpp
 from shareloc.dtm_reader import dtm_reader
 from shareloc.geofunctions.dtm_intersection import DTMIntersection
+from shareloc.geofunctions.localization import coloc
 from shareloc.geofunctions.rectification import (
     compute_local_epipolar_line,
+    compute_stereorectification_epipolar_grids,
     compute_strip_of_epipolar_grid,
     moving_along_axis,
+    select_rectification_backend,
 )
+from shareloc.geomodels import GeoModel
+from shareloc.image import Image
 
 # Shareloc test imports
 from ..helpers import DTMIntersection_constructor, bindings_cpp_constructor, data_path
@@ -324,7 +329,7 @@ def test_compute_strip_of_epipolar_grid_alti(init_rpc_geom_model):
     np.testing.assert_allclose(res_py[0], res_cpp[0], 0, 2e-10)
     np.testing.assert_allclose(res_py[1], res_cpp[1], 0, 2e-9)
     np.testing.assert_allclose(res_py[2], res_cpp[2], 0, 3e-12)
-    assert res_py[3] == pytest.approx(res_cpp[3], abs=2e-14)
+    assert res_py[3] == pytest.approx(res_cpp[3], abs=5e-14)
 
     # Axis 0 Multi
     left_positions_point = np.array([left_grid[0, :, :]])
@@ -456,7 +461,7 @@ def test_compute_strip_of_epipolar_grid_alti(init_rpc_geom_model):
         epipolar_angles,
     )
 
-    np.testing.assert_allclose(res_py[0], res_cpp[0], 0, 3e-10)
+    np.testing.assert_allclose(res_py[0], res_cpp[0], 0, 4e-10)
     np.testing.assert_allclose(res_py[1], res_cpp[1], 0, 2e-9)
     np.testing.assert_allclose(res_py[2], res_cpp[2], 0, 6e-12)
     assert res_py[3] == pytest.approx(res_cpp[3], abs=2e-14)
@@ -667,6 +672,149 @@ def test_compute_strip_of_epipolar_grid_dtm(init_rpc_geom_model):
     )
 
     np.testing.assert_allclose(res_py[0], res_cpp[0], 0, 3e-10)
-    np.testing.assert_allclose(res_py[1], res_cpp[1], 0, 2e-9)
+    np.testing.assert_allclose(res_py[1], res_cpp[1], 0, 4e-9)
     np.testing.assert_allclose(res_py[2], res_cpp[2], 0, 8e-12)
     assert res_py[3] == pytest.approx(res_cpp[3], abs=7e-14)
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("use_dtm", [False, True])
+def test_compute_stereorectification_epipolar_grids_backend(init_rpc_geom_model, use_dtm):
+    """
+    Test epipolar grids generation backend selection : cpp strips computation must give the same grids
+    as python strips computation
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+
+    geom_left_py, geom_right_py = init_rpc_geom_model
+    geom_left_optim = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+    geom_right_optim = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"), "RPCoptim")
+
+    mnt = os.path.join(data_path(), "dtm/srtm_ventoux/srtm90_non_void_filled/N44E005.hgt")
+    dtm_py, dtm_cpp = DTMIntersection_constructor(mnt)
+    elevation = dtm_cpp if use_dtm else 100.0
+
+    assert select_rectification_backend(geom_left_optim, geom_right_optim, elevation, 30) == "cpp"
+    assert select_rectification_backend(geom_left_optim, geom_right_optim, elevation, 30.5) == "python"
+    assert select_rectification_backend(geom_left_py, geom_right_py, elevation, 30) == "python"
+    assert select_rectification_backend(geom_left_optim, geom_right_optim, dtm_py, 30) == "python"
+    assert select_rectification_backend(geom_left_optim, geom_right_optim, dtm_py, 30, "python") == "python"
+    with pytest.raises(ValueError):
+        select_rectification_backend(geom_left_py, geom_right_py, elevation, 30, "cpp")
+    with pytest.raises(ValueError):
+        select_rectification_backend(geom_left_optim, geom_right_optim, elevation, 30, "fortran")
+
+    epi_step = 30
+    elevation_offset = 50
+    res_py = compute_stereorectification_epipolar_grids(
+        left_im, geom_left_optim, right_im, geom_right_optim, elevation, epi_step, elevation_offset, backend="python"
+    )
+    res_cpp = compute_stereorectification_epipolar_grids(
+        left_im, geom_left_optim, right_im, geom_right_optim, elevation, epi_step, elevation_offset
+    )
+
+    np.testing.assert_allclose(res_py[0], res_cpp[0], 0, 1e-9)
+    np.testing.assert_allclose(res_py[1], res_cpp[1], 0, 1e-9)
+    assert res_py[2] == res_cpp[2]
+    assert res_py[3] == pytest.approx(res_cpp[3], abs=1e-12)
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("backend", ["python", "cpp"])
+def test_compute_stereorectification_epipolar_grids_row_blocks(backend):
+    """
+    Test epipolar grids generation by blocks of rows : grids must be identical to sequential generation
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+
+    geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+    geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"), "RPCoptim")
+
+    epi_step = 30
+    elevation_offset = 50
+    elevation = 100.0
+    res_ref = compute_stereorectification_epipolar_grids(
+        left_im, geom_model_left, right_im, geom_model_right, elevation, epi_step, elevation_offset, backend=backend
+    )
+    res_blocks = compute_stereorectification_epipolar_grids(
+        left_im,
+        geom_model_left,
+        right_im,
+        geom_model_right,
+        elevation,
+        epi_step,
+        elevation_offset,
+        backend=backend,
+        nb_workers=3,
+    )
+
+    np.testing.assert_array_equal(res_ref[0], res_blocks[0])
+    np.testing.assert_array_equal(res_ref[1], res_blocks[1])
+    assert res_ref[2] == res_blocks[2]
+    assert res_ref[3] == pytest.approx(res_blocks[3], abs=1e-14)
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("use_dtm", [False, True])
+def test_compute_stereorectification_epipolar_grids_coarse_to_fine(use_dtm):
+    """
+    Test coarse to fine epipolar grids generation : densified grids must be close to grids computed at full
+    resolution, and right grid must be the colocalization of left grid. Wrong densified left rows are computed
+    at full resolution.
+    """
+    left_im = Image(os.path.join(data_path(), "rectification", "left_image.tif"))
+    right_im = Image(os.path.join(data_path(), "rectification", "right_image.tif"))
+
+    geom_model_left = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+    geom_model_right = GeoModel(os.path.join(data_path(), "rectification", "right_image.geom"), "RPCoptim")
+
+    mnt = os.path.join(data_path(), "dtm/srtm_ventoux/srtm90_non_void_filled/N44E005.hgt")
+    _, dtm_cpp = DTMIntersection_constructor(mnt)
+    elevation = dtm_cpp if use_dtm else 100.0
+
+    epi_step = 5
+    elevation_offset = 50
+    left_ref, right_ref, img_size_ref, mean_br_ref = compute_stereorectification_epipolar_grids(
+        left_im, geom_model_left, right_im, geom_model_right, elevation, epi_step, elevation_offset
+    )
+    left_grid, right_grid, img_size, mean_br = compute_stereorectification_epipolar_grids(
+        left_im,
+        geom_model_left,
+        right_im,
+        geom_model_right,
+        elevation,
+        epi_step,
+        elevation_offset,
+        coarse_step_factor=4,
+    )
+
+    assert left_grid.shape == left_ref.shape
+    assert img_size == img_size_ref
+    assert mean_br == pytest.approx(mean_br_ref, abs=1e-6)
+    np.testing.assert_allclose(left_grid[:, :, 0:2], left_ref[:, :, 0:2], 0, 5e-4)
+
+    tolerance = 0.05 if use_dtm else 1e-6
+    np.testing.assert_allclose(right_grid[:, :, 0:2], right_ref[:, :, 0:2], 0, max(tolerance, 1e-3))
+    right_row, right_col, _ = coloc(
+        geom_model_left, geom_model_right, left_grid[:, :, 0].ravel(), left_grid[:, :, 1].ravel(), elevation
+    )
+    np.testing.assert_allclose(right_grid[:, :, 0].ravel(), right_row, 0, tolerance)
+    np.testing.assert_allclose(right_grid[:, :, 1].ravel(), right_col, 0, tolerance)
+
+    # densified left positions differ from positions computed at the fine step by 2.7e-4 pixel :
+    # with a lower tolerance, all rows are computed at the fine step
+    left_grid, right_grid, _, _ = compute_stereorectification_epipolar_grids(
+        left_im,
+        geom_model_left,
+        right_im,
+        geom_model_right,
+        elevation,
+        epi_step,
+        elevation_offset,
+        coarse_step_factor=4,
+        densification_tolerance=1e-6,
+    )
+    np.testing.assert_array_equal(left_grid, left_ref)
+    np.testing.assert_array_equal(right_grid, right_ref)
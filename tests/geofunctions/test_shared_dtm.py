@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Test module for DTM shared between processes shareloc/geofunctions/shared_dtm.py
+"""
+
+# Standard imports
+import mmap
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Shareloc imports
+from shareloc.geofunctions.shared_dtm import SharedCppDTMIntersection, SharedDTM, SharedDTMIntersection
+from shareloc.geomodels import GeoModel
+
+# Shareloc test imports
+from ..helpers import DTMIntersection_constructor, data_path
+
+
+def direct_loc_dtm_worker(model_type, dtm, row, col):
+    """
+    Direct localization on DTM in a worker process
+    """
+    geom_model = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), model_type)
+    return geom_model.direct_loc_dtm(row, col, dtm)
+
+
+@pytest.mark.unit_tests
+def test_shared_dtm(tmp_path):
+    """
+    Test shared python and C++ DTMs : pickled as a handle, same localizations as the original DTMs in workers,
+    C++ buffers are not copied
+    """
+    dtm_file = os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt")
+    dtm_py, dtm_cpp = DTMIntersection_constructor(dtm_file)
+    row = np.arange(0.0, 500.0, 50.0)
+    col = np.arange(0.0, 500.0, 50.0)
+
+    with SharedDTM(dtm_py, tmp_path) as shared_py, SharedDTM(dtm_cpp, tmp_path) as shared_cpp:
+        shared_dtm_py = shared_py.get_dtm()
+        shared_dtm_cpp = shared_cpp.get_dtm()
+        assert isinstance(shared_dtm_py, SharedDTMIntersection)
+        assert isinstance(shared_dtm_cpp, SharedCppDTMIntersection)
+        # C++ altitudes are a view on the mapped file
+        base = shared_dtm_cpp.get_alt_data()
+        while isinstance(base, np.ndarray):
+            base = base.base
+        assert isinstance(base, mmap.mmap)
+        np.testing.assert_array_equal(shared_dtm_py.alt_max_cell, dtm_py.alt_max_cell)
+        np.testing.assert_array_equal(shared_dtm_cpp.get_alt_min_cell(), dtm_cpp.get_alt_min_cell())
+        assert len(pickle.dumps(shared_dtm_cpp)) < 1000
+        assert len(pickle.dumps(shared_dtm_py)) < 1000
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(2, mp_context=context) as executor:
+            futures = [
+                executor.submit(direct_loc_dtm_worker, model_type, dtm, row, col)
+                for model_type, dtm in [("RPC", shared_dtm_py), ("RPCoptim", shared_dtm_cpp)]
+            ]
+            res_py, res_cpp = [future.result() for future in futures]
+
+        geom_model = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPCoptim")
+        np.testing.assert_array_equal(res_cpp, geom_model.direct_loc_dtm(row, col, dtm_cpp))
+        geom_model = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), "RPC")
+        np.testing.assert_array_equal(res_py, geom_model.direct_loc_dtm(row, col, dtm_py))
+
+        filename = shared_cpp.handle.filename
+    assert not os.path.exists(filename)
+    # attached DTMs remain valid once the file is removed
+    assert shared_dtm_cpp.interpolate(10.5, 20.5) == dtm_cpp.interpolate(10.5, 20.5)
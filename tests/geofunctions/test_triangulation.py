@@ -36,7 +36,18 @@ import pytest
 from scipy import __version__
 
 # Shareloc imports
-from shareloc.geofunctions.triangulation import distance_point_los, epipolar_triangulation, sensor_triangulation
+from shareloc.geofunctions.rectification_grid import (
+    RectificationGrid,
+    clear_rectification_grid_cache,
+    load_rectification_grid,
+)
+from shareloc.geofunctions.triangulation import (
+    distance_point_los,
+    epipolar_triangulation,
+    multi_view_triangulation,
+    refine_triangulation,
+    sensor_triangulation,
+)
 from shareloc.geomodels import GeoModel
 
 # Shareloc test imports
@@ -74,6 +85,86 @@ def test_sensor_triangulation(row, col, h):
     assert distance == pytest.approx(0.0, abs=1e-3)
 
 
+@pytest.mark.unit_tests
+def test_multi_view_triangulation():
+    """
+    Test N views triangulation with missing views
+    """
+    data_folder = data_path()
+    geom_models = [
+        GeoModel(os.path.join(data_folder, "rpc/PHR1B_P_201709281038045_SEN_PRG_FC_178608-001.geom")),
+        GeoModel(os.path.join(data_folder, "rpc/PHR1B_P_201709281038393_SEN_PRG_FC_178609-001.geom")),
+        GeoModel(os.path.join(data_folder, "rpc/PHR1B_P_201709281038045_SEN_PRG_FC_178608-001.geom"), "RPCoptim"),
+    ]
+
+    # matches by colocalization of ground points
+    lonlatalt = geom_models[0].direct_loc_h(
+        np.array([1000.5, 2000.5, 3000.5]), np.array([1500.5, 2500.5, 500.5]), 100.0
+    )
+    matches = np.zeros((3, 3, 2))
+    for view, geom_model in enumerate(geom_models):
+        row, col, __ = geom_model.inverse_loc(lonlatalt[:, 0], lonlatalt[:, 1], lonlatalt[:, 2])
+        matches[:, view, 0] = col
+        matches[:, view, 1] = row
+    # second point is not seen in last view, third point only in first view
+    matches[1, 2, :] = np.nan
+    matches[2, 1:, :] = np.nan
+
+    point_ecef, point_wgs84, residues = multi_view_triangulation(matches, geom_models, residues=True)
+    assert residues.shape == (3, 3)
+    np.testing.assert_allclose(point_wgs84[0:2, :], lonlatalt[0:2, :], rtol=0, atol=1e-3)
+    np.testing.assert_allclose(residues[0, :], 0.0, atol=1e-2)
+    assert np.isnan(residues[1, 2])
+    assert np.all(np.isnan(point_ecef[2, :]))
+    assert np.all(np.isnan(point_wgs84[2, :]))
+
+    # same result as pair triangulation for a point seen in two views
+    pair_ecef, __, __ = sensor_triangulation(matches[1:2, 0:2, :].reshape((1, 4)), geom_models[0], geom_models[1])
+    np.testing.assert_allclose(point_ecef[1, :], pair_ecef[0, :], rtol=0, atol=1e-6)
+
+
+@pytest.mark.unit_tests
+def test_refine_triangulation():
+    """
+    Test Gauss-Newton refinement of triangulated points in image space
+    """
+    data_folder = data_path()
+    geom_models = [
+        GeoModel(os.path.join(data_folder, "rpc/PHR1B_P_201709281038045_SEN_PRG_FC_178608-001.geom")),
+        GeoModel(os.path.join(data_folder, "rpc/PHR1B_P_201709281038393_SEN_PRG_FC_178609-001.geom")),
+    ]
+    lonlatalt = geom_models[0].direct_loc_h(
+        np.array([1000.5, 2000.5, 3000.5]), np.array([1500.5, 2500.5, 500.5]), 100.0
+    )
+    matches = np.zeros((3, 2, 2))
+    for view, geom_model in enumerate(geom_models):
+        row, col, __ = geom_model.inverse_loc(lonlatalt[:, 0], lonlatalt[:, 1], lonlatalt[:, 2])
+        matches[:, view, 0] = col
+        matches[:, view, 1] = row
+    # last point is seen only once
+    matches[2, 1, :] = np.nan
+
+    # start from perturbed points
+    initial_points = lonlatalt + np.array([1e-4, -1e-4, 50.0])
+    refined_points = refine_triangulation(matches, geom_models, initial_points, nb_iterations=4)
+    np.testing.assert_allclose(refined_points[0:2, 0:2], lonlatalt[0:2, 0:2], rtol=0, atol=1e-8)
+    np.testing.assert_allclose(refined_points[0:2, 2], lonlatalt[0:2, 2], rtol=0, atol=1e-3)
+    assert np.all(np.isnan(refined_points[2, :]))
+
+    # same refinement using c++ RPC jacobians
+    geom_models_optim = [
+        GeoModel(os.path.join(data_folder, "rpc/PHR1B_P_201709281038045_SEN_PRG_FC_178608-001.geom"), "RPCoptim"),
+        GeoModel(os.path.join(data_folder, "rpc/PHR1B_P_201709281038393_SEN_PRG_FC_178609-001.geom"), "RPCoptim"),
+    ]
+    refined_points_optim = refine_triangulation(matches, geom_models_optim, initial_points, nb_iterations=4)
+    np.testing.assert_allclose(refined_points_optim, refined_points, rtol=0, atol=1e-6)
+
+    # refinement stage of multi view triangulation
+    __, point_wgs84, residues = multi_view_triangulation(matches, geom_models, residues=True, refinement_iterations=2)
+    np.testing.assert_allclose(point_wgs84[0:2, :], lonlatalt[0:2, :], rtol=0, atol=1e-3)
+    assert residues.shape == (3, 2)
+
+
 def prepare_loc(alti="geoide", id_scene="P1BP--2017030824934340CP"):
     """
     Read multiH grid
@@ -215,6 +306,49 @@ def test_epi_triangulation_sift_rpc():
     np.testing.assert_allclose(point_ecef, point_ecef_optim, 0, 1e-8)
 
 
+@pytest.mark.unit_tests
+def test_epi_triangulation_rectification_grid_reuse():
+    """
+    Test epipolar triangulation with preloaded and cached rectification grids
+    """
+    data_folder = data_path()
+    id_scene = "PHR1B_P_201709281038045_SEN_PRG_FC_178608-001"
+    geom_model_left = GeoModel(os.path.join(data_folder, f"rpc/{id_scene}.geom"))
+    id_scene = "PHR1B_P_201709281038393_SEN_PRG_FC_178609-001"
+    geom_model_right = GeoModel(os.path.join(data_folder, f"rpc/{id_scene}.geom"))
+
+    grid_left_filename = os.path.join(data_path(), "rectification_grids", "left_epipolar_grid.tif")
+    grid_right_filename = os.path.join(data_path(), "rectification_grids", "right_epipolar_grid.tif")
+
+    matches = np.load(os.path.join(data_path(), "triangulation", "matches-crop.npy"))
+
+    clear_rectification_grid_cache()
+    point_ecef, __, __ = epipolar_triangulation(
+        matches,
+        None,
+        "sift",
+        geom_model_left,
+        geom_model_right,
+        grid_left_filename,
+        grid_right_filename,
+        is_displacement_grid=True,
+    )
+
+    # grids loaded by filename are cached
+    grid_left = load_rectification_grid(grid_left_filename, is_displacement_grid=True)
+    assert grid_left is load_rectification_grid(grid_left_filename, is_displacement_grid=True)
+    assert grid_left is not load_rectification_grid(grid_left_filename, is_displacement_grid=False)
+
+    # prebuilt grids are used as is
+    grid_right = RectificationGrid(grid_right_filename, is_displacement_grid=True)
+    assert load_rectification_grid(grid_right) is grid_right
+    point_ecef_prebuilt, __, __ = epipolar_triangulation(
+        matches, None, "sift", geom_model_left, geom_model_right, grid_left, grid_right, is_displacement_grid=True
+    )
+    np.testing.assert_array_equal(point_ecef, point_ecef_prebuilt)
+    clear_rectification_grid_cache()
+
+
 @pytest.mark.unit_tests
 def test_epi_triangulation_sift_rpc_loc_grid():
     """
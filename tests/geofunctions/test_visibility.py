@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (c) 2022 Centre National d'Etudes Spatiales (CNES).
+#
+# This file is part of Shareloc
+# (see https://github.com/CNES/shareloc).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+"""
+Test module for visibility of ground points shareloc/geofunctions/visibility.py
+"""
+
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+
+import bindings_cpp
+
+# Shareloc imports
+from shareloc.dtm_reader import dtm_reader
+from shareloc.geofunctions.dtm_intersection import DTMIntersection
+from shareloc.geofunctions.visibility import visibility, visibility_raster
+from shareloc.geomodels import GeoModel
+
+# Shareloc test imports
+from ..helpers import data_path
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize("model_type,dtm_class", [("RPC", DTMIntersection), ("RPCoptim", bindings_cpp.DTMIntersection)])
+def test_visibility(model_type, dtm_class):
+    """
+    Test visibility : direct localizations on the dtm are visible, points behind a wall are occluded
+    when their line of sight hits the wall, visibility raster of dtm nodes
+    """
+    model = GeoModel(os.path.join(data_path(), "rectification", "left_image.geom"), model_type)
+    dtm_image = dtm_reader(os.path.join(data_path(), "dtm", "srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt"))
+    dtm = dtm_class(dtm_image.epsg, dtm_image.alt_data, dtm_image.nb_rows, dtm_image.nb_columns, dtm_image.transform)
+    row, col = np.mgrid[0:600:10, 0:600:10]
+    row = row.ravel().astype(np.float64)
+    col = col.ravel().astype(np.float64)
+    ground_points = model.direct_loc_dtm(row, col, dtm)
+    assert np.all(visibility(model, dtm, ground_points))
+
+    # 1000 meters wall north of the image center
+    alt_data = np.array(dtm_image.alt_data)
+    wall_row = int((44.2295 - dtm_image.transform[3]) / dtm_image.transform[5])
+    alt_data[wall_row - 1 : wall_row + 1, :] += 1000.0
+    dtm_wall = dtm_class(dtm_image.epsg, alt_data, dtm_image.nb_rows, dtm_image.nb_columns, dtm_image.transform)
+    # ground points out of the cells modified by the wall
+    ground_row = (ground_points[:, 1] - dtm_image.transform[3]) / dtm_image.transform[5] - 0.5
+    ground_points = ground_points[(ground_row < wall_row - 2.5) | (ground_row > wall_row + 1.5)]
+    hit_wall = np.abs(model.direct_loc_dtm(row, col, dtm_wall)[:, 2] - model.direct_loc_dtm(row, col, dtm)[:, 2]) > 1.0
+    hit_wall = hit_wall[(ground_row < wall_row - 2.5) | (ground_row > wall_row + 1.5)]
+    visible = visibility(model, dtm_wall, ground_points)
+    assert 0 < np.count_nonzero(~visible) < visible.size
+    # lines of sight grazing the wall top may differ
+    assert np.count_nonzero(visible == hit_wall) <= 0.01 * visible.size
+
+    # nan and above dtm points
+    extra_points = np.array([[np.nan, 44.2, 500.0], [ground_points[0, 0], ground_points[0, 1], 5000.0]])
+    np.testing.assert_array_equal(visibility(model, dtm_wall, extra_points), [False, True])
+
+    # raster of dtm nodes
+    roi = [wall_row - 20, 180, wall_row + 10, 230]
+    raster = visibility_raster(model, dtm_wall, roi)
+    assert raster.shape == (30, 50)
+    rows, cols = np.mgrid[roi[0] : roi[2], roi[1] : roi[3]]
+    nodes = np.zeros((rows.size, 3))
+    nodes[:, 0] = dtm_image.transform[0] + (cols.ravel() + 0.5) * dtm_image.transform[1]
+    nodes[:, 1] = dtm_image.transform[3] + (rows.ravel() + 0.5) * dtm_image.transform[5]
+    nodes[:, 2] = alt_data[rows.ravel(), cols.ravel()]
+    np.testing.assert_array_equal(raster.ravel(), visibility(model, dtm_wall, nodes))
+    # nodes next to the wall on the side opposite to the sensor are hidden, other nodes are visible
+    assert not np.any(raster[21, :])
+    assert np.all(raster[:21, :]) and np.all(raster[22:, :])
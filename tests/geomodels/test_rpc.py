@@ -573,3 +573,23 @@ def test_read_via_rasterio():
 
     assert row_calc[0] == pytest.approx(row, abs=1e-9)
     assert col_calc[0] == pytest.approx(col, abs=1e-9)
+
+
+@pytest.mark.unit_tests
+def test_rpc_loc_inverse_alt_derivates():
+    """
+    test analytic altitude derivatives of inverse localization against finite differences
+    """
+    data_folder = data_path()
+    id_scene = "PHR1B_P_201709281038045_SEN_PRG_FC_178608-001"
+    fctrat = GeoModel(os.path.join(data_folder, "rpc", f"{id_scene}.geom"))
+
+    lonlatalt = fctrat.direct_loc_h(np.array([100.5, 5000.5, 10000.5]), np.array([200.5, 3000.5, 15000.5]), 250.0)
+    lon, lat, alt = lonlatalt[:, 0], lonlatalt[:, 1], lonlatalt[:, 2]
+    dcol_dalt, drow_dalt = fctrat.compute_loc_inverse_alt_derivates(lon, lat, alt)
+
+    step = 1.0
+    row_up, col_up, __ = fctrat.inverse_loc(lon, lat, alt + step)
+    row_down, col_down, __ = fctrat.inverse_loc(lon, lat, alt - step)
+    np.testing.assert_allclose(dcol_dalt, (col_up - col_down) / (2 * step), rtol=0, atol=1e-7)
+    np.testing.assert_allclose(drow_dalt, (row_up - row_down) / (2 * step), rtol=0, atol=1e-7)
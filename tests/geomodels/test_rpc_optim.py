@@ -518,6 +518,54 @@ def test_compute_loc_inverse_derivates():
     np.testing.assert_allclose(res_cpp[:, 3], res_py[3], 0, 3e-10)
 
 
+def test_inverse_loc_with_jacobian():
+    """
+    test on the inverse_loc_with_jacobian methode against inverse_loc and separate derivatives
+    """
+
+    rpc_path = os.path.join(data_path(), "rpc/PHRDIMAP_P1BP--2018122638935449CP.XML")
+
+    rpc_optim = GeoModel(rpc_path, "RPCoptim")
+    rpc_py = GeoModel(rpc_path, "RPC")
+
+    lon_vect, lat_vect, alt_vect = np.meshgrid(
+        np.linspace(7.0477886581984, 7.308411551163017, 11),
+        np.linspace(43.62208491280199, 43.73298365695963, 11),
+        np.linspace(-50, 1000, 11),
+    )
+    lon_vect = np.ndarray.flatten(lon_vect)
+    lat_vect = np.ndarray.flatten(lat_vect)
+    alt_vect = np.ndarray.flatten(alt_vect)
+
+    row_py, col_py, jacobian_py = rpc_py.inverse_loc_with_jacobian(lon_vect, lat_vect, alt_vect)
+    row_cpp, col_cpp, jacobian_cpp = rpc_optim.inverse_loc_with_jacobian(lon_vect, lat_vect, alt_vect)
+    assert jacobian_py.shape == (len(lon_vect), 2, 3)
+
+    row_ref, col_ref, __ = rpc_py.inverse_loc(lon_vect, lat_vect, alt_vect)
+    dcol_dlon, dcol_dlat, drow_dlon, drow_dlat = rpc_py.compute_loc_inverse_derivates(lon_vect, lat_vect, alt_vect)
+    dcol_dalt, drow_dalt = rpc_py.compute_loc_inverse_alt_derivates(lon_vect, lat_vect, alt_vect)
+    jacobian_ref = np.stack(
+        (
+            np.stack((drow_dlon, drow_dlat, drow_dalt), axis=1),
+            np.stack((dcol_dlon, dcol_dlat, dcol_dalt), axis=1),
+        ),
+        axis=1,
+    )
+
+    np.testing.assert_allclose(row_py, row_ref, 0, 1e-8)
+    np.testing.assert_allclose(col_py, col_ref, 0, 1e-8)
+    np.testing.assert_allclose(jacobian_py, jacobian_ref, 1e-10, 1e-9)
+    np.testing.assert_allclose(row_cpp, row_ref, 0, 1e-8)
+    np.testing.assert_allclose(col_cpp, col_ref, 0, 1e-8)
+    np.testing.assert_allclose(jacobian_cpp, jacobian_ref, 1e-10, 1e-9)
+
+    # unitary call and altitude derivatives
+    __, __, jacobian_unit = rpc_optim.inverse_loc_with_jacobian(lon_vect[5], lat_vect[5], alt_vect[5])
+    np.testing.assert_allclose(jacobian_unit[0], jacobian_ref[5], 1e-10, 1e-9)
+    res_cpp = rpc_optim.compute_loc_inverse_alt_derivates(lon_vect[5], lat_vect[5], alt_vect[5])
+    np.testing.assert_allclose(res_cpp, (dcol_dalt[5], drow_dalt[5]), 0, 1e-12)
+
+
 @pytest.mark.parametrize(
     "col,row,alt",
     [
@@ -859,3 +907,64 @@ def test_direct_loc_dtm_utm():
     np.testing.assert_allclose(res_optim[:, 0], res_py[:, 0], 0, 7e-7)
     np.testing.assert_allclose(res_optim[:, 1], res_py[:, 1], 0, 7e-7)
     np.testing.assert_allclose(res_optim[:, 2], res_py[:, 2], 0, 4e-7)
+
+    # full c++ localization, lines of sight converted to UTM in c++, against lines of sight converted in python
+    assert dtm_cpp.has_projection()
+    los = rpc_optim.los_extrema(row_vect, col_vect, *rpc_optim.get_dtm_los_alt_bounds(dtm_cpp), epsg=dtm_image.epsg)
+    res_los_python = dtm_cpp.intersection_n_los_dtm(los.reshape((len(col_vect), 2, 3)))
+    np.testing.assert_allclose(res_optim, res_los_python, 0, 1e-7)
+
+
+@pytest.mark.parametrize(
+    "geom, mnt, grid",
+    [
+        (
+            "rpc/phr_ventoux/RPC_PHR1B_P_201308051042194_SEN_690908101-001.XML",
+            "dtm/srtm_ventoux/srtm90_non_void_filled/N44E005.hgt",
+            (1000.0, 2000.0, 150.0, 40, 30),
+        ),
+        (
+            "rpc/phr_ventoux/RPC_PHR1B_P_201308051042194_SEN_690908101-001.XML",
+            "dtm/srtm_ventoux/srtm90_resampled_UTM31/N44E005_UTM.tif",
+            (1000.0, 2000.0, 150.0, 40, 30),
+        ),
+        ("rectification/left_image.geom", None, (0.0, 0.0, 6.0, 100, 100)),
+    ],
+)
+def test_direct_loc_grid_dtm(geom, mnt, grid):
+    """
+    Test direct localization grid on dtm : warm started lines of sight against direct_loc_dtm,
+    on a flat dtm with a 800 m wall (occluding lines of sight of previous pixels) if mnt is None
+    """
+    rpc_optim = GeoModel(os.path.join(data_path(), geom), "RPCoptim")
+    if mnt is None:
+        alt_data = np.zeros((200, 200))
+        alt_data[100:102, :] = 800.0
+        dtm_cpp = bindings_cpp.DTMIntersection(4326, alt_data, 200, 200, (5.155, 0.0001, 0.0, 44.24, 0.0, -0.0001))
+        epsg = 4326
+    else:
+        dtm_image = dtm_reader(os.path.join(data_path(), mnt))
+        dtm_cpp = bindings_cpp.DTMIntersection(
+            dtm_image.epsg,
+            dtm_image.alt_data,
+            dtm_image.nb_rows,
+            dtm_image.nb_columns,
+            dtm_image.transform,
+        )
+        epsg = dtm_image.epsg
+
+    row0, col0, step, nbrow, nbcol = grid
+    row, col = np.mgrid[0:nbrow, 0:nbcol]
+    res_ref = rpc_optim.direct_loc_dtm(row0 + step * row.ravel(), col0 + step * col.ravel(), dtm_cpp)
+    res_ref = res_ref.T.reshape((3, nbrow, nbcol))
+
+    # default : lines of sight walked from the dtm top, same localizations
+    res_full = rpc_optim.direct_loc_grid_dtm(row0, col0, step, step, nbrow, nbcol, dtm_cpp)
+    np.testing.assert_array_equal(res_full, res_ref)
+
+    # warm start : same intersections up to the dtm intersection tolerance
+    for warm_start_margin in [10.0, 50.0]:
+        res_grid = rpc_optim.direct_loc_grid_dtm(row0, col0, step, step, nbrow, nbcol, dtm_cpp, warm_start_margin)
+        assert res_grid.shape == (3, nbrow, nbcol)
+        np.testing.assert_allclose(res_grid[:2], res_ref[:2], 0, 1e-2 if epsg != 4326 else 1e-7)
+        np.testing.assert_allclose(res_grid[2], res_ref[2], 0, 1e-3)
@@ -30,7 +30,7 @@ import numpy as np
 import pytest
 
 # Shareloc imports
-from shareloc.dtm_reader import dtm_reader
+from shareloc.dtm_reader import dtm_reader, streaming_stats
 
 # Shareloc test imports
 from .helpers import data_path
@@ -70,3 +70,31 @@ def test_dtm_fillnodata():
     dtm_file_srtm_hole = os.path.join(data_path(), "dtm", "srtm_ventoux", "N44E005_big_hole.tif")
     my_image_fill_hole = dtm_reader(dtm_file_srtm_hole, fill_nodata="rio_fillnodata")
     assert my_image_fill_hole.data[403, 1119] == 32
+
+
+@pytest.mark.unit_tests
+@pytest.mark.parametrize(
+    "dtm_path",
+    [["srtm_ventoux", "srtm90_non_void_filled", "N44E005.hgt"], ["srtm_ventoux", "N44E005_big_hole.tif"]],
+)
+def test_dtm_tiled_fillnodata(dtm_path):
+    """
+    Test tiled rio_fillnodata and streaming statistics give the results of the whole DTM ones
+    """
+    dtm_file = os.path.join(data_path(), "dtm", *dtm_path)
+
+    my_image = dtm_reader(dtm_file, fill_nodata="rio_fillnodata")
+    my_image_tiled = dtm_reader(dtm_file, fill_nodata="rio_fillnodata", tile_size=128, nb_workers=2)
+    np.testing.assert_array_equal(my_image_tiled.alt_data, my_image.alt_data)
+
+    assert my_image_tiled.stats["min"] == my_image.stats["min"]
+    assert my_image_tiled.stats["max"] == my_image.stats["max"]
+    assert my_image_tiled.stats["median"] == my_image.stats["median"]
+    np.testing.assert_allclose(my_image_tiled.stats["mean"], my_image.stats["mean"], rtol=1e-12)
+
+    # float DTM : approximated median
+    data = my_image.alt_data + 0.25
+    stats = streaming_stats(data, None, 100)
+    assert stats["min"] == data.min()
+    np.testing.assert_allclose(stats["mean"], data.mean(), rtol=1e-12)
+    assert abs(stats["median"] - np.median(data)) < (data.max() - data.min()) / 65536